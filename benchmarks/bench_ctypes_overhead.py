@@ -0,0 +1,55 @@
+"""
+Measures the Python/ctypes overhead of `Ni845x.spi_write_read` and friends.
+
+Runs the real `Ni845x` class against the in-process fake library with zero
+latency and a loopback responder, so the timings are dominated by argument
+marshalling and buffer handling in `ni845x.py` rather than by the bus.
+
+Usage:
+    python benchmarks/bench_ctypes_overhead.py --sizes 16 256 4096 65536
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.prism2.hardware import fake_ni845x, ni845x
+
+
+def time_per_call(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 256, 4096, 65536], help="Payload sizes in bytes")
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per measurement")
+    args = parser.parse_args()
+
+    fake = fake_ni845x.install()
+    with ni845x.Ni845x(fake.devices[0]) as device:
+        config = device.create_spi_config()
+        print(f"{'bytes':>8} {'bytes in':>10} {'bytearray in':>13} {'memoryview out':>15} {'readinto':>10}   (us/call)")
+        for size in args.sizes:
+            payload = bytes(size)
+            writable = bytearray(size)
+            out = bytearray(size)
+            cases = [
+                lambda: device.spi_write_read(config, payload),
+                lambda: device.spi_write_read(config, writable),
+                lambda: device.spi_write_read(config, payload, as_memoryview=True),
+                lambda: device.spi_write_readinto(config, writable, out),
+            ]
+            timings = [time_per_call(case, args.iterations) * 1e6 for case in cases]
+            print(f"{size:>8} {timings[0]:10.2f} {timings[1]:13.2f} {timings[2]:15.2f} {timings[3]:10.2f}")
+        config.close()
+        print(f"\nBuffer arena: {device.buffer_arena.stats()}")
+
+
+if __name__ == "__main__":
+    main()
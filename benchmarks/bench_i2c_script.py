@@ -0,0 +1,77 @@
+"""
+Compares I2C register-dump throughput of single calls against one script.
+
+The single-call path issues an `i2c_write` of the register address followed
+by an `i2c_read` per register (two USB round-trips each). The script path
+builds every register read into one `I2cScript` and runs it in a single
+exchange.
+
+Without a resource name the benchmark runs against the in-process fake
+library with a simulated USB latency per exchange.
+
+Usage:
+    python benchmarks/bench_i2c_script.py USB-8451 --address 0x50 --registers 256
+    python benchmarks/bench_i2c_script.py --latency-us 1000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.prism2.hardware import fake_ni845x
+from src.prism2.hardware.ni845x import Ni845x
+
+
+def bench_single_calls(device, address, registers, repeat):
+    config = device.create_i2c_config()
+    config.set_address(address)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for register in range(registers):
+            device.i2c_write(config, bytes([register]))
+            device.i2c_read(config, 1)
+    elapsed = time.perf_counter() - start
+    config.close()
+    return elapsed
+
+
+def bench_script(device, address, registers, repeat):
+    script = device.create_i2c_script()
+    for register in range(registers):
+        script.read_register(address, register, 1)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        device.i2c_script_run(script)
+        script.read_data()
+    elapsed = time.perf_counter() - start
+    script.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("resource_name", nargs="?", help="NI-845x resource name, e.g. USB-8451 (default: fake library)")
+    parser.add_argument("--address", type=lambda value: int(value, 0), default=0x50, help="7-bit slave address")
+    parser.add_argument("--registers", type=int, default=256, help="Registers per dump")
+    parser.add_argument("--repeat", type=int, default=10, help="Number of dumps")
+    parser.add_argument("--latency-us", type=float, default=1000.0, help="Simulated USB latency (fake library only)")
+    args = parser.parse_args()
+
+    if args.resource_name is None:
+        args.resource_name = fake_ni845x.install(latency=args.latency_us / 1e6).devices[0]
+
+    with Ni845x(args.resource_name) as device:
+        results = {
+            "single calls": bench_single_calls(device, args.address, args.registers, args.repeat),
+            "script": bench_script(device, args.address, args.registers, args.repeat),
+        }
+
+    total = args.registers * args.repeat
+    for name, elapsed in results.items():
+        print(f"{name:>12}: {elapsed:8.3f} s  {total / elapsed:10.0f} registers/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Measures aggregate SPI throughput when several NI-845x devices are driven
+from parallel worker threads.
+
+The real driver is replaced by the in-process fake library
+(`hardware.fake_ni845x`). Each `ni845xSpiWriteRead` sleeps for a
+configurable latency to mimic the USB round-trip, during which the GIL is
+released just as it is around a real DLL call. With per-device locking, throughput should scale roughly
+linearly with the number of devices.
+
+Usage:
+    python benchmarks/bench_parallel_devices.py --devices 4 --latency-us 1000
+"""
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.prism2.hardware import fake_ni845x, ni845x
+
+
+def run(num_devices, transfers, payload):
+    """Runs `transfers` SPI transfers on each of `num_devices` devices in parallel."""
+    devices = [ni845x.Ni845x(f"USB-8451-SIM-{index}") for index in range(num_devices)]
+    configs = [device.create_spi_config() for device in devices]
+    barrier = threading.Barrier(num_devices + 1)
+
+    def worker(device, config):
+        barrier.wait()
+        for _ in range(transfers):
+            device.spi_write_read(config, payload)
+
+    threads = [threading.Thread(target=worker, args=pair) for pair in zip(devices, configs)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    for config, device in zip(configs, devices):
+        config.close()
+        device.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=4, help="Maximum number of devices")
+    parser.add_argument("--transfers", type=int, default=200, help="Transfers per device")
+    parser.add_argument("--latency-us", type=float, default=1000.0, help="Simulated USB latency per transfer")
+    parser.add_argument("--payload", type=int, default=256, help="Bytes per transfer")
+    args = parser.parse_args()
+
+    fake_ni845x.install(
+        devices=[f"USB-8451-SIM-{index}" for index in range(args.devices)],
+        latency=args.latency_us / 1e6,
+    )
+    payload = bytes(args.payload)
+
+    baseline = None
+    print(f"{'devices':>7} {'transfers/s':>12} {'speedup':>8}")
+    for num_devices in range(1, args.devices + 1):
+        elapsed = run(num_devices, args.transfers, payload)
+        throughput = num_devices * args.transfers / elapsed
+        baseline = baseline or throughput
+        print(f"{num_devices:>7} {throughput:12.0f} {throughput / baseline:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,12 @@ class Application(ctk.CTk):
         self.view_model = MainViewModel()
         self.main_view = MainView(self, self.view_model)
         self.main_view.pack(side="top", fill="both", expand=True, padx=10, pady=10)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _on_close(self):
+        """Shuts down the ViewModel before the window is destroyed."""
+        self.view_model.shutdown()
+        self.destroy()
 
 if __name__ == "__main__":
     # Create and run the application
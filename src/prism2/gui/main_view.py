@@ -1,5 +1,13 @@
+import collections
+
 import customtkinter as ctk
 
+# When the command history is bounded, the history list shows one page of
+# this many rows at a time, so the widget count stays bounded however long
+# the run; older pages are built from the history (paging spilled records
+# back in) when the user pages back.
+HISTORY_PAGE_ROWS = 500
+
 class MainView(ctk.CTkFrame):
     def __init__(self, parent, view_model):
         super().__init__(parent)
@@ -98,8 +106,31 @@ class MainView(ctk.CTkFrame):
         self.send_button.grid(row=3, column=0, padx=10, pady=10, sticky="ew")
 
         # --- Create Command History Frame ---
-        self.history_frame = ctk.CTkScrollableFrame(self, label_text="Command History")
-        self.history_frame.grid(row=0, column=1, padx=10, pady=10, sticky="nsew")
+        self.history_container = ctk.CTkFrame(self, fg_color="transparent")
+        self.history_container.grid(row=0, column=1, padx=0, pady=0, sticky="nsew")
+        self.history_container.grid_columnconfigure(0, weight=1)
+        self.history_container.grid_rowconfigure(0, weight=1)
+
+        self.history_frame = ctk.CTkScrollableFrame(self.history_container, label_text="Command History")
+        self.history_frame.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
+        self._history_buttons = collections.deque()
+        self._history_page_start = 0 # Index of the first row shown
+        self._history_following = True # Whether new rows are added to the view
+
+        # Paging controls, only needed when the history is bounded.
+        self.history_nav_frame = ctk.CTkFrame(self.history_container)
+        self.history_nav_frame.grid_columnconfigure(1, weight=1)
+        self.older_button = ctk.CTkButton(self.history_nav_frame, text="< Older", width=80, command=self._show_older_page)
+        self.older_button.grid(row=0, column=0, padx=5, pady=5)
+        self.history_page_label = ctk.CTkLabel(self.history_nav_frame, text="")
+        self.history_page_label.grid(row=0, column=1, padx=5, pady=5)
+        self.newer_button = ctk.CTkButton(self.history_nav_frame, text="Newer >", width=80, command=self._show_newer_page)
+        self.newer_button.grid(row=0, column=2, padx=5, pady=5)
+        self.latest_button = ctk.CTkButton(self.history_nav_frame, text="Latest", width=80, command=self._show_latest_page)
+        self.latest_button.grid(row=0, column=3, padx=5, pady=5)
+        if self.view_model.command_history.bounded:
+            self.history_nav_frame.grid(row=1, column=0, padx=10, pady=(0, 10), sticky="ew")
+            self._update_history_nav()
 
         # --- Create Breakdown View Frame ---
         self.breakdown_textbox = ctk.CTkTextbox(
@@ -113,7 +144,7 @@ class MainView(ctk.CTkFrame):
         # --- Bindings and Traces ---
         self.view_model.device_list.trace_add("write", self._update_device_combobox)
         self.view_model.is_connected.trace_add("write", self._update_widget_states)
-        self.view_model.command_history.trace_add("write", self._render_command_history)
+        self.view_model.command_history.add_observer(self._add_history_rows)
         self.view_model.breakdown_text.trace_add("write", self._update_breakdown_view)
 
         # Set initial states
@@ -164,28 +195,86 @@ class MainView(ctk.CTkFrame):
         self.custom_cmd_entry.configure(state=spi_state)
         self.send_button.configure(state=spi_state)
 
-    def _render_command_history(self, *args):
-        """Clears and rebuilds the command history view."""
-        # Clear existing widgets
-        for widget in self.history_frame.winfo_children():
-            widget.destroy()
-
-        history = self.view_model.command_history.get()
+    def _make_history_row(self, i):
+        """Creates the button for history record `i`, reading it from the history."""
+        record = self.view_model.command_history[i]
+        cmd_str = f"CMD: {record.command_hex}"
+        resp_str = f"RSP: {record.response_hex}" if record.ok else "RSP: (failed)"
 
-        for i, item in enumerate(history):
-            cmd_str = f"CMD: {item['command']}"
-            resp_str = f"RSP: {item['response']}"
+        entry_text = f"{i+1:03d} | {cmd_str.ljust(25)} | {resp_str}"
 
-            entry_text = f"{i+1:03d} | {cmd_str.ljust(25)} | {resp_str}"
-
-            button = ctk.CTkButton(
-                self.history_frame,
-                text=entry_text,
-                font=("monospace", 12),
-                anchor="w",
-                command=lambda i=item: self.view_model.select_history_item(i)
-            )
-            button.pack(fill="x", padx=5, pady=2)
+        button = ctk.CTkButton(
+            self.history_frame,
+            text=entry_text,
+            font=("monospace", 12),
+            anchor="w",
+            command=lambda i=i: self.view_model.select_history_item(i)
+        )
+        button.pack(fill="x", padx=5, pady=2)
+        return button
+
+    def _add_history_rows(self, start, stop):
+        """
+        Adds rows for history records [start, stop); clears the view when the history is cleared.
+
+        An unbounded history lists every record. A bounded one shows a page
+        of HISTORY_PAGE_ROWS rows that follows the newest records until the
+        user pages back.
+        """
+        history = self.view_model.command_history
+        if stop == 0:
+            while self._history_buttons:
+                self._history_buttons.popleft().destroy()
+            self._history_page_start = 0
+            self._history_following = True
+            self._update_history_nav()
+            return
+
+        if not history.bounded:
+            for i in range(start, stop):
+                self._history_buttons.append(self._make_history_row(i))
+            return
+
+        if self._history_following:
+            for i in range(max(start, stop - HISTORY_PAGE_ROWS), stop):
+                self._history_buttons.append(self._make_history_row(i))
+            while len(self._history_buttons) > HISTORY_PAGE_ROWS:
+                self._history_buttons.popleft().destroy()
+            self._history_page_start = stop - len(self._history_buttons)
+        self._update_history_nav()
+
+    def _show_history_page(self, first):
+        """Rebuilds the history list with the page of rows starting at `first`."""
+        history = self.view_model.command_history
+        first = max(0, min(first, len(history) - HISTORY_PAGE_ROWS))
+        while self._history_buttons:
+            self._history_buttons.popleft().destroy()
+        stop = min(first + HISTORY_PAGE_ROWS, len(history))
+        for i in range(first, stop):
+            self._history_buttons.append(self._make_history_row(i))
+        self._history_page_start = first
+        self._history_following = stop == len(history)
+        self._update_history_nav()
+
+    def _show_older_page(self):
+        self._show_history_page(self._history_page_start - HISTORY_PAGE_ROWS)
+
+    def _show_newer_page(self):
+        self._show_history_page(self._history_page_start + HISTORY_PAGE_ROWS)
+
+    def _show_latest_page(self):
+        self._show_history_page(len(self.view_model.command_history))
+
+    def _update_history_nav(self):
+        """Updates the paging label and buttons for the rows shown."""
+        total = len(self.view_model.command_history)
+        first = self._history_page_start
+        stop = first + len(self._history_buttons)
+        self.history_page_label.configure(text=f"{first + 1}-{stop} of {total}" if stop else "")
+        self.older_button.configure(state="normal" if first > 0 else "disabled")
+        newer_state = "normal" if stop < total else "disabled"
+        self.newer_button.configure(state=newer_state)
+        self.latest_button.configure(state=newer_state)
 
     def _update_breakdown_view(self, *args):
         """Updates the breakdown textbox with new content."""
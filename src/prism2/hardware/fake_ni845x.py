@@ -0,0 +1,518 @@
+"""
+In-process stand-in for the NI-845x driver library.
+
+`FakeNi845xLibrary` implements the functions declared in
+`ni845x._PROTOTYPES` as ctypes callbacks with the same prototypes. Installed
+with `ni845x.set_library`, it lets the real `Ni845x` wrapper run end-to-end,
+argument marshalling included, on machines without the driver (e.g. Linux
+CI), so the ctypes layer can be tested and benchmarked without hardware.
+
+The simulated hardware is deliberately simple:
+
+- SPI transfers (direct and scripted) return `spi_responder(data, settings)`,
+  a loopback by default.
+- I2C targets are 256-byte register files: the first written byte sets the
+  register pointer, further writes and reads auto-increment it.
+- SPI streams return bytes from `stream_source(num_bytes)`, an incrementing
+  counter by default.
+- DIO ports read back the last value written.
+
+Every transfer-like call (SPI write/read, I2C read/write, script runs and
+stream reads) sleeps for `latency` seconds to mimic the USB round-trip.
+As with the real DLL, the GIL is released while a call is waiting.
+
+Typical use::
+
+    fake = fake_ni845x.install(latency=0.001)
+    with ni845x.Ni845x(fake.devices[0]) as device:
+        ...
+"""
+import collections
+import ctypes
+import itertools
+import time
+
+from . import ni845x
+
+# Status codes returned by the fake driver
+kFakeErrorResourceNotFound = -301
+kFakeErrorInvalidHandle = -302
+kFakeErrorInternal = -303
+
+_STATUS_MESSAGES = {
+    ni845x.kNi845xErrorNoError: "No error.",
+    kFakeErrorResourceNotFound: "Fake NI-845x: resource not found.",
+    kFakeErrorInvalidHandle: "Fake NI-845x: invalid handle.",
+    kFakeErrorInternal: "Fake NI-845x: internal error in the simulated driver.",
+}
+
+_COUNTER_PATTERN = bytes(range(256))
+
+
+def loopback_responder(data, settings):
+    """Default SPI responder: MISO returns exactly what was written on MOSI."""
+    return data
+
+
+class _CounterSource:
+    """Default stream source: an endless incrementing byte counter."""
+    def __init__(self):
+        self._offset = 0
+
+    def __call__(self, num_bytes):
+        start = self._offset % 256
+        repeats = (start + num_bytes) // 256 + 1
+        self._offset += num_bytes
+        return (_COUNTER_PATTERN * repeats)[start:start + num_bytes]
+
+
+class FakeNi845xLibrary:
+    """
+    Stand-in for the NI-845x library backed by ctypes callbacks.
+
+    Args:
+        devices (list of str): Resource names reported by FindDevice.
+        latency (float): Seconds each transfer-like call takes.
+        spi_responder (callable): (data bytes, settings dict) -> response
+            bytes for every SPI write/read.
+        stream_source (callable): num_bytes -> bytes for SPI stream reads.
+
+    Attributes:
+        calls (collections.Counter): Number of calls per function name.
+        i2c_memory (dict): 7-bit address -> 256-byte register file.
+        running_streams (set): Stream configuration handles currently started.
+        last_exception (Exception): Last error raised inside a callback.
+    """
+    def __init__(self, devices=("USB-8451-SIM",), latency=0.0, spi_responder=loopback_responder, stream_source=None):
+        self.devices = list(devices)
+        self.latency = latency
+        self.spi_responder = spi_responder
+        self.stream_source = stream_source or _CounterSource()
+        self.calls = collections.Counter()
+        self.i2c_memory = collections.defaultdict(lambda: bytearray(256))
+        self.running_streams = set()
+        self.last_exception = None
+
+        self._handles = itertools.count(1)
+        self._finds = {}
+        self._open_devices = {}
+        self._spi_configs = {}
+        self._i2c_configs = {}
+        self._stream_configs = {}
+        self._spi_scripts = {}
+        self._i2c_scripts = {}
+        self._i2c_pointers = collections.defaultdict(int)
+
+        for name, (argtypes, restype) in ni845x._PROTOTYPES.items():
+            implementation = getattr(self, name, None)
+            if implementation is not None:
+                setattr(self, name, self._callback(name, implementation, argtypes, restype))
+
+    def _callback(self, name, implementation, argtypes, restype):
+        """Wraps a Python implementation in a ctypes callback with the DLL prototype."""
+        # Strings arrive as raw addresses so that output buffers can be written.
+        argtypes = [ctypes.c_void_p if argtype is ni845x.pchar else argtype for argtype in argtypes]
+
+        def call(*args):
+            self.calls[name] += 1
+            try:
+                return implementation(*args)
+            except Exception as e:
+                self.last_exception = e
+                return None if restype is None else kFakeErrorInternal
+
+        callback = ctypes.CFUNCTYPE(restype, *argtypes)(call)
+        callback.__name__ = name
+        return callback
+
+    def _new_handle(self, table, state, handle_ptr):
+        handle = next(self._handles)
+        table[handle] = state
+        handle_ptr[0] = handle
+        return ni845x.kNi845xErrorNoError
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _write_string(address, text, size=256):
+        data = text.encode('utf-8')[:size - 1] + b'\0'
+        ctypes.memmove(address, data, len(data))
+
+    # --- Status and Device Functions ---
+    def ni845xStatusToString(self, status_code, size, buffer):
+        message = _STATUS_MESSAGES.get(status_code, f"Fake NI-845x: unknown status {status_code}.")
+        self._write_string(buffer, message, size)
+
+    def ni845xFindDevice(self, first_device, find_handle, num_found):
+        num_found[0] = len(self.devices)
+        if self.devices:
+            self._write_string(first_device, self.devices[0])
+        return self._new_handle(self._finds, iter(self.devices[1:]), find_handle)
+
+    def ni845xFindDeviceNext(self, find_handle, next_device):
+        if find_handle not in self._finds:
+            return kFakeErrorInvalidHandle
+        name = next(self._finds[find_handle], None)
+        if name is None:
+            return kFakeErrorResourceNotFound
+        self._write_string(next_device, name)
+        return ni845x.kNi845xErrorNoError
+
+    def ni845xCloseFindDeviceHandle(self, find_handle):
+        return ni845x.kNi845xErrorNoError if self._finds.pop(find_handle, None) is not None else kFakeErrorInvalidHandle
+
+    def ni845xOpen(self, resource_name, device_handle):
+        name = ctypes.string_at(resource_name).decode('utf-8')
+        if name not in self.devices:
+            return kFakeErrorResourceNotFound
+        state = {"name": name, "timeout": 30000, "io_voltage": ni845x.kNi845x33Volts, "dio": {}, "dio_direction": {}}
+        return self._new_handle(self._open_devices, state, device_handle)
+
+    def ni845xClose(self, device_handle):
+        return self._close(self._open_devices, device_handle)
+
+    def ni845xSetTimeout(self, device_handle, timeout):
+        return self._set(self._open_devices, device_handle, "timeout", timeout)
+
+    def ni845xSetIoVoltageLevel(self, device_handle, voltage_level):
+        return self._set(self._open_devices, device_handle, "io_voltage", voltage_level)
+
+    @staticmethod
+    def _close(table, handle):
+        return ni845x.kNi845xErrorNoError if table.pop(handle, None) is not None else kFakeErrorInvalidHandle
+
+    @staticmethod
+    def _set(table, handle, key, value):
+        if handle not in table:
+            return kFakeErrorInvalidHandle
+        table[handle][key] = value
+        return ni845x.kNi845xErrorNoError
+
+    # --- SPI Basic API ---
+    def ni845xSpiConfigurationOpen(self, configuration_handle):
+        state = {"port": 0, "chip_select": 0, "clock_rate_khz": 1000, "clock_polarity": 0, "clock_phase": 0, "bits_per_sample": 8}
+        return self._new_handle(self._spi_configs, state, configuration_handle)
+
+    def ni845xSpiConfigurationClose(self, configuration_handle):
+        return self._close(self._spi_configs, configuration_handle)
+
+    def ni845xSpiConfigurationSetClockRate(self, configuration_handle, clock_rate):
+        return self._set(self._spi_configs, configuration_handle, "clock_rate_khz", clock_rate)
+
+    def ni845xSpiConfigurationSetChipSelect(self, configuration_handle, chip_select):
+        return self._set(self._spi_configs, configuration_handle, "chip_select", chip_select)
+
+    def ni845xSpiConfigurationSetPort(self, configuration_handle, port):
+        return self._set(self._spi_configs, configuration_handle, "port", port)
+
+    def ni845xSpiConfigurationSetClockPolarity(self, configuration_handle, polarity):
+        return self._set(self._spi_configs, configuration_handle, "clock_polarity", polarity)
+
+    def ni845xSpiConfigurationSetClockPhase(self, configuration_handle, phase):
+        return self._set(self._spi_configs, configuration_handle, "clock_phase", phase)
+
+    def ni845xSpiConfigurationSetNumBitsPerSample(self, configuration_handle, bits):
+        return self._set(self._spi_configs, configuration_handle, "bits_per_sample", bits)
+
+    def ni845xSpiWriteRead(self, device_handle, configuration_handle, write_size, write_data, read_size, read_data):
+        if device_handle not in self._open_devices or configuration_handle not in self._spi_configs:
+            return kFakeErrorInvalidHandle
+        self._wait()
+        response = self.spi_responder(ctypes.string_at(write_data, write_size), self._spi_configs[configuration_handle])
+        ctypes.memmove(read_data, response, min(len(response), write_size))
+        read_size[0] = min(len(response), write_size)
+        return ni845x.kNi845xErrorNoError
+
+    # --- SPI Scripting API ---
+    def ni845xSpiScriptOpen(self, script_handle):
+        return self._new_handle(self._spi_scripts, {"steps": [], "reads": 0, "results": {}}, script_handle)
+
+    def ni845xSpiScriptClose(self, script_handle):
+        return self._close(self._spi_scripts, script_handle)
+
+    def ni845xSpiScriptReset(self, script_handle):
+        if script_handle not in self._spi_scripts:
+            return kFakeErrorInvalidHandle
+        self._spi_scripts[script_handle] = {"steps": [], "reads": 0, "results": {}}
+        return ni845x.kNi845xErrorNoError
+
+    def _script_step(self, scripts, script_handle, *step):
+        if script_handle not in scripts:
+            return kFakeErrorInvalidHandle
+        scripts[script_handle]["steps"].append(step)
+        return ni845x.kNi845xErrorNoError
+
+    def _script_read_step(self, scripts, script_handle, read_index, *step):
+        if script_handle not in scripts:
+            return kFakeErrorInvalidHandle
+        script = scripts[script_handle]
+        read_index[0] = script["reads"]
+        script["steps"].append(step + (script["reads"],))
+        script["reads"] += 1
+        return ni845x.kNi845xErrorNoError
+
+    def ni845xSpiScriptEnableSPI(self, script_handle):
+        return self._script_step(self._spi_scripts, script_handle, "enable")
+
+    def ni845xSpiScriptDisableSPI(self, script_handle):
+        return self._script_step(self._spi_scripts, script_handle, "disable")
+
+    def ni845xSpiScriptCSLow(self, script_handle, chip_select):
+        return self._script_step(self._spi_scripts, script_handle, "cs_low", chip_select)
+
+    def ni845xSpiScriptCSHigh(self, script_handle, chip_select):
+        return self._script_step(self._spi_scripts, script_handle, "cs_high", chip_select)
+
+    def ni845xSpiScriptClockRate(self, script_handle, clock_rate):
+        return self._script_step(self._spi_scripts, script_handle, "set", {"clock_rate_khz": clock_rate})
+
+    def ni845xSpiScriptClockPolarityPhase(self, script_handle, polarity, phase):
+        return self._script_step(self._spi_scripts, script_handle, "set", {"clock_polarity": polarity, "clock_phase": phase})
+
+    def ni845xSpiScriptNumBitsPerSample(self, script_handle, bits):
+        return self._script_step(self._spi_scripts, script_handle, "set", {"bits_per_sample": bits})
+
+    def ni845xSpiScriptWriteRead(self, script_handle, write_size, write_data, read_index):
+        data = ctypes.string_at(write_data, write_size)
+        return self._script_read_step(self._spi_scripts, script_handle, read_index, "write_read", data)
+
+    def ni845xSpiScriptDelay(self, script_handle, delay_ms):
+        return self._script_step(self._spi_scripts, script_handle, "delay", delay_ms / 1e3)
+
+    def ni845xSpiScriptUsDelay(self, script_handle, delay_us):
+        return self._script_step(self._spi_scripts, script_handle, "delay", delay_us / 1e6)
+
+    def ni845xSpiScriptRun(self, script_handle, device_handle, port):
+        if script_handle not in self._spi_scripts or device_handle not in self._open_devices:
+            return kFakeErrorInvalidHandle
+        self._wait()
+        script = self._spi_scripts[script_handle]
+        settings = {"port": port, "chip_select": 0, "clock_rate_khz": 1000, "clock_polarity": 0, "clock_phase": 0, "bits_per_sample": 8}
+        script["results"] = {}
+        for step in script["steps"]:
+            kind = step[0]
+            if kind == "set":
+                settings.update(step[1])
+            elif kind == "cs_low":
+                settings["chip_select"] = step[1]
+            elif kind == "delay":
+                time.sleep(step[1])
+            elif kind == "write_read":
+                script["results"][step[2]] = self.spi_responder(step[1], dict(settings))[:len(step[1])]
+        return ni845x.kNi845xErrorNoError
+
+    def _extract_size(self, scripts, script_handle, read_index, read_size):
+        if script_handle not in scripts or read_index not in scripts[script_handle]["results"]:
+            return kFakeErrorInvalidHandle
+        read_size[0] = len(scripts[script_handle]["results"][read_index])
+        return ni845x.kNi845xErrorNoError
+
+    def _extract(self, scripts, script_handle, read_index, read_data):
+        if script_handle not in scripts or read_index not in scripts[script_handle]["results"]:
+            return kFakeErrorInvalidHandle
+        data = scripts[script_handle]["results"][read_index]
+        ctypes.memmove(read_data, data, len(data))
+        return ni845x.kNi845xErrorNoError
+
+    def ni845xSpiScriptExtractReadDataSize(self, script_handle, read_index, read_size):
+        return self._extract_size(self._spi_scripts, script_handle, read_index, read_size)
+
+    def ni845xSpiScriptExtractReadData(self, script_handle, read_index, read_data):
+        return self._extract(self._spi_scripts, script_handle, read_index, read_data)
+
+    # --- SPI Stream API ---
+    def ni845xSpiStreamConfigurationOpen(self, stream_handle):
+        return self._new_handle(self._stream_configs, {}, stream_handle)
+
+    def ni845xSpiStreamConfigurationClose(self, stream_handle):
+        self.running_streams.discard(stream_handle)
+        return self._close(self._stream_configs, stream_handle)
+
+    def ni845xSpiStreamConfigurationSetNumBits(self, stream_handle, bits):
+        return self._set(self._stream_configs, stream_handle, "num_bits", bits)
+
+    def ni845xSpiStreamConfigurationSetNumSamples(self, stream_handle, num_samples):
+        return self._set(self._stream_configs, stream_handle, "num_samples", num_samples)
+
+    def ni845xSpiStreamConfigurationSetPacketSize(self, stream_handle, packet_size):
+        return self._set(self._stream_configs, stream_handle, "packet_size", packet_size)
+
+    def ni845xSpiStreamConfigurationSetClockPolarity(self, stream_handle, polarity):
+        return self._set(self._stream_configs, stream_handle, "clock_polarity", polarity)
+
+    def ni845xSpiStreamConfigurationSetClockPhase(self, stream_handle, phase):
+        return self._set(self._stream_configs, stream_handle, "clock_phase", phase)
+
+    def ni845xSpiStreamStart(self, device_handle, stream_handle):
+        if device_handle not in self._open_devices or stream_handle not in self._stream_configs:
+            return kFakeErrorInvalidHandle
+        self.running_streams.add(stream_handle)
+        return ni845x.kNi845xErrorNoError
+
+    def ni845xSpiStreamStop(self, device_handle, stream_handle):
+        if device_handle not in self._open_devices or stream_handle not in self._stream_configs:
+            return kFakeErrorInvalidHandle
+        self.running_streams.discard(stream_handle)
+        return ni845x.kNi845xErrorNoError
+
+    def ni845xSpiStreamRead(self, device_handle, stream_handle, num_bytes, read_data, read_size):
+        if device_handle not in self._open_devices or stream_handle not in self.running_streams:
+            return kFakeErrorInvalidHandle
+        self._wait()
+        data = self.stream_source(num_bytes)[:num_bytes]
+        ctypes.memmove(read_data, data, len(data))
+        read_size[0] = len(data)
+        return ni845x.kNi845xErrorNoError
+
+    # --- DIO Functions ---
+    def ni845xDioSetPortLineDirectionMap(self, device_handle, port, direction_map):
+        if device_handle not in self._open_devices:
+            return kFakeErrorInvalidHandle
+        self._open_devices[device_handle]["dio_direction"][port] = direction_map
+        return ni845x.kNi845xErrorNoError
+
+    def ni845xDioWritePort(self, device_handle, port, data):
+        if device_handle not in self._open_devices:
+            return kFakeErrorInvalidHandle
+        self._open_devices[device_handle]["dio"][port] = data
+        return ni845x.kNi845xErrorNoError
+
+    def ni845xDioReadPort(self, device_handle, port, read_data):
+        if device_handle not in self._open_devices:
+            return kFakeErrorInvalidHandle
+        read_data[0] = self._open_devices[device_handle]["dio"].get(port, 0)
+        return ni845x.kNi845xErrorNoError
+
+    # --- I2C Functions ---
+    def _i2c_write(self, address, data):
+        if data:
+            memory = self.i2c_memory[address]
+            pointer = data[0]
+            for value in data[1:]:
+                memory[pointer] = value
+                pointer = (pointer + 1) % 256
+            self._i2c_pointers[address] = pointer
+
+    def _i2c_read(self, address, num_bytes):
+        memory = self.i2c_memory[address]
+        pointer = self._i2c_pointers[address]
+        data = bytes(memory[(pointer + offset) % 256] for offset in range(num_bytes))
+        self._i2c_pointers[address] = (pointer + num_bytes) % 256
+        return data
+
+    def ni845xI2cConfigurationOpen(self, configuration_handle):
+        state = {"address": 0, "address_size": ni845x.kNi845xI2cAddress7Bit, "clock_rate_khz": 100, "port": 0}
+        return self._new_handle(self._i2c_configs, state, configuration_handle)
+
+    def ni845xI2cConfigurationClose(self, configuration_handle):
+        return self._close(self._i2c_configs, configuration_handle)
+
+    def ni845xI2cConfigurationSetAddress(self, configuration_handle, address):
+        return self._set(self._i2c_configs, configuration_handle, "address", address)
+
+    def ni845xI2cConfigurationSetAddressSize(self, configuration_handle, address_size):
+        return self._set(self._i2c_configs, configuration_handle, "address_size", address_size)
+
+    def ni845xI2cConfigurationSetClockRate(self, configuration_handle, clock_rate):
+        return self._set(self._i2c_configs, configuration_handle, "clock_rate_khz", clock_rate)
+
+    def ni845xI2cConfigurationSetPort(self, configuration_handle, port):
+        return self._set(self._i2c_configs, configuration_handle, "port", port)
+
+    def ni845xI2cWrite(self, device_handle, configuration_handle, write_size, write_data):
+        if device_handle not in self._open_devices or configuration_handle not in self._i2c_configs:
+            return kFakeErrorInvalidHandle
+        self._wait()
+        self._i2c_write(self._i2c_configs[configuration_handle]["address"], ctypes.string_at(write_data, write_size))
+        return ni845x.kNi845xErrorNoError
+
+    def ni845xI2cRead(self, device_handle, configuration_handle, num_bytes, read_size, read_data):
+        if device_handle not in self._open_devices or configuration_handle not in self._i2c_configs:
+            return kFakeErrorInvalidHandle
+        self._wait()
+        data = self._i2c_read(self._i2c_configs[configuration_handle]["address"], num_bytes)
+        ctypes.memmove(read_data, data, num_bytes)
+        read_size[0] = num_bytes
+        return ni845x.kNi845xErrorNoError
+
+    # --- I2C Scripting API ---
+    def ni845xI2cScriptOpen(self, script_handle):
+        return self._new_handle(self._i2c_scripts, {"steps": [], "reads": 0, "results": {}}, script_handle)
+
+    def ni845xI2cScriptClose(self, script_handle):
+        return self._close(self._i2c_scripts, script_handle)
+
+    def ni845xI2cScriptReset(self, script_handle):
+        if script_handle not in self._i2c_scripts:
+            return kFakeErrorInvalidHandle
+        self._i2c_scripts[script_handle] = {"steps": [], "reads": 0, "results": {}}
+        return ni845x.kNi845xErrorNoError
+
+    def ni845xI2cScriptClockRate(self, script_handle, clock_rate):
+        return self._script_step(self._i2c_scripts, script_handle, "clock_rate", clock_rate)
+
+    def ni845xI2cScriptIssueStart(self, script_handle):
+        return self._script_step(self._i2c_scripts, script_handle, "start")
+
+    def ni845xI2cScriptIssueStop(self, script_handle):
+        return self._script_step(self._i2c_scripts, script_handle, "stop")
+
+    def ni845xI2cScriptAddressWrite(self, script_handle, address):
+        return self._script_step(self._i2c_scripts, script_handle, "address", address)
+
+    def ni845xI2cScriptAddressRead(self, script_handle, address):
+        return self._script_step(self._i2c_scripts, script_handle, "address", address)
+
+    def ni845xI2cScriptWrite(self, script_handle, write_size, write_data):
+        return self._script_step(self._i2c_scripts, script_handle, "write", ctypes.string_at(write_data, write_size))
+
+    def ni845xI2cScriptRead(self, script_handle, num_bytes, nak, read_index):
+        return self._script_read_step(self._i2c_scripts, script_handle, read_index, "read", num_bytes)
+
+    def ni845xI2cScriptDelay(self, script_handle, delay_ms):
+        return self._script_step(self._i2c_scripts, script_handle, "delay", delay_ms / 1e3)
+
+    def ni845xI2cScriptUsDelay(self, script_handle, delay_us):
+        return self._script_step(self._i2c_scripts, script_handle, "delay", delay_us / 1e6)
+
+    def ni845xI2cScriptRun(self, script_handle, device_handle, port):
+        if script_handle not in self._i2c_scripts or device_handle not in self._open_devices:
+            return kFakeErrorInvalidHandle
+        self._wait()
+        script = self._i2c_scripts[script_handle]
+        script["results"] = {}
+        address = None
+        for step in script["steps"]:
+            kind = step[0]
+            if kind == "address":
+                address = step[1]
+            elif kind == "write":
+                self._i2c_write(address, step[1])
+            elif kind == "read":
+                script["results"][step[2]] = self._i2c_read(address, step[1])
+            elif kind == "delay":
+                time.sleep(step[1])
+        return ni845x.kNi845xErrorNoError
+
+    def ni845xI2cScriptExtractReadDataSize(self, script_handle, read_index, read_size):
+        return self._extract_size(self._i2c_scripts, script_handle, read_index, read_size)
+
+    def ni845xI2cScriptExtractReadData(self, script_handle, read_index, read_data):
+        return self._extract(self._i2c_scripts, script_handle, read_index, read_data)
+
+
+def install(**kwargs):
+    """
+    Creates a FakeNi845xLibrary and makes `ni845x` use it.
+
+    Args:
+        **kwargs: Passed to FakeNi845xLibrary.
+
+    Returns:
+        FakeNi845xLibrary: The installed fake, for configuration and inspection.
+    """
+    fake = FakeNi845xLibrary(**kwargs)
+    ni845x.set_library(fake)
+    return fake
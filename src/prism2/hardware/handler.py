@@ -1,9 +1,26 @@
-from .ni845x import Ni845x, Ni845xError
+import threading
+
+from .ni845x import (
+    Ni845x,
+    Ni845xError,
+    SpiConfigurationCache,
+    kNi845xSpiClockPhaseFirstEdge,
+    kNi845xSpiClockPolarityIdleLow,
+)
 
 class HardwareHandler:
-    def __init__(self):
+    """
+    Drives a single NI-845x device.
+
+    A handler may be used from worker threads; its own state (the open device
+    and cached SPI configurations) is guarded by a lock, and each device
+    serializes its DLL calls with a per-device lock (see `ni845x`). To drive
+    several devices in parallel, use one handler per device.
+    """
+    def __init__(self, max_spi_configs=8):
         self.device = None
-        self.spi_config = None
+        self.spi_configs = SpiConfigurationCache(max_spi_configs)
+        self._lock = threading.Lock()
 
     def find_devices(self):
         """
@@ -23,43 +40,50 @@ class HardwareHandler:
         """
         Opens a connection to the specified device.
         """
-        try:
-            self.device = Ni845x(resource_name)
-            # You might want to set default IO voltage or timeout here
-            return True
-        except Ni845xError as e:
-            print(f"Error opening device {resource_name}: {e}")
-            self.device = None
-            return False
+        with self._lock:
+            try:
+                self.device = Ni845x(resource_name)
+                # You might want to set default IO voltage or timeout here
+                return True
+            except Ni845xError as e:
+                print(f"Error opening device {resource_name}: {e}")
+                self.device = None
+                return False
 
     def close_device(self):
         """
         Closes the connection to the device.
         """
-        if self.device:
-            self.device.close()
-            self.device = None
+        with self._lock:
+            self.spi_configs.close()
+            if self.device:
+                self.device.close()
+                self.device = None
 
-    def spi_transfer(self, data):
+    def spi_transfer(self, data, port=0, chip_select=0, clock_rate_khz=1000,
+                     clock_polarity=kNi845xSpiClockPolarityIdleLow,
+                     clock_phase=kNi845xSpiClockPhaseFirstEdge, bits_per_sample=8):
         """
         Sends and receives data over SPI.
 
-        This is a placeholder. A real implementation would need to configure
-        SPI settings (clock rate, etc.) before the transfer.
-        """
-        if not self.device:
-            raise ConnectionError("No device is currently open.")
+        The bus settings select a cached SpiConfiguration, so switching
+        between targets only configures a handle the first time each
+        combination is used.
 
-        # This is a simplified example. A full implementation would likely
-        # create and configure an SpiConfiguration object.
-        if self.spi_config is None:
-            self.spi_config = self.device.create_spi_config()
-            # Set default configuration here if needed
-            # e.g., self.spi_config.set_clock_rate(1000)
+        Returns:
+            bytes: The response, or None if the transfer failed.
+        """
+        # The device serializes transfers anyway, so holding the handler lock
+        # for the whole transfer costs nothing and keeps the configuration
+        # from being evicted while it is in use.
+        with self._lock:
+            if not self.device:
+                raise ConnectionError("No device is currently open.")
 
-        try:
-            response = self.device.spi_write_read(self.spi_config, data)
-            return response
-        except Ni845xError as e:
-            print(f"SPI transfer error: {e}")
-            return None
+            try:
+                with self.spi_configs.use(port, chip_select, clock_rate_khz,
+                                          clock_polarity, clock_phase, bits_per_sample) as spi_config:
+                    return self.device.spi_write_read(spi_config, data)
+            except Ni845xError as e:
+                print(f"SPI transfer error: {e}")
+                return None
@@ -28,7 +28,7 @@ class MockHardwareHandler:
         print("Simulating closing device.")
         self.is_open = False
 
-    def spi_transfer(self, data):
+    def spi_transfer(self, data, **spi_settings):
         """
         Simulates an SPI data transfer.
 
@@ -37,6 +37,8 @@ class MockHardwareHandler:
 
         Args:
             data (bytes): The data to "send".
+            **spi_settings: Bus settings accepted by HardwareHandler.spi_transfer;
+                ignored by the simulation.
 
         Returns:
             bytes: The simulated response data.
@@ -6,40 +6,28 @@ This module provides a more Pythonic interface to the ni845x.dll,
 encapsulating handles and functions within classes for easier resource
 management and a more intuitive programming experience.
 
+Thread safety:
+    ctypes releases the GIL around every DLL call, so several devices can be
+    driven from parallel worker threads. Each handle object owns a reentrant
+    lock, and every `Ni845x` operation (transfers, script runs, stream reads,
+    DIO and close) holds its device's lock for the duration of the call.
+    Operations on one device are therefore serialized, while operations on
+    different devices run concurrently. The per-device buffer arena is only
+    touched under that lock.
+
+    Configuration and script objects are not locked. They may be shared by
+    several devices, but must not be modified while another thread is using
+    them in a transfer or script run.
+
 Date: 2024-07-31
 """
+import collections
+import contextlib
 import ctypes
-import platform
+import functools
+import os
 import sys
-
-# ==============================================================================
-# Load Library
-# ==============================================================================
-
-# Determine the DLL name based on the operating system
-# For simplicity, we assume 'ni845x.dll'. This might need adjustment
-# based on the actual DLL name and location on the system.
-_dll_name = 'Ni845x.dll'
-_dll_loaded = False
-ni845x_dll = None
-
-try:
-    # Use WinDLL for stdcall functions on Windows
-    # The header defines NI845X_FUNC as __stdcall for WIN32 and __fastcall for WIN64
-    # ctypes handles stdcall by default with WinDLL.
-    # For fastcall on x64, stdcall is often sufficient as the first 4 args
-    # are in registers, but ctypes handles this.
-    if platform.system() == 'Windows':
-        ni845x_dll = ctypes.WinDLL(_dll_name)
-    else:
-        # For other systems like Linux or macOS, use CDLL
-        ni845x_dll = ctypes.CDLL(_dll_name)
-    _dll_loaded = True
-except OSError as e:
-    print(f"Warning: Failed to load the ni845x library: {_dll_name}")
-    print(f"         This is expected if the NI-845x driver is not installed.")
-    print(f"         Application will run in a simulated mode without hardware access.")
-
+import threading
 
 # ==============================================================================
 # Type Definitions from ni845x.h
@@ -52,7 +40,7 @@ int32 = ctypes.c_long
 uInt32 = ctypes.c_ulong
 
 # Define NiHandle based on architecture
-if platform.architecture()[0] == '64bit':
+if ctypes.sizeof(ctypes.c_void_p) == 8:
     NiHandle = ctypes.c_ulonglong
 else:
     NiHandle = ctypes.c_ulong
@@ -100,6 +88,12 @@ kNi845xDioOutput = 1
 kNi845xDioLogicLow = 0
 kNi845xDioLogicHigh = 1
 
+# Transfer Limits
+# Payloads larger than this are split by `Ni845x.spi_write_read_chunked`.
+# The driver does not report a maximum transfer size, so this is a
+# conservative default that can be tuned per device (`Ni845x.spi_chunk_size`).
+SPI_CHUNK_SIZE = 4096
+
 # ==============================================================================
 # Error Handling
 # ==============================================================================
@@ -114,10 +108,8 @@ class Ni845xError(Exception):
 
     def _get_error_string(self):
         """Retrieves the error description from the DLL."""
-        # ni845xStatusToString function prototype
-        _status_to_string = ni845x_dll.ni845xStatusToString
-        _status_to_string.argtypes = [int32, uInt32, pchar]
-        _status_to_string.restype = None # It's a void function
+        if not _dll_loaded():
+            return "NI-845x driver not loaded."
 
         # Create a buffer to hold the error string
         # 256 bytes should be sufficient for error messages
@@ -125,7 +117,7 @@ class Ni845xError(Exception):
         error_buffer = ctypes.create_string_buffer(buffer_size)
 
         try:
-            _status_to_string(self.error_code, buffer_size, error_buffer)
+            ni845x_dll.ni845xStatusToString(self.error_code, buffer_size, error_buffer)
             return error_buffer.value.decode('utf-8')
         except Exception as e:
             return f"Failed to retrieve error string. Original exception: {e}"
@@ -139,97 +131,343 @@ def _check_error(status_code, func_name):
 # Function Prototypes (argtypes and restype)
 # ==============================================================================
 
-if _dll_loaded:
+# Every function is declared here as name: (argtypes, restype). Prototypes are
+# applied lazily the first time a function is used (see `_Library`).
+_PROTOTYPES = {
+    # Status Functions
+    'ni845xStatusToString': ([int32, uInt32, pchar], None),
+
     # Device Functions
-    ni845x_dll.ni845xFindDevice.argtypes = [pchar, pNiHandle, puInt32]
-    ni845x_dll.ni845xFindDevice.restype = int32
+    'ni845xFindDevice': ([pchar, pNiHandle, puInt32], int32),
+    'ni845xFindDeviceNext': ([NiHandle, pchar], int32),
+    'ni845xCloseFindDeviceHandle': ([NiHandle], int32),
+    'ni845xOpen': ([pchar, pNiHandle], int32),
+    'ni845xClose': ([NiHandle], int32),
+    'ni845xSetTimeout': ([NiHandle, uInt32], int32),
+    'ni845xSetIoVoltageLevel': ([NiHandle, uInt8], int32),
 
-    ni845x_dll.ni845xFindDeviceNext.argtypes = [NiHandle, pchar]
-    ni845x_dll.ni845xFindDeviceNext.restype = int32
+    # SPI Basic API
+    'ni845xSpiConfigurationOpen': ([pNiHandle], int32),
+    'ni845xSpiConfigurationClose': ([NiHandle], int32),
+    'ni845xSpiConfigurationSetClockRate': ([NiHandle, uInt16], int32),
+    'ni845xSpiConfigurationSetChipSelect': ([NiHandle, uInt32], int32),
+    'ni845xSpiConfigurationSetPort': ([NiHandle, uInt8], int32),
+    'ni845xSpiConfigurationSetClockPolarity': ([NiHandle, int32], int32),
+    'ni845xSpiConfigurationSetClockPhase': ([NiHandle, int32], int32),
+    'ni845xSpiConfigurationSetNumBitsPerSample': ([NiHandle, uInt16], int32),
+    'ni845xSpiWriteRead': ([NiHandle, NiHandle, uInt32, puInt8, puInt32, puInt8], int32),
+
+    # SPI Scripting API
+    'ni845xSpiScriptOpen': ([pNiHandle], int32),
+    'ni845xSpiScriptClose': ([NiHandle], int32),
+    'ni845xSpiScriptReset': ([NiHandle], int32),
+    'ni845xSpiScriptEnableSPI': ([NiHandle], int32),
+    'ni845xSpiScriptDisableSPI': ([NiHandle], int32),
+    'ni845xSpiScriptCSLow': ([NiHandle, uInt32], int32),
+    'ni845xSpiScriptCSHigh': ([NiHandle, uInt32], int32),
+    'ni845xSpiScriptClockRate': ([NiHandle, uInt16], int32),
+    'ni845xSpiScriptClockPolarityPhase': ([NiHandle, int32, int32], int32),
+    'ni845xSpiScriptNumBitsPerSample': ([NiHandle, uInt16], int32),
+    'ni845xSpiScriptWriteRead': ([NiHandle, uInt32, puInt8, puInt32], int32),
+    'ni845xSpiScriptDelay': ([NiHandle, uInt8], int32),
+    'ni845xSpiScriptUsDelay': ([NiHandle, uInt16], int32),
+    'ni845xSpiScriptRun': ([NiHandle, NiHandle, uInt8], int32),
+    'ni845xSpiScriptExtractReadDataSize': ([NiHandle, uInt32, puInt32], int32),
+    'ni845xSpiScriptExtractReadData': ([NiHandle, uInt32, puInt8], int32),
+
+    # SPI Stream API
+    'ni845xSpiStreamConfigurationOpen': ([pNiHandle], int32),
+    'ni845xSpiStreamConfigurationClose': ([NiHandle], int32),
+    'ni845xSpiStreamConfigurationSetNumBits': ([NiHandle, uInt8], int32),
+    'ni845xSpiStreamConfigurationSetNumSamples': ([NiHandle, uInt32], int32),
+    'ni845xSpiStreamConfigurationSetPacketSize': ([NiHandle, uInt32], int32),
+    'ni845xSpiStreamConfigurationSetClockPolarity': ([NiHandle, int32], int32),
+    'ni845xSpiStreamConfigurationSetClockPhase': ([NiHandle, int32], int32),
+    'ni845xSpiStreamStart': ([NiHandle, NiHandle], int32),
+    'ni845xSpiStreamRead': ([NiHandle, NiHandle, uInt32, puInt8, puInt32], int32),
+    'ni845xSpiStreamStop': ([NiHandle, NiHandle], int32),
 
-    ni845x_dll.ni845xCloseFindDeviceHandle.argtypes = [NiHandle]
-    ni845x_dll.ni845xCloseFindDeviceHandle.restype = int32
+    # DIO Functions
+    'ni845xDioSetPortLineDirectionMap': ([NiHandle, uInt8, uInt8], int32),
+    'ni845xDioWritePort': ([NiHandle, uInt8, uInt8], int32),
+    'ni845xDioReadPort': ([NiHandle, uInt8, puInt8], int32),
 
-    ni845x_dll.ni845xOpen.argtypes = [pchar, pNiHandle]
-    ni845x_dll.ni845xOpen.restype = int32
+    # I2C Functions
+    'ni845xI2cConfigurationOpen': ([pNiHandle], int32),
+    'ni845xI2cConfigurationClose': ([NiHandle], int32),
+    'ni845xI2cWrite': ([NiHandle, NiHandle, uInt32, puInt8], int32),
+    'ni845xI2cRead': ([NiHandle, NiHandle, uInt32, puInt32, puInt8], int32),
+    'ni845xI2cConfigurationSetAddress': ([NiHandle, uInt16], int32),
+    'ni845xI2cConfigurationSetAddressSize': ([NiHandle, int32], int32),
+    'ni845xI2cConfigurationSetClockRate': ([NiHandle, uInt16], int32),
+    'ni845xI2cConfigurationSetPort': ([NiHandle, uInt8], int32),
+
+    # I2C Scripting API
+    'ni845xI2cScriptOpen': ([pNiHandle], int32),
+    'ni845xI2cScriptClose': ([NiHandle], int32),
+    'ni845xI2cScriptReset': ([NiHandle], int32),
+    'ni845xI2cScriptClockRate': ([NiHandle, uInt16], int32),
+    'ni845xI2cScriptIssueStart': ([NiHandle], int32),
+    'ni845xI2cScriptIssueStop': ([NiHandle], int32),
+    'ni845xI2cScriptAddressWrite': ([NiHandle, uInt8], int32),
+    'ni845xI2cScriptAddressRead': ([NiHandle, uInt8], int32),
+    'ni845xI2cScriptWrite': ([NiHandle, uInt32, puInt8], int32),
+    'ni845xI2cScriptRead': ([NiHandle, uInt32, int32, puInt32], int32),
+    'ni845xI2cScriptDelay': ([NiHandle, uInt8], int32),
+    'ni845xI2cScriptUsDelay': ([NiHandle, uInt16], int32),
+    'ni845xI2cScriptRun': ([NiHandle, NiHandle, uInt8], int32),
+    'ni845xI2cScriptExtractReadDataSize': ([NiHandle, uInt32, puInt32], int32),
+    'ni845xI2cScriptExtractReadData': ([NiHandle, uInt32, puInt8], int32),
 
-    ni845x_dll.ni845xClose.argtypes = [NiHandle]
-    ni845x_dll.ni845xClose.restype = int32
+    # ... Add other function prototypes as needed ...
+}
 
-    ni845x_dll.ni845xSetTimeout.argtypes = [NiHandle, uInt32]
-    ni845x_dll.ni845xSetTimeout.restype = int32
+# ==============================================================================
+# Load Library
+# ==============================================================================
 
-    ni845x_dll.ni845xSetIoVoltageLevel.argtypes = [NiHandle, uInt8]
-    ni845x_dll.ni845xSetIoVoltageLevel.restype = int32
+# For simplicity, we assume 'Ni845x.dll'. Another name or full path can be
+# given with the PRISM2_NI845X_LIBRARY environment variable or `load_library`.
+_dll_name = 'Ni845x.dll'
+_dll_path_env = 'PRISM2_NI845X_LIBRARY'
 
-    # SPI Basic API
-    ni845x_dll.ni845xSpiConfigurationOpen.argtypes = [pNiHandle]
-    ni845x_dll.ni845xSpiConfigurationOpen.restype = int32
 
-    ni845x_dll.ni845xSpiConfigurationClose.argtypes = [NiHandle]
-    ni845x_dll.ni845xSpiConfigurationClose.restype = int32
+class _Library:
+    """
+    Proxy for the NI-845x shared library that loads it on first use.
 
-    ni845x_dll.ni845xSpiConfigurationSetClockRate.argtypes = [NiHandle, uInt16]
-    ni845x_dll.ni845xSpiConfigurationSetClockRate.restype = int32
+    Importing this module does not touch the driver. The library is opened
+    the first time a function is looked up (or `_dll_loaded()` is called),
+    each function gets its prototype from `_PROTOTYPES` when it is first
+    used, and the bound function is cached on the proxy so later calls cost
+    a plain attribute lookup.
+    """
+    def __init__(self):
+        self._dll = None
+        self._load_failed = False
+
+    def _load(self):
+        """Returns the loaded library, loading it if necessary, or None on failure."""
+        if self._dll is None and not self._load_failed:
+            name = os.environ.get(_dll_path_env, _dll_name)
+            try:
+                self._set(_open_library(name))
+            except OSError:
+                self._load_failed = True
+                print(f"Warning: Failed to load the ni845x library: {name}")
+                print(f"         This is expected if the NI-845x driver is not installed.")
+                print(f"         Application will run in a simulated mode without hardware access.")
+        return self._dll
+
+    def _set(self, dll):
+        """Replaces the underlying library and drops all cached functions."""
+        for name in [name for name in vars(self) if not name.startswith('_')]:
+            delattr(self, name)
+        self._dll = dll
+        self._load_failed = dll is None
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        dll = self._load()
+        if dll is None:
+            raise Ni845xError(-1, f"{name}: NI-845x driver not loaded.")
+        func = getattr(dll, name)
+        if name in _PROTOTYPES:
+            func.argtypes, func.restype = _PROTOTYPES[name]
+        setattr(self, name, func)
+        return func
+
+
+def _open_library(name):
+    """Opens the driver library with the calling convention used by ni845x.h."""
+    # Use WinDLL for stdcall functions on Windows
+    # The header defines NI845X_FUNC as __stdcall for WIN32 and __fastcall for WIN64
+    # ctypes handles stdcall by default with WinDLL.
+    # For fastcall on x64, stdcall is often sufficient as the first 4 args
+    # are in registers, but ctypes handles this.
+    if sys.platform == 'win32':
+        return ctypes.WinDLL(name)
+    # For other systems like Linux or macOS, use CDLL
+    return ctypes.CDLL(name)
 
-    ni845x_dll.ni845xSpiConfigurationSetChipSelect.argtypes = [NiHandle, uInt32]
-    ni845x_dll.ni845xSpiConfigurationSetChipSelect.restype = int32
 
-    ni845x_dll.ni845xSpiConfigurationSetPort.argtypes = [NiHandle, uInt8]
-    ni845x_dll.ni845xSpiConfigurationSetPort.restype = int32
+ni845x_dll = _Library()
 
-    ni845x_dll.ni845xSpiConfigurationSetClockPolarity.argtypes = [NiHandle, int32]
-    ni845x_dll.ni845xSpiConfigurationSetClockPolarity.restype = int32
 
-    ni845x_dll.ni845xSpiConfigurationSetClockPhase.argtypes = [NiHandle, int32]
-    ni845x_dll.ni845xSpiConfigurationSetClockPhase.restype = int32
+def load_library(path=None):
+    """
+    Loads the NI-845x library now, from an explicit path if given.
 
-    ni845x_dll.ni845xSpiConfigurationSetNumBitsPerSample.argtypes = [NiHandle, uInt16]
-    ni845x_dll.ni845xSpiConfigurationSetNumBitsPerSample.restype = int32
+    Args:
+        path (str, optional): Library name or path. Defaults to the
+            PRISM2_NI845X_LIBRARY environment variable, then 'Ni845x.dll'.
 
-    ni845x_dll.ni845xSpiWriteRead.argtypes = [NiHandle, NiHandle, uInt32, puInt8, puInt32, puInt8]
-    ni845x_dll.ni845xSpiWriteRead.restype = int32
+    Raises:
+        OSError: If the library cannot be loaded.
+    """
+    ni845x_dll._set(_open_library(path or os.environ.get(_dll_path_env, _dll_name)))
 
-    # DIO Functions
-    ni845x_dll.ni845xDioSetPortLineDirectionMap.argtypes = [NiHandle, uInt8, uInt8]
-    ni845x_dll.ni845xDioSetPortLineDirectionMap.restype = int32
 
-    ni845x_dll.ni845xDioWritePort.argtypes = [NiHandle, uInt8, uInt8]
-    ni845x_dll.ni845xDioWritePort.restype = int32
+def set_library(dll):
+    """
+    Uses an already loaded library object (or a stand-in with the same
+    function names) for all subsequent calls. Passing None unloads it.
+    """
+    ni845x_dll._set(dll)
 
-    ni845x_dll.ni845xDioReadPort.argtypes = [NiHandle, uInt8, puInt8]
-    ni845x_dll.ni845xDioReadPort.restype = int32
 
-    # I2C Functions
-    ni845x_dll.ni845xI2cConfigurationOpen.argtypes = [pNiHandle]
-    ni845x_dll.ni845xI2cConfigurationOpen.restype = int32
+def _dll_loaded():
+    """Returns True if the NI-845x library is (or can now be) loaded."""
+    return ni845x_dll._load() is not None
 
-    ni845x_dll.ni845xI2cConfigurationClose.argtypes = [NiHandle]
-    ni845x_dll.ni845xI2cConfigurationClose.restype = int32
 
-    ni845x_dll.ni845xI2cWrite.argtypes = [NiHandle, NiHandle, uInt32, puInt8]
-    ni845x_dll.ni845xI2cWrite.restype = int32
+# ==============================================================================
+# Buffer Helpers
+# ==============================================================================
 
-    ni845x_dll.ni845xI2cRead.argtypes = [NiHandle, NiHandle, uInt32, puInt32, puInt8]
-    ni845x_dll.ni845xI2cRead.restype = int32
+def _byte_view(data):
+    """
+    Returns a flat, unsigned-byte memoryview over `data` without copying.
+
+    Any buffer-protocol object (bytes, bytearray, memoryview, array) is
+    viewed in place. Sequences of ints are still accepted for backward
+    compatibility but are converted to bytes first.
+    """
+    try:
+        view = memoryview(data)
+    except TypeError:
+        view = memoryview(bytes(data))
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    return view
+
+
+def _input_buffer(data):
+    """
+    Wraps write data in a uInt8 array, aliasing writable buffers in place and
+    copying read-only ones once with `from_buffer_copy`.
+
+    Returns:
+        tuple: (ctypes array, size in bytes)
+    """
+    view = _byte_view(data)
+    size = len(view)
+    if view.readonly:
+        return (uInt8 * size).from_buffer_copy(view), size
+    return (uInt8 * size).from_buffer(view), size
+
+
+class BufferArena:
+    """
+    Pool of reusable ctypes transfer buffers grouped in power-of-two size classes.
+
+    Each `Ni845x` device owns one arena so that tight transfer loops reuse the
+    same ctypes arrays instead of allocating new ones on every call. Buffers
+    larger than `max_buffer_size` are allocated on demand and never retained.
+
+    Attributes:
+        hits (int): Number of acquisitions served from the pool.
+        misses (int): Number of acquisitions that had to allocate.
+        bytes_held (int): Bytes currently held idle by the pool.
+    """
+    def __init__(self, max_buffer_size=1 << 20, max_buffers_per_class=4):
+        self.max_buffer_size = max_buffer_size
+        self.max_buffers_per_class = max_buffers_per_class
+        self._free = {}
+        self.hits = 0
+        self.misses = 0
+        self.bytes_held = 0
+
+    @staticmethod
+    def size_class(size):
+        """Returns the smallest power of two that can hold `size` bytes."""
+        return 1 << max(size - 1, 0).bit_length()
+
+    def acquire(self, size):
+        """
+        Returns a uInt8 array of at least `size` bytes.
+
+        Requests larger than `max_buffer_size` are never pooled, so they get
+        an array of exactly `size` bytes rather than a rounded-up size class.
+        """
+        if size > self.max_buffer_size:
+            self.misses += 1
+            return (uInt8 * size)()
+        size_class = self.size_class(size)
+        free = self._free.get(size_class)
+        if free:
+            self.hits += 1
+            self.bytes_held -= size_class
+            return free.pop()
+        self.misses += 1
+        return (uInt8 * size_class)()
+
+    def release(self, buffer):
+        """Returns a buffer obtained from `acquire` to the pool."""
+        size_class = len(buffer)
+        if size_class > self.max_buffer_size:
+            return
+        free = self._free.setdefault(size_class, [])
+        if len(free) < self.max_buffers_per_class:
+            free.append(buffer)
+            self.bytes_held += size_class
+
+    def clear(self):
+        """Drops all pooled buffers."""
+        self._free.clear()
+        self.bytes_held = 0
+
+    def stats(self):
+        """Returns the pool counters as a dict."""
+        return {"hits": self.hits, "misses": self.misses, "bytes_held": self.bytes_held}
+
+
+def _output_buffer(buffer, size):
+    """
+    Aliases the first `size` bytes of a writable buffer as a ctypes uInt8 array.
+
+    Raises:
+        TypeError: If the buffer is read-only.
+        ValueError: If the buffer is smaller than `size` bytes.
+    """
+    view = memoryview(buffer)
+    if view.readonly:
+        raise TypeError("Read buffer must be writable (e.g. bytearray or memoryview).")
+    if view.nbytes < size:
+        raise ValueError(f"Read buffer too small: need {size} bytes, got {view.nbytes}.")
+    return (uInt8 * size).from_buffer(view)
 
-    # ... Add other function prototypes as needed ...
 
 # ==============================================================================
 # Object-Oriented Wrapper Classes
 # ==============================================================================
 
+def _locked(method):
+    """Decorator that runs a handle method while holding the handle's lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class _HandleManager:
     """Base class to manage NI-845x handles and ensure they are closed."""
     def __init__(self, handle, close_func):
         self._handle = handle
         self._close_func = close_func
         self._closed = False
+        self._lock = threading.RLock()
 
     def __del__(self):
         """Destructor to ensure the handle is closed."""
-        self.close()
+        # The handle is only set once opening succeeded; a failed __init__
+        # leaves nothing to close.
+        if getattr(self, '_handle', None):
+            self.close()
 
+    @_locked
     def close(self):
         """Closes the handle."""
         if self._handle and not self._closed:
@@ -246,44 +484,380 @@ class _HandleManager:
 
 
 class SpiConfiguration(_HandleManager):
-    """Manages an SPI Configuration session."""
+    """
+    Manages an SPI Configuration session.
+
+    The settings applied through the setters are recorded on the object
+    (starting from the driver defaults), so callers such as
+    `SpiConfigurationCache` and chunked transfers can inspect them.
+    """
     def __init__(self):
         """Opens a new SPI configuration handle."""
         handle = NiHandle()
         status = ni845x_dll.ni845xSpiConfigurationOpen(ctypes.byref(handle))
         _check_error(status, 'ni845xSpiConfigurationOpen')
         super().__init__(handle, ni845x_dll.ni845xSpiConfigurationClose)
+        self.port = 0
+        self.chip_select = 0
+        self.clock_rate_khz = 1000
+        self.clock_polarity = kNi845xSpiClockPolarityIdleLow
+        self.clock_phase = kNi845xSpiClockPhaseFirstEdge
+        self.bits_per_sample = 8
+
+    @property
+    def settings(self):
+        """(port, chip select, clock kHz, CPOL, CPHA, bits per sample)"""
+        return (self.port, self.chip_select, self.clock_rate_khz,
+                self.clock_polarity, self.clock_phase, self.bits_per_sample)
 
     def set_clock_rate(self, rate_khz):
         """Sets the SPI clock rate in kHz."""
         status = ni845x_dll.ni845xSpiConfigurationSetClockRate(self.handle, uInt16(rate_khz))
         _check_error(status, 'ni845xSpiConfigurationSetClockRate')
+        self.clock_rate_khz = rate_khz
 
     def set_chip_select(self, cs_line):
         """Sets the active chip select line."""
         status = ni845x_dll.ni845xSpiConfigurationSetChipSelect(self.handle, uInt32(cs_line))
         _check_error(status, 'ni845xSpiConfigurationSetChipSelect')
+        self.chip_select = cs_line
 
     def set_port(self, port_number):
         """Sets the SPI port number."""
         status = ni845x_dll.ni845xSpiConfigurationSetPort(self.handle, uInt8(port_number))
         _check_error(status, 'ni845xSpiConfigurationSetPort')
+        self.port = port_number
 
     def set_clock_polarity(self, polarity):
         """Sets the clock polarity (CPOL)."""
         status = ni845x_dll.ni845xSpiConfigurationSetClockPolarity(self.handle, int32(polarity))
         _check_error(status, 'ni845xSpiConfigurationSetClockPolarity')
+        self.clock_polarity = polarity
 
     def set_clock_phase(self, phase):
         """Sets the clock phase (CPHA)."""
         status = ni845x_dll.ni845xSpiConfigurationSetClockPhase(self.handle, int32(phase))
         _check_error(status, 'ni845xSpiConfigurationSetClockPhase')
+        self.clock_phase = phase
 
     def set_num_bits_per_sample(self, bits):
         """Sets the number of bits per sample."""
         status = ni845x_dll.ni845xSpiConfigurationSetNumBitsPerSample(self.handle, uInt16(bits))
         _check_error(status, 'ni845xSpiConfigurationSetNumBitsPerSample')
+        self.bits_per_sample = bits
+
+
+class SpiConfigurationCache:
+    """
+    Keeps open SPI configuration handles keyed by bus settings.
+
+    Talking to several chip selects at different clocks would otherwise cost
+    one DLL call per setter before every transfer. The cache opens and
+    configures one handle per distinct (port, chip select, clock kHz, CPOL,
+    CPHA, bits per sample) combination and hands it out again on later
+    requests. When more than `max_handles` are cached, the least recently
+    used handle is evicted.
+
+    Handles are reference counted: take one with `use()` (or `acquire()` and
+    `release()`), and an evicted handle is only closed once every caller
+    using it has released it, so a handle is never closed mid-transfer.
+
+    Attributes:
+        hits (int): Requests served by an already open handle.
+        misses (int): Requests that opened and configured a new handle.
+        evictions (int): Handles evicted to stay within `max_handles`.
+    """
+    def __init__(self, max_handles=8):
+        self.max_handles = max_handles
+        self._configs = collections.OrderedDict()
+        self._users = {} # SpiConfiguration -> number of callers holding it
+        self._retired = set() # Evicted handles still in use; closed on their last release
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._configs)
+
+    def acquire(self, port=0, chip_select=0, clock_rate_khz=1000,
+                clock_polarity=kNi845xSpiClockPolarityIdleLow,
+                clock_phase=kNi845xSpiClockPhaseFirstEdge, bits_per_sample=8):
+        """
+        Returns an open SpiConfiguration with the given settings applied.
+
+        The handle stays open until it is passed to `release()`.
+        """
+        key = (port, chip_select, clock_rate_khz, clock_polarity, clock_phase, bits_per_sample)
+        with self._lock:
+            config = self._configs.get(key)
+            if config is not None:
+                self._configs.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                config = SpiConfiguration()
+                try:
+                    config.set_port(port)
+                    config.set_chip_select(chip_select)
+                    config.set_clock_rate(clock_rate_khz)
+                    config.set_clock_polarity(clock_polarity)
+                    config.set_clock_phase(clock_phase)
+                    config.set_num_bits_per_sample(bits_per_sample)
+                except Ni845xError:
+                    config.close()
+                    raise
+                self._configs[key] = config
+            self._users[config] = self._users.get(config, 0) + 1
+
+            while len(self._configs) > self.max_handles:
+                _, evicted = self._configs.popitem(last=False)
+                self._retire(evicted)
+                self.evictions += 1
+            return config
+
+    def release(self, config):
+        """Returns a handle obtained from `acquire()`."""
+        with self._lock:
+            users = self._users[config] - 1
+            if users:
+                self._users[config] = users
+                return
+            del self._users[config]
+            if config in self._retired:
+                self._retired.remove(config)
+                config.close()
+
+    @contextlib.contextmanager
+    def use(self, *args, **kwargs):
+        """
+        Context manager that acquires a handle (see `acquire()`) and releases it on exit.
+
+        Example:
+            with cache.use(chip_select=1, clock_rate_khz=500) as config:
+                device.spi_write_read(config, data)
+        """
+        config = self.acquire(*args, **kwargs)
+        try:
+            yield config
+        finally:
+            self.release(config)
+
+    def _retire(self, config):
+        # Called with the lock held.
+        if config in self._users:
+            self._retired.add(config)
+        else:
+            config.close()
+
+    def close(self):
+        """Closes every cached handle; handles still in use are closed when released."""
+        with self._lock:
+            while self._configs:
+                _, config = self._configs.popitem(last=False)
+                self._retire(config)
+
+    def stats(self):
+        """Returns the cache counters as a dict."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "open_handles": len(self._configs) + len(self._retired),
+        }
+
+
+class SpiStreamConfiguration(_HandleManager):
+    """Manages an SPI Stream configuration session (USB-8452 only)."""
+    def __init__(self):
+        """Opens a new SPI stream configuration handle."""
+        handle = NiHandle()
+        status = ni845x_dll.ni845xSpiStreamConfigurationOpen(ctypes.byref(handle))
+        _check_error(status, 'ni845xSpiStreamConfigurationOpen')
+        super().__init__(handle, ni845x_dll.ni845xSpiStreamConfigurationClose)
+
+    def set_num_bits(self, bits):
+        """Sets the number of bits per sample."""
+        status = ni845x_dll.ni845xSpiStreamConfigurationSetNumBits(self.handle, uInt8(bits))
+        _check_error(status, 'ni845xSpiStreamConfigurationSetNumBits')
 
+    def set_num_samples(self, num_samples):
+        """Sets the number of samples to acquire."""
+        status = ni845x_dll.ni845xSpiStreamConfigurationSetNumSamples(self.handle, uInt32(num_samples))
+        _check_error(status, 'ni845xSpiStreamConfigurationSetNumSamples')
+
+    def set_packet_size(self, packet_size):
+        """Sets the number of samples transferred per USB packet."""
+        status = ni845x_dll.ni845xSpiStreamConfigurationSetPacketSize(self.handle, uInt32(packet_size))
+        _check_error(status, 'ni845xSpiStreamConfigurationSetPacketSize')
+
+    def set_clock_polarity(self, polarity):
+        """Sets the clock polarity (CPOL)."""
+        status = ni845x_dll.ni845xSpiStreamConfigurationSetClockPolarity(self.handle, int32(polarity))
+        _check_error(status, 'ni845xSpiStreamConfigurationSetClockPolarity')
+
+    def set_clock_phase(self, phase):
+        """Sets the clock phase (CPHA)."""
+        status = ni845x_dll.ni845xSpiStreamConfigurationSetClockPhase(self.handle, int32(phase))
+        _check_error(status, 'ni845xSpiStreamConfigurationSetClockPhase')
+
+
+class _Script(_HandleManager):
+    """
+    Base class for NI-845x script handles.
+
+    Keeps track of the script read indices returned by read steps and
+    extracts their data after the script has run. Subclasses name the
+    protocol-specific extraction functions.
+    """
+    _extract_read_data_size_name = None
+    _extract_read_data_name = None
+
+    def __init__(self, handle, close_func):
+        super().__init__(handle, close_func)
+        self.read_indices = []
+
+    def extract_read_data_size(self, read_index):
+        """Returns the number of bytes read by a read step after the script ran."""
+        read_size = uInt32()
+        status = getattr(ni845x_dll, self._extract_read_data_size_name)(self.handle, read_index, ctypes.byref(read_size))
+        _check_error(status, self._extract_read_data_size_name)
+        return read_size.value
+
+    def extract_read_data(self, read_index, read_buffer=None):
+        """
+        Extracts the data read by a read step after the script ran.
+
+        Args:
+            read_index (int): The script read index returned by the read step.
+            read_buffer (writable bytes-like, optional): If given, the data is
+                copied directly into it.
+
+        Returns:
+            memoryview: A view of the extracted bytes.
+        """
+        read_size = self.extract_read_data_size(read_index)
+        if read_buffer is None:
+            read_buffer = bytearray(read_size)
+        status = getattr(ni845x_dll, self._extract_read_data_name)(self.handle, read_index, _output_buffer(read_buffer, read_size))
+        _check_error(status, self._extract_read_data_name)
+        return memoryview(read_buffer)[:read_size]
+
+    def read_data(self):
+        """
+        Extracts the read data of every read step after the script ran.
+
+        All steps are copied once into a single contiguous bytearray.
+
+        Returns:
+            list of memoryview: One view per read step, in order.
+        """
+        sizes = [self.extract_read_data_size(index) for index in self.read_indices]
+        view = memoryview(bytearray(sum(sizes)))
+        results = []
+        offset = 0
+        for read_index, size in zip(self.read_indices, sizes):
+            results.append(self.extract_read_data(read_index, view[offset:offset + size]))
+            offset += size
+        return results
+
+
+class SpiScript(_Script):
+    """
+    Manages an SPI script: a sequence of SPI operations run on the device in
+    a single USB exchange.
+
+    Build the script with the step methods below, execute it with
+    `Ni845x.spi_script_run`, then extract the data read by each
+    `write_read` step. Example (Write Enable + Page Program + status poll)::
+
+        script = device.create_spi_script()
+        script.enable_spi()
+        script.set_clock_rate(1000)
+        script.cs_low(0); script.write_read(b'\x06'); script.cs_high(0)
+        script.cs_low(0); script.write_read(page_program); script.cs_high(0)
+        script.cs_low(0); status = script.write_read(b'\x05\x00'); script.cs_high(0)
+        script.disable_spi()
+        device.spi_script_run(script)
+        wip = script.extract_read_data(status)[1] & 0x01
+    """
+    _extract_read_data_size_name = 'ni845xSpiScriptExtractReadDataSize'
+    _extract_read_data_name = 'ni845xSpiScriptExtractReadData'
+
+    def __init__(self):
+        """Opens a new SPI script handle."""
+        handle = NiHandle()
+        status = ni845x_dll.ni845xSpiScriptOpen(ctypes.byref(handle))
+        _check_error(status, 'ni845xSpiScriptOpen')
+        super().__init__(handle, ni845x_dll.ni845xSpiScriptClose)
+
+    def reset(self):
+        """Removes all steps from the script."""
+        status = ni845x_dll.ni845xSpiScriptReset(self.handle)
+        _check_error(status, 'ni845xSpiScriptReset')
+        self.read_indices = []
+
+    def enable_spi(self):
+        """Adds a step that switches the port's pins to SPI mode."""
+        status = ni845x_dll.ni845xSpiScriptEnableSPI(self.handle)
+        _check_error(status, 'ni845xSpiScriptEnableSPI')
+
+    def disable_spi(self):
+        """Adds a step that releases the port's pins from SPI mode."""
+        status = ni845x_dll.ni845xSpiScriptDisableSPI(self.handle)
+        _check_error(status, 'ni845xSpiScriptDisableSPI')
+
+    def cs_low(self, cs_line):
+        """Adds a step that asserts (drives low) a chip select line."""
+        status = ni845x_dll.ni845xSpiScriptCSLow(self.handle, uInt32(cs_line))
+        _check_error(status, 'ni845xSpiScriptCSLow')
+
+    def cs_high(self, cs_line):
+        """Adds a step that deasserts (drives high) a chip select line."""
+        status = ni845x_dll.ni845xSpiScriptCSHigh(self.handle, uInt32(cs_line))
+        _check_error(status, 'ni845xSpiScriptCSHigh')
+
+    def set_clock_rate(self, rate_khz):
+        """Adds a step that sets the SPI clock rate in kHz."""
+        status = ni845x_dll.ni845xSpiScriptClockRate(self.handle, uInt16(rate_khz))
+        _check_error(status, 'ni845xSpiScriptClockRate')
+
+    def set_clock_polarity_phase(self, polarity, phase):
+        """Adds a step that sets the clock polarity (CPOL) and phase (CPHA)."""
+        status = ni845x_dll.ni845xSpiScriptClockPolarityPhase(self.handle, int32(polarity), int32(phase))
+        _check_error(status, 'ni845xSpiScriptClockPolarityPhase')
+
+    def set_num_bits_per_sample(self, bits):
+        """Adds a step that sets the number of bits per sample."""
+        status = ni845x_dll.ni845xSpiScriptNumBitsPerSample(self.handle, uInt16(bits))
+        _check_error(status, 'ni845xSpiScriptNumBitsPerSample')
+
+    def write_read(self, write_data):
+        """
+        Adds an SPI write/read step.
+
+        Args:
+            write_data (bytes-like): The data to write.
+
+        Returns:
+            int: The script read index used to extract this step's read data.
+        """
+        write_buffer, write_size = _input_buffer(write_data)
+        read_index = uInt32()
+        status = ni845x_dll.ni845xSpiScriptWriteRead(self.handle, write_size, write_buffer, ctypes.byref(read_index))
+        _check_error(status, 'ni845xSpiScriptWriteRead')
+        self.read_indices.append(read_index.value)
+        return read_index.value
+
+    def delay_ms(self, delay):
+        """Adds a delay step in milliseconds (0-255)."""
+        status = ni845x_dll.ni845xSpiScriptDelay(self.handle, uInt8(delay))
+        _check_error(status, 'ni845xSpiScriptDelay')
+
+    def delay_us(self, delay):
+        """Adds a delay step in microseconds (0-65535)."""
+        status = ni845x_dll.ni845xSpiScriptUsDelay(self.handle, uInt16(delay))
+        _check_error(status, 'ni845xSpiScriptUsDelay')
 
 class I2cConfiguration(_HandleManager):
     """Manages an I2C Configuration session."""
@@ -293,8 +867,155 @@ class I2cConfiguration(_HandleManager):
         status = ni845x_dll.ni845xI2cConfigurationOpen(ctypes.byref(handle))
         _check_error(status, 'ni845xI2cConfigurationOpen')
         super().__init__(handle, ni845x_dll.ni845xI2cConfigurationClose)
-   
-    # Add I2C configuration methods here...
+
+    def set_address(self, address):
+        """Sets the slave address."""
+        status = ni845x_dll.ni845xI2cConfigurationSetAddress(self.handle, uInt16(address))
+        _check_error(status, 'ni845xI2cConfigurationSetAddress')
+
+    def set_address_size(self, address_size):
+        """Sets the address size (e.g., kNi845xI2cAddress7Bit)."""
+        status = ni845x_dll.ni845xI2cConfigurationSetAddressSize(self.handle, int32(address_size))
+        _check_error(status, 'ni845xI2cConfigurationSetAddressSize')
+
+    def set_clock_rate(self, rate_khz):
+        """Sets the I2C clock rate in kHz."""
+        status = ni845x_dll.ni845xI2cConfigurationSetClockRate(self.handle, uInt16(rate_khz))
+        _check_error(status, 'ni845xI2cConfigurationSetClockRate')
+
+    def set_port(self, port_number):
+        """Sets the I2C port number."""
+        status = ni845x_dll.ni845xI2cConfigurationSetPort(self.handle, uInt8(port_number))
+        _check_error(status, 'ni845xI2cConfigurationSetPort')
+
+
+class I2cScript(_Script):
+    """
+    Manages an I2C script: a sequence of I2C bus conditions and transfers
+    run on the device in a single USB exchange.
+
+    The low-level steps map one-to-one onto the NI-845x I2C scripting API.
+    `read_register` and `write_register` add the usual register access
+    sequences, so a register dump or burst configuration becomes one script::
+
+        script = device.create_i2c_script()
+        indices = [script.read_register(0x50, reg, 1) for reg in range(256)]
+        device.i2c_script_run(script)
+        dump = script.read_data()
+    """
+    _extract_read_data_size_name = 'ni845xI2cScriptExtractReadDataSize'
+    _extract_read_data_name = 'ni845xI2cScriptExtractReadData'
+
+    def __init__(self):
+        """Opens a new I2C script handle."""
+        handle = NiHandle()
+        status = ni845x_dll.ni845xI2cScriptOpen(ctypes.byref(handle))
+        _check_error(status, 'ni845xI2cScriptOpen')
+        super().__init__(handle, ni845x_dll.ni845xI2cScriptClose)
+
+    def reset(self):
+        """Removes all steps from the script."""
+        status = ni845x_dll.ni845xI2cScriptReset(self.handle)
+        _check_error(status, 'ni845xI2cScriptReset')
+        self.read_indices = []
+
+    def set_clock_rate(self, rate_khz):
+        """Adds a step that sets the I2C clock rate in kHz."""
+        status = ni845x_dll.ni845xI2cScriptClockRate(self.handle, uInt16(rate_khz))
+        _check_error(status, 'ni845xI2cScriptClockRate')
+
+    def issue_start(self):
+        """Adds a start (or repeated start) condition."""
+        status = ni845x_dll.ni845xI2cScriptIssueStart(self.handle)
+        _check_error(status, 'ni845xI2cScriptIssueStart')
+
+    def issue_stop(self):
+        """Adds a stop condition."""
+        status = ni845x_dll.ni845xI2cScriptIssueStop(self.handle)
+        _check_error(status, 'ni845xI2cScriptIssueStop')
+
+    def address_write(self, address):
+        """Adds a step that sends a 7-bit address with the write bit."""
+        status = ni845x_dll.ni845xI2cScriptAddressWrite(self.handle, uInt8(address))
+        _check_error(status, 'ni845xI2cScriptAddressWrite')
+
+    def address_read(self, address):
+        """Adds a step that sends a 7-bit address with the read bit."""
+        status = ni845x_dll.ni845xI2cScriptAddressRead(self.handle, uInt8(address))
+        _check_error(status, 'ni845xI2cScriptAddressRead')
+
+    def write(self, write_data):
+        """Adds a step that writes data bytes."""
+        write_buffer, write_size = _input_buffer(write_data)
+        status = ni845x_dll.ni845xI2cScriptWrite(self.handle, write_size, write_buffer)
+        _check_error(status, 'ni845xI2cScriptWrite')
+
+    def read(self, num_bytes_to_read, nak=kNi845xI2cNakTrue):
+        """
+        Adds a step that reads data bytes.
+
+        Args:
+            num_bytes_to_read (int): The number of bytes to read.
+            nak (int): Whether the last byte is NAKed (kNi845xI2cNakTrue) to
+                end the read.
+
+        Returns:
+            int: The script read index used to extract this step's read data.
+        """
+        read_index = uInt32()
+        status = ni845x_dll.ni845xI2cScriptRead(self.handle, num_bytes_to_read, int32(nak), ctypes.byref(read_index))
+        _check_error(status, 'ni845xI2cScriptRead')
+        self.read_indices.append(read_index.value)
+        return read_index.value
+
+    def delay_ms(self, delay):
+        """Adds a delay step in milliseconds (0-255)."""
+        status = ni845x_dll.ni845xI2cScriptDelay(self.handle, uInt8(delay))
+        _check_error(status, 'ni845xI2cScriptDelay')
+
+    def delay_us(self, delay):
+        """Adds a delay step in microseconds (0-65535)."""
+        status = ni845x_dll.ni845xI2cScriptUsDelay(self.handle, uInt16(delay))
+        _check_error(status, 'ni845xI2cScriptUsDelay')
+
+    def read_register(self, address, register, num_bytes_to_read):
+        """
+        Adds a register read: start, address+write, register, repeated start,
+        address+read, read, stop.
+
+        Args:
+            address (int): The 7-bit slave address.
+            register (int or bytes-like): The register address. Ints are sent
+                as a single byte.
+            num_bytes_to_read (int): The number of bytes to read.
+
+        Returns:
+            int: The script read index of the read step.
+        """
+        self.issue_start()
+        self.address_write(address)
+        self.write(bytes([register]) if isinstance(register, int) else register)
+        self.issue_start()
+        self.address_read(address)
+        read_index = self.read(num_bytes_to_read)
+        self.issue_stop()
+        return read_index
+
+    def write_register(self, address, register, write_data):
+        """
+        Adds a register write: start, address+write, register and data, stop.
+
+        Args:
+            address (int): The 7-bit slave address.
+            register (int or bytes-like): The register address. Ints are sent
+                as a single byte.
+            write_data (bytes-like): The data to write to the register.
+        """
+        register = bytes([register]) if isinstance(register, int) else bytes(register)
+        self.issue_start()
+        self.address_write(address)
+        self.write(register + bytes(write_data))
+        self.issue_stop()
 
 
 class Ni845x(_HandleManager):
@@ -307,9 +1028,12 @@ class Ni845x(_HandleManager):
         Args:
             resource_name (str): The resource name of the device (e.g., "USB-8451").
         """
-        if not _dll_loaded:
+        if not _dll_loaded():
             raise Ni845xError(-1, "Cannot open device: NI-845x driver not loaded.")
 
+        self.buffer_arena = BufferArena()
+        self._read_size = uInt32()
+        self.spi_chunk_size = SPI_CHUNK_SIZE
         self.resource_name = resource_name.encode('utf-8')
         handle = NiHandle()
         status = ni845x_dll.ni845xOpen(self.resource_name, ctypes.byref(handle))
@@ -323,6 +1047,30 @@ class Ni845x(_HandleManager):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
+    @_locked
+    def close(self):
+        """Closes the device and releases its pooled transfer buffers."""
+        super().close()
+        self.buffer_arena.clear()
+
+    def _write_buffer(self, data):
+        """
+        Wraps write data in a uInt8 array without per-byte conversion.
+
+        Writable buffers are aliased in place with `from_buffer`. Read-only
+        buffers such as bytes are copied once into a pooled array.
+
+        Returns:
+            tuple: (ctypes array, size in bytes, True if the array is pooled)
+        """
+        view = _byte_view(data)
+        size = len(view)
+        if not view.readonly:
+            return (uInt8 * size).from_buffer(view), size, False
+        buffer = self.buffer_arena.acquire(size)
+        memoryview(buffer).cast('B')[:size] = view
+        return buffer, size, True
+
     @staticmethod
     def find_devices():
         """
@@ -331,7 +1079,7 @@ class Ni845x(_HandleManager):
         Returns:
             list: A list of resource names for all found devices.
         """
-        if not _dll_loaded:
+        if not _dll_loaded():
             return [] # Return empty list if library is not loaded
 
         find_handle = NiHandle()
@@ -359,11 +1107,13 @@ class Ni845x(_HandleManager):
        
         return devices
 
+    @_locked
     def set_timeout(self, timeout_ms):
         """Sets the communication timeout in milliseconds."""
         status = ni845x_dll.ni845xSetTimeout(self.handle, uInt32(timeout_ms))
         _check_error(status, 'ni845xSetTimeout')
 
+    @_locked
     def set_io_voltage_level(self, voltage_code):
         """Sets the IO voltage level (e.g., kNi845x33Volts)."""
         status = ni845x_dll.ni845xSetIoVoltageLevel(self.handle, uInt8(voltage_code))
@@ -374,70 +1124,319 @@ class Ni845x(_HandleManager):
         """Factory method to create an SPI configuration object."""
         return SpiConfiguration()
 
-    def spi_write_read(self, config, write_data):
+    @_locked
+    def spi_write_read(self, config, write_data, as_memoryview=False):
         """
         Performs an SPI write followed by a read.
 
         Args:
             config (SpiConfiguration): The SPI configuration object.
-            write_data (bytes or list of int): The data to write.
+            write_data (bytes-like or list of int): The data to write. Any
+                buffer-protocol object is passed to the driver without
+                per-byte conversion.
+            as_memoryview (bool): If True, return a memoryview over a freshly
+                allocated bytearray instead of copying into a bytes object.
 
         Returns:
-            bytes: The data read from the SPI device.
+            bytes or memoryview: The data read from the SPI device.
         """
-        write_size = len(write_data)
-        write_buffer = (uInt8 * write_size)(*write_data)
-       
-        read_size = uInt32(write_size) # Typically read size is same as write size
-        read_buffer = (uInt8 * write_size)()
+        if as_memoryview:
+            read_data = bytearray(len(_byte_view(write_data)))
+            read_size = self.spi_write_readinto(config, write_data, read_data)
+            return memoryview(read_data)[:read_size]
+
+        write_buffer, write_size, pooled = self._write_buffer(write_data)
+        read_buffer = self.buffer_arena.acquire(write_size)
+        try:
+            read_size = self._spi_write_read(config, write_buffer, write_size, read_buffer)
+            return ctypes.string_at(read_buffer, read_size)
+        finally:
+            self.buffer_arena.release(read_buffer)
+            if pooled:
+                self.buffer_arena.release(write_buffer)
+
+    @_locked
+    def spi_write_readinto(self, config, write_data, read_buffer):
+        """
+        Performs an SPI write/read, storing the read data in `read_buffer`.
+
+        Works like `io.RawIOBase.readinto`: no intermediate buffers are
+        allocated and the cost is independent of the transfer size.
+
+        Args:
+            config (SpiConfiguration): The SPI configuration object.
+            write_data (bytes-like): The data to write.
+            read_buffer (writable bytes-like): Receives the read data. Must be
+                at least as long as `write_data`.
+
+        Returns:
+            int: The number of bytes read.
+        """
+        write_buffer, write_size, pooled = self._write_buffer(write_data)
+        try:
+            return self._spi_write_read(config, write_buffer, write_size, _output_buffer(read_buffer, write_size))
+        finally:
+            if pooled:
+                self.buffer_arena.release(write_buffer)
+
+    def _spi_write_read(self, config, write_buffer, write_size, read_buffer):
+        """Issues ni845xSpiWriteRead on prepared ctypes buffers and returns the read size."""
+        read_size = self._read_size
+        read_size.value = write_size # Typically read size is same as write size
 
         status = ni845x_dll.ni845xSpiWriteRead(
             self.handle,
             config.handle,
-            uInt32(write_size),
+            write_size,
             write_buffer,
             ctypes.byref(read_size),
             read_buffer
         )
         _check_error(status, 'ni845xSpiWriteRead')
 
-        return bytes(read_buffer[:read_size.value])
+        return read_size.value
+
+    @_locked
+    def spi_write_read_chunked(self, config, write_data, read_buffer=None, chunk_size=None, keep_cs_asserted=False):
+        """
+        Performs an SPI write/read of any size by splitting it into chunks.
+
+        Each chunk is transferred straight from the write data into its slice
+        of one preallocated output buffer; read-only write data is copied at
+        most once. By default every chunk is a separate ni845xSpiWriteRead,
+        so chip select is released between chunks. With `keep_cs_asserted`,
+        all chunks are issued from a single SPI script that asserts the
+        configuration's chip select once, which also runs the whole transfer
+        in one USB exchange.
+
+        Args:
+            config (SpiConfiguration): The SPI configuration object.
+            write_data (bytes-like): The data to write.
+            read_buffer (writable bytes-like, optional): Receives the read
+                data. A bytearray is allocated if omitted.
+            chunk_size (int, optional): Bytes per chunk. Defaults to
+                `spi_chunk_size`.
+            keep_cs_asserted (bool): Keep chip select asserted across chunks.
+
+        Returns:
+            memoryview: The read data, one byte per byte written.
+        """
+        chunk_size = chunk_size or self.spi_chunk_size
+        view = _byte_view(write_data)
+        size = len(view)
+        if read_buffer is None:
+            read_buffer = bytearray(size)
+        read_view = memoryview(read_buffer).cast('B')[:size]
+        _output_buffer(read_view, size)
+
+        pooled = view.readonly
+        write_base = self.buffer_arena.acquire(size) if pooled else view
+        try:
+            if pooled:
+                memoryview(write_base).cast('B')[:size] = view
+            if keep_cs_asserted:
+                self._spi_chunked_script(config, write_base, read_view, size, chunk_size)
+            else:
+                for offset in range(0, size, chunk_size):
+                    length = min(chunk_size, size - offset)
+                    self._spi_write_read(
+                        config,
+                        (uInt8 * length).from_buffer(write_base, offset),
+                        length,
+                        (uInt8 * length).from_buffer(read_view, offset),
+                    )
+        finally:
+            if pooled:
+                self.buffer_arena.release(write_base)
+        return read_view
+
+    def _spi_chunked_script(self, config, write_base, read_view, size, chunk_size):
+        """Runs a chunked transfer as one script with chip select held low."""
+        port, chip_select, clock_rate_khz, polarity, phase, bits = config.settings
+        script = SpiScript()
+        try:
+            script.enable_spi()
+            script.set_clock_rate(clock_rate_khz)
+            script.set_clock_polarity_phase(polarity, phase)
+            script.set_num_bits_per_sample(bits)
+            script.cs_low(chip_select)
+            for offset in range(0, size, chunk_size):
+                length = min(chunk_size, size - offset)
+                script.write_read((uInt8 * length).from_buffer(write_base, offset))
+            script.cs_high(chip_select)
+            script.disable_spi()
+            self.spi_script_run(script, port)
+
+            offset = 0
+            for read_index in script.read_indices:
+                offset += len(script.extract_read_data(read_index, read_view[offset:]))
+        finally:
+            script.close()
+
+    def create_spi_script(self):
+        """Factory method to create an SPI script object."""
+        return SpiScript()
+
+    @_locked
+    def spi_script_run(self, script, port_number=0):
+        """
+        Runs an SPI script on the device in a single USB exchange.
+
+        Args:
+            script (SpiScript): The script to run.
+            port_number (int): The SPI port to run the script on.
+        """
+        status = ni845x_dll.ni845xSpiScriptRun(script.handle, self.handle, uInt8(port_number))
+        _check_error(status, 'ni845xSpiScriptRun')
+
+    # --- SPI Stream Methods ---
+    def create_spi_stream_config(self):
+        """Factory method to create an SPI stream configuration object."""
+        return SpiStreamConfiguration()
+
+    @_locked
+    def spi_stream_start(self, config):
+        """Starts an SPI stream acquisition."""
+        status = ni845x_dll.ni845xSpiStreamStart(self.handle, config.handle)
+        _check_error(status, 'ni845xSpiStreamStart')
+
+    @_locked
+    def spi_stream_stop(self, config):
+        """Stops an SPI stream acquisition."""
+        status = ni845x_dll.ni845xSpiStreamStop(self.handle, config.handle)
+        _check_error(status, 'ni845xSpiStreamStop')
+
+    @_locked
+    def spi_stream_readinto(self, config, read_buffer):
+        """
+        Reads stream data into a caller-supplied buffer.
+
+        Args:
+            config (SpiStreamConfiguration): The running stream's configuration.
+            read_buffer (writable bytes-like): Receives up to len(read_buffer) bytes.
+
+        Returns:
+            int: The number of bytes read.
+        """
+        size = memoryview(read_buffer).nbytes
+        return self._spi_stream_read(config, _output_buffer(read_buffer, size), size)
+
+    def _spi_stream_read(self, config, read_buffer, size):
+        """Issues ni845xSpiStreamRead on a prepared ctypes buffer and returns the read size."""
+        read_size = self._read_size
+        status = ni845x_dll.ni845xSpiStreamRead(
+            self.handle,
+            config.handle,
+            size,
+            read_buffer,
+            ctypes.byref(read_size)
+        )
+        _check_error(status, 'ni845xSpiStreamRead')
+        return read_size.value
+
+    def spi_stream(self, config, chunk_size, num_buffers=2, total_bytes=None):
+        """
+        Runs an SPI stream acquisition as a generator of data chunks.
+
+        The stream is started on the first iteration and stopped when the
+        generator is exhausted or closed. Chunks are read into a ring of
+        `num_buffers` preallocated buffers (double-buffered by default), so
+        Python overhead is per chunk, not per sample. A yielded memoryview
+        stays valid until `num_buffers - 1` further chunks have been read;
+        copy it if it must live longer.
+
+        A read that returns no data (the stream timed out or ran dry) ends
+        the generator rather than polling again.
+
+        Args:
+            config (SpiStreamConfiguration): The stream configuration.
+            chunk_size (int): Bytes requested per read.
+            num_buffers (int): Number of buffers to rotate through.
+            total_bytes (int, optional): Stop after this many bytes. If None,
+                stream until the generator is closed or a read returns no data.
+
+        Yields:
+            memoryview: The bytes read by each chunk.
+        """
+        buffers = [bytearray(chunk_size) for _ in range(num_buffers)]
+        views = [memoryview(buffer) for buffer in buffers]
+        read_buffers = [(uInt8 * chunk_size).from_buffer(buffer) for buffer in buffers]
+
+        self.spi_stream_start(config)
+        try:
+            remaining = total_bytes
+            index = 0
+            while remaining is None or remaining > 0:
+                size = chunk_size if remaining is None else min(chunk_size, remaining)
+                with self._lock:
+                    read_size = self._spi_stream_read(config, read_buffers[index], size)
+                if read_size == 0:
+                    return
+                if remaining is not None:
+                    remaining -= read_size
+                yield views[index] if read_size == chunk_size else views[index][:read_size]
+                index = (index + 1) % num_buffers
+        finally:
+            self.spi_stream_stop(config)
 
     # --- I2C Methods ---
     def create_i2c_config(self):
         """Factory method to create an I2C configuration object."""
         return I2cConfiguration()
 
-    def i2c_write(self, config, write_data):
-        """Performs an I2C write."""
-        write_size = len(write_data)
-        write_buffer = (uInt8 * write_size)(*write_data)
+    def create_i2c_script(self):
+        """Factory method to create an I2C script object."""
+        return I2cScript()
 
-        status = ni845x_dll.ni845xI2cWrite(
-            self.handle,
-            config.handle,
-            uInt32(write_size),
-            write_buffer
-        )
-        _check_error(status, 'ni845xI2cWrite')
+    @_locked
+    def i2c_script_run(self, script, port_number=0):
+        """
+        Runs an I2C script on the device in a single USB exchange.
+
+        Args:
+            script (I2cScript): The script to run.
+            port_number (int): The I2C port to run the script on.
+        """
+        status = ni845x_dll.ni845xI2cScriptRun(script.handle, self.handle, uInt8(port_number))
+        _check_error(status, 'ni845xI2cScriptRun')
 
+    @_locked
+    def i2c_write(self, config, write_data):
+        """Performs an I2C write."""
+        write_buffer, write_size, pooled = self._write_buffer(write_data)
+        try:
+            status = ni845x_dll.ni845xI2cWrite(
+                self.handle,
+                config.handle,
+                write_size,
+                write_buffer
+            )
+            _check_error(status, 'ni845xI2cWrite')
+        finally:
+            if pooled:
+                self.buffer_arena.release(write_buffer)
+
+    @_locked
     def i2c_read(self, config, num_bytes_to_read):
         """Performs an I2C read."""
-        read_size = uInt32()
-        read_buffer = (uInt8 * num_bytes_to_read)()
-
-        status = ni845x_dll.ni845xI2cRead(
-            self.handle,
-            config.handle,
-            uInt32(num_bytes_to_read),
-            ctypes.byref(read_size),
-            read_buffer
-        )
-        _check_error(status, 'ni845xI2cRead')
-        return bytes(read_buffer[:read_size.value])
+        read_size = self._read_size
+        read_buffer = self.buffer_arena.acquire(num_bytes_to_read)
+        try:
+            status = ni845x_dll.ni845xI2cRead(
+                self.handle,
+                config.handle,
+                num_bytes_to_read,
+                ctypes.byref(read_size),
+                read_buffer
+            )
+            _check_error(status, 'ni845xI2cRead')
+            return ctypes.string_at(read_buffer, read_size.value)
+        finally:
+            self.buffer_arena.release(read_buffer)
 
 
     # --- DIO Methods ---
+    @_locked
     def dio_set_port_line_direction_map(self, port_number, direction_map):
         """
         Sets the direction for each line in a DIO port.
@@ -449,11 +1448,13 @@ class Ni845x(_HandleManager):
         status = ni845x_dll.ni845xDioSetPortLineDirectionMap(self.handle, uInt8(port_number), uInt8(direction_map))
         _check_error(status, 'ni845xDioSetPortLineDirectionMap')
 
+    @_locked
     def dio_write_port(self, port_number, data):
         """Writes data to a DIO port."""
         status = ni845x_dll.ni845xDioWritePort(self.handle, uInt8(port_number), uInt8(data))
         _check_error(status, 'ni845xDioWritePort')
 
+    @_locked
     def dio_read_port(self, port_number):
         """Reads data from a DIO port."""
         read_data = uInt8()
@@ -466,7 +1467,7 @@ class Ni845x(_HandleManager):
 # Example Usage
 # ==============================================================================
 if __name__ == '__main__':
-    if not _dll_loaded:
+    if not _dll_loaded():
         print("Cannot run example: NI-845x library not loaded.")
         sys.exit(0)
 
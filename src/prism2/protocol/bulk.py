@@ -0,0 +1,273 @@
+"""
+Vectorized bulk decoding of captured transactions (requires NumPy).
+
+decode_batch() groups a capture by the definition each command matches, packs
+every group's fixed-length command and response fields into NumPy structured
+arrays, and returns them as columns:
+
+    result = decode_batch(capture)
+    status = result["01"].response["Status"]        # one uint8 per poll
+    busy = result["01"].bits("response", "Status")["WIP"].astype(bool)
+    print(busy.mean())
+
+Checksum fields are verified column-wise with BulkGroup.checksum_ok().
+
+Dispatch is still one trie lookup per transaction, but field extraction is a
+single np.frombuffer per group, so the per-field work happens in NumPy rather
+than Python. Rest-of-data fields have no fixed width and are not included;
+use parser.decode_transaction() for those.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from . import parser
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for bulk decoding; install prism2[analysis].")
+
+
+def field_dtype(layout):
+    """
+    Returns the NumPy dtype for a fixed-length field.
+
+    Integer fields of 1, 2, 4 or 8 bytes (including enums and bitfields) map to
+    the matching integer type; anything else is kept as raw uint8 bytes, and
+    integer fields among those are assembled by integer_column().
+    """
+    _require_numpy()
+    if layout.type != 'bytes' and layout.length in (1, 2, 4, 8):
+        byteorder = '<' if layout.byteorder == 'little' else '>'
+        kind = 'i' if layout.type == 'int' else 'u'
+        return np.dtype(f"{byteorder}{kind}{layout.length}")
+    return np.dtype(('u1', (layout.length,)))
+
+
+def integer_column(layout, raw):
+    """
+    Assembles an integer field stored as raw bytes (e.g. a 3-byte field).
+
+    Args:
+        layout (FieldLayout): The field, of at most 8 bytes.
+        raw (ndarray): Its (rows, length) uint8 column.
+
+    Returns:
+        ndarray: uint64 values, or int64 for "int" fields.
+    """
+    if layout.length > 8:
+        raise ValueError(f"Field '{layout.name}' is wider than 8 bytes.")
+    order = range(layout.length) if layout.byteorder == 'big' else reversed(range(layout.length))
+    values = np.zeros(len(raw), dtype=np.uint64)
+    for index in order:
+        values = (values << np.uint64(8)) | raw[:, index].astype(np.uint64)
+    if layout.type != 'int':
+        return values
+    values = values.astype(np.int64)
+    sign_bit = 1 << (8 * layout.length - 1)
+    return np.where(values & sign_bit, values - (sign_bit << 1), values)
+
+
+def message_dtype(message):
+    """Returns the structured dtype covering a MessageDecoder's fixed-length fields."""
+    _require_numpy()
+    fields = message.fixed_fields
+    return np.dtype({
+        'names': [field.name for field in fields],
+        'formats': [field_dtype(field) for field in fields],
+        'offsets': [field.offset for field in fields],
+        'itemsize': message.fixed_size,
+    })
+
+
+def pack_messages(message, messages):
+    """
+    Packs messages into one structured array, zero-padding short ones.
+
+    Returns:
+        tuple: (structured array, boolean array of complete messages)
+    """
+    size = message.fixed_size
+    rows = b''.join(bytes(data[:size]).ljust(size, b'\0') for data in messages)
+    array = np.frombuffer(rows, dtype=message_dtype(message), count=len(messages))
+    complete = np.fromiter((len(data) >= size for data in messages), dtype=bool, count=len(messages))
+    return array, complete
+
+
+def crc_rows(crc, rows):
+    """
+    Computes a CRC over each row of a 2-D uint8 array.
+
+    The table-driven update is applied one byte column at a time, so the
+    Python loop runs once per byte position rather than once per row.
+    """
+    _require_numpy()
+    table = np.array(crc.table, dtype=np.uint64)
+    register = np.full(len(rows), crc.register_init, dtype=np.uint64)
+    if crc.reflect:
+        for column in range(rows.shape[1]):
+            register = table[(register ^ rows[:, column]) & 0xFF] ^ (register >> 8)
+    else:
+        shift = crc.width - 8
+        for column in range(rows.shape[1]):
+            register = table[((register >> shift) ^ rows[:, column]) & 0xFF] ^ ((register << 8) & crc.mask)
+    return register ^ crc.xorout
+
+
+class BulkGroup:
+    """
+    The transactions of one capture that matched the same definition.
+
+    Attributes:
+        key (str): The definition key ("default" for unmatched commands).
+        name (str): The definition name.
+        indices (ndarray): Positions of these transactions in the capture.
+        command, response (ndarray): Structured arrays of the fixed-length
+            fields, one row per transaction, or None if the definition has
+            no fixed-length fields for that direction.
+        command_complete, response_complete (ndarray): False where a message
+            was shorter than its fixed fields (the missing bytes read as 0).
+    """
+    __slots__ = ('key', 'name', 'definition', 'indices', 'command', 'response', 'command_complete', 'response_complete')
+
+    def __init__(self, definition, indices, commands, responses):
+        self.key = definition.key
+        self.name = definition.name
+        self.definition = definition
+        self.indices = np.asarray(indices, dtype=np.intp)
+        self.command, self.command_complete = self._pack(definition.command, commands)
+        self.response, self.response_complete = self._pack(definition.response, responses)
+
+    @staticmethod
+    def _pack(message, messages):
+        if not message.fixed_fields:
+            return None, None
+        return pack_messages(message, messages)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def _layout(self, direction, field_name):
+        message = self.definition.message(direction == "command")
+        for layout in message.fixed_fields:
+            if layout.name == field_name:
+                return layout
+        raise KeyError(field_name)
+
+    def column(self, direction, field_name):
+        """
+        Returns one field's column; `direction` is "command" or "response".
+
+        Integer fields of up to 8 bytes are returned as integers whatever
+        their length; other fields as (rows, length) uint8 arrays.
+        """
+        array = self.command if direction == "command" else self.response
+        if array is None:
+            raise KeyError(field_name)
+        column = array[field_name]
+        if column.ndim == 2:
+            layout = self._layout(direction, field_name)
+            if layout.type != 'bytes' and layout.length <= 8:
+                return integer_column(layout, column)
+        return column
+
+    def _integers(self, direction, field_name):
+        column = self.column(direction, field_name)
+        if column.ndim == 2:
+            raise ValueError(f"Field '{field_name}' is wider than 8 bytes.")
+        return column
+
+    def bits(self, direction, field_name):
+        """Returns a dict of bitfield name to column for a field with named bits."""
+        layout = self._layout(direction, field_name)
+        if layout.bits is None:
+            raise ValueError(f"Field '{field_name}' has no bits.")
+        column = self._integers(direction, field_name)
+        return {bit_name: (column >> shift) & ((1 << width) - 1) for bit_name, shift, width in layout.bits}
+
+    def checksum_ok(self, direction, field_name):
+        """
+        Verifies a checksum field for every transaction in the group.
+
+        Returns:
+            ndarray: True where the stored checksum matches; always False for
+            truncated messages.
+        """
+        layout = self._layout(direction, field_name)
+        if layout.checksum is None:
+            raise ValueError(f"Field '{field_name}' is not a checksum.")
+        crc, start = layout.checksum
+        array = self.command if direction == "command" else self.response
+        complete = self.command_complete if direction == "command" else self.response_complete
+        rows = array.view(np.uint8).reshape(len(array), array.dtype.itemsize)
+        stored = self._integers(direction, field_name).astype(np.uint64)
+        return (crc_rows(crc, rows[:, start:layout.offset]) == stored) & complete
+
+    def enum(self, direction, field_name):
+        """Returns an object column of enum names (the integer where a value has no name)."""
+        layout = self._layout(direction, field_name)
+        if layout.enum is None:
+            raise ValueError(f"Field '{field_name}' is not an enum.")
+        values, inverse = np.unique(self._integers(direction, field_name), return_inverse=True)
+        labels = np.array([layout.enum.get(int(value), int(value)) for value in values], dtype=object)
+        return labels[inverse]
+
+
+class BulkDecodeResult:
+    """
+    Columnar result of decode_batch(), indexed by definition key.
+    """
+    __slots__ = ('groups', 'count')
+
+    def __init__(self, groups, count):
+        self.groups = groups
+        self.count = count
+
+    def __getitem__(self, key):
+        return self.groups[key]
+
+    def __contains__(self, key):
+        return key in self.groups
+
+    def __iter__(self):
+        return iter(self.groups.values())
+
+    def counts(self):
+        """Returns a dict of definition key to number of transactions."""
+        return {key: len(group) for key, group in self.groups.items()}
+
+
+def decode_batch(transactions, table=None):
+    """
+    Decodes a capture of (command, response) pairs into columnar arrays.
+
+    Args:
+        transactions (iterable): (command, response) pairs of bytes-like objects.
+        table (DecoderTable): The definitions to use; defaults to the active ones.
+
+    Returns:
+        BulkDecodeResult: One BulkGroup per matched definition.
+    """
+    _require_numpy()
+    if table is None:
+        table = parser.get_decoder_table()
+
+    grouped = {}
+    count = 0
+    for index, (command, response) in enumerate(transactions):
+        definition = table.lookup(command)
+        group = grouped.get(definition.key)
+        if group is None:
+            group = grouped[definition.key] = (definition, [], [], [])
+        group[1].append(index)
+        group[2].append(command)
+        group[3].append(response)
+        count = index + 1
+
+    groups = {
+        key: BulkGroup(definition, indices, commands, responses)
+        for key, (definition, indices, commands, responses) in grouped.items()
+    }
+    return BulkDecodeResult(groups, count)
@@ -0,0 +1,64 @@
+import collections
+import threading
+
+
+class DecodeCache:
+    """
+    Bounded LRU cache of decoded transactions.
+
+    Logs are dominated by identical transactions (status polls, repeated
+    reads), so decoding each distinct (command, response) pair once and
+    returning the same TransactionResult afterwards saves most of the work.
+    Entries are keyed by (definition-set version, command bytes, response
+    bytes); bumping the version makes old entries unreachable, and `clear()`
+    drops them. When more than `max_entries` are held, the least recently
+    used entry is evicted.
+
+    Cached results are shared between callers and must not be modified.
+
+    Attributes:
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that had to decode.
+        evictions (int): Entries dropped to stay within `max_entries`.
+    """
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, decode):
+        """
+        Returns the cached result for `key`, calling `decode()` to create it on a miss.
+        """
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        # Decode outside the lock; a concurrent miss on the same key just decodes twice.
+        result = decode()
+
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def clear(self):
+        """Drops every cached result (the counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns the cache counters as a dict."""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "entries": len(self._entries)}
@@ -0,0 +1,178 @@
+"""
+Table-driven CRC algorithms for checksum fields.
+
+Algorithms follow the usual parameter model (width, poly, init, reflect,
+xorout). Each Crc precomputes a 256-entry table, so it costs one lookup per
+byte; CRC-32 and the non-reflected CRC-16-CCITT family use zlib.crc32 and
+binascii.crc_hqx instead.
+
+A field spec's "checksum" is either a preset name:
+
+    "CRC": {"length": 2, "checksum": "crc16-ccitt"}
+
+or a dict starting from an optional preset and overriding its parameters,
+plus "start", the offset of the first covered byte (default 0). The
+checksum covers the bytes from "start" up to the checksum field itself:
+
+    "CRC": {"length": 1, "checksum": {"algorithm": "crc8", "poly": "0x31", "start": 1}}
+"""
+import binascii
+import zlib
+
+# name: (width, poly, init, reflect, xorout)
+PRESETS = {
+    "crc8": (8, 0x07, 0x00, False, 0x00),
+    "crc8-maxim": (8, 0x31, 0x00, True, 0x00),
+    "crc16-ccitt": (16, 0x1021, 0xFFFF, False, 0x0000),
+    "crc16-xmodem": (16, 0x1021, 0x0000, False, 0x0000),
+    "crc16-kermit": (16, 0x1021, 0x0000, True, 0x0000),
+    "crc16-modbus": (16, 0x8005, 0xFFFF, True, 0x0000),
+    "crc32": (32, 0x04C11DB7, 0xFFFFFFFF, True, 0xFFFFFFFF),
+}
+
+_SPEC_KEYS = {"algorithm", "width", "poly", "init", "reflect", "xorout", "start"}
+
+_crc_cache = {}
+
+
+def _reflect(value, width):
+    result = 0
+    for _ in range(width):
+        result = (result << 1) | (value & 1)
+        value >>= 1
+    return result
+
+
+def _int(value, name):
+    if isinstance(value, str):
+        value = int(value, 0)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError(f"checksum {name} must be a non-negative integer")
+    return value
+
+
+class Crc:
+    """
+    A CRC algorithm with a precomputed lookup table.
+
+    Attributes:
+        width (int): CRC width in bits (8 to 32, a multiple of 8).
+        poly (int): Generator polynomial, in normal (MSB-first) form.
+        init (int): Initial register value.
+        reflect (bool): Whether input bytes and the result are bit-reflected.
+        xorout (int): Value XORed into the final register.
+        table (tuple): The 256-entry lookup table.
+    """
+    __slots__ = ('width', 'poly', 'init', 'reflect', 'xorout', 'mask', 'register_init', 'table', '_fast')
+
+    def __init__(self, width, poly, init=0, reflect=False, xorout=0):
+        if width not in (8, 16, 24, 32):
+            raise ValueError(f"checksum width must be 8, 16, 24 or 32 bits, not {width}")
+        self.width = width
+        self.mask = (1 << width) - 1
+        self.poly = poly & self.mask
+        self.init = init & self.mask
+        self.reflect = reflect
+        self.xorout = xorout & self.mask
+        self.register_init = _reflect(self.init, width) if reflect else self.init
+        self.table = self._build_table()
+
+        params = (width, self.poly, self.init, reflect, self.xorout)
+        self._fast = None
+        if params == PRESETS["crc32"]:
+            self._fast = 'crc32'
+        elif width == 16 and self.poly == 0x1021 and not reflect:
+            self._fast = 'crc_hqx'
+
+    def _build_table(self):
+        table = []
+        if self.reflect:
+            poly = _reflect(self.poly, self.width)
+            for byte in range(256):
+                crc = byte
+                for _ in range(8):
+                    crc = (crc >> 1) ^ poly if crc & 1 else crc >> 1
+                table.append(crc)
+        else:
+            top_bit = 1 << (self.width - 1)
+            for byte in range(256):
+                crc = byte << (self.width - 8)
+                for _ in range(8):
+                    crc = ((crc << 1) ^ self.poly if crc & top_bit else crc << 1) & self.mask
+                table.append(crc)
+        return tuple(table)
+
+    def compute(self, data):
+        """Returns the CRC of a bytes-like object."""
+        if self._fast == 'crc32':
+            return zlib.crc32(data)
+        if self._fast == 'crc_hqx':
+            return binascii.crc_hqx(data, self.init) ^ self.xorout
+
+        table = self.table
+        crc = self.register_init
+        if self.reflect:
+            for byte in bytes(data):
+                crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+        else:
+            shift = self.width - 8
+            mask = self.mask
+            for byte in bytes(data):
+                crc = table[((crc >> shift) ^ byte) & 0xFF] ^ ((crc << 8) & mask)
+        return crc ^ self.xorout
+
+    def __reduce__(self):
+        return (Crc, (self.width, self.poly, self.init, self.reflect, self.xorout))
+
+    def __repr__(self):
+        return f"Crc(width={self.width}, poly=0x{self.poly:X}, init=0x{self.init:X}, reflect={self.reflect}, xorout=0x{self.xorout:X})"
+
+
+def get_crc(width, poly, init=0, reflect=False, xorout=0):
+    """Returns a shared Crc for the given parameters, building its table once."""
+    key = (width, poly, init, reflect, xorout)
+    crc = _crc_cache.get(key)
+    if crc is None:
+        crc = _crc_cache[key] = Crc(*key)
+    return crc
+
+
+def from_spec(spec):
+    """
+    Builds the checksum for a field spec's "checksum" entry.
+
+    Returns:
+        tuple: (Crc, start offset)
+
+    Raises:
+        ValueError: If the spec is malformed.
+    """
+    if isinstance(spec, str):
+        spec = {"algorithm": spec}
+    if not isinstance(spec, dict):
+        raise ValueError("checksum must be a preset name or a table of CRC parameters")
+    unknown = set(spec) - _SPEC_KEYS
+    if unknown:
+        raise ValueError(f"unknown checksum keys {sorted(unknown)}")
+
+    algorithm = spec.get("algorithm")
+    if algorithm is not None:
+        if not isinstance(algorithm, str):
+            raise ValueError(f"checksum algorithm must be a preset name, not {algorithm!r}")
+        if algorithm.lower() not in PRESETS:
+            raise ValueError(f"unknown checksum algorithm {algorithm!r} (expected one of {sorted(PRESETS)})")
+        width, poly, init, reflect, xorout = PRESETS[algorithm.lower()]
+    elif "width" in spec and "poly" in spec:
+        width, poly, init, reflect, xorout = None, None, 0, False, 0
+    else:
+        raise ValueError("checksum needs an 'algorithm' or a 'width' and 'poly'")
+
+    width = _int(spec.get("width", width), "width")
+    poly = _int(spec.get("poly", poly), "poly")
+    init = _int(spec.get("init", init), "init")
+    xorout = _int(spec.get("xorout", xorout), "xorout")
+    reflect = spec.get("reflect", reflect)
+    if not isinstance(reflect, bool):
+        raise ValueError("checksum reflect must be true or false")
+    start = _int(spec.get("start", 0), "start")
+    return get_crc(width, poly, init, reflect, xorout), start
@@ -0,0 +1,617 @@
+from . import checksum
+
+# Field length meaning "the rest of the data" in a field map.
+REST_OF_DATA = -1
+
+# Name of the leading response field covering bytes clocked in while the
+# command was still being sent (see DefinitionDecoder).
+COMMAND_PHASE_FIELD = "Command Phase"
+
+# Field interpretations available in a field spec.
+FIELD_TYPES = ('bytes', 'uint', 'int')
+BYTE_ORDERS = ('big', 'little')
+
+# Keys allowed in a dict field spec.
+FIELD_SPEC_KEYS = {"length", "type", "byteorder", "enum", "bits", "checksum"}
+
+
+def parse_bit_spec(spec):
+    """
+    Parses one bitfield position: a bit number, or an inclusive [low, high] range.
+
+    Returns:
+        tuple: (shift, width)
+    """
+    if isinstance(spec, int) and not isinstance(spec, bool):
+        low, high = spec, spec
+    elif isinstance(spec, (list, tuple)) and len(spec) == 2 and all(isinstance(bit, int) for bit in spec):
+        low, high = spec
+    else:
+        raise ValueError(f"bit position {spec!r} must be a bit number or a [low, high] range")
+    if low < 0 or high < low:
+        raise ValueError(f"bit range {spec!r} is invalid")
+    return low, high - low + 1
+
+
+class FieldLayout:
+    """
+    Position and interpretation of one field within a message.
+
+    A field spec is either a length (as in the original definitions) or a dict
+    with a "length" and optional:
+        "type": "bytes", "uint" or "int"
+        "byteorder": "big" or "little"
+        "enum": a mapping of integer values to names
+        "bits": a mapping of bitfield names to a bit number (a flag) or an
+            inclusive [low, high] bit range (a multi-bit value)
+        "checksum": a CRC over the preceding bytes (see the checksum module)
+    An enum, bits or checksum implies an unsigned integer field.
+
+    Interpreted single-byte fields get a 256-entry table of precomputed
+    (value, bits, description) tuples, so decoding one is a single index.
+    """
+    __slots__ = ('name', 'offset', 'length', 'type', 'byteorder', 'enum', 'bits', 'checksum', 'table')
+
+    def __init__(self, name, offset, length, type='bytes', byteorder='big', enum=None, bits=None, checksum=None):
+        self.name = name
+        self.offset = offset
+        self.length = length # None for a "rest of the data" field
+        self.type = type
+        self.byteorder = byteorder
+        self.enum = enum
+        self.bits = bits # tuple of (name, shift, width), or None
+        self.checksum = checksum # (Crc, start offset), or None
+        self.table = None
+        if length == 1 and type != 'bytes':
+            self.table = tuple(self.interpret(byte) for byte in range(256))
+
+    @staticmethod
+    def spec_length(spec):
+        """Returns the length given by a field spec."""
+        return spec["length"] if isinstance(spec, dict) else spec
+
+    @classmethod
+    def from_spec(cls, name, offset, length, spec):
+        """
+        Builds a FieldLayout from a field spec (see the class docstring).
+
+        This is also where a spec is validated: the loader builds every field
+        through it, so the rules live in one place.
+
+        Raises:
+            ValueError: If the spec is malformed, prefixed with "Field '<name>': ".
+        """
+        if not isinstance(spec, dict):
+            return cls(name, offset, length)
+        try:
+            return cls(name, offset, length, *cls._parse_spec(offset, length, spec))
+        except ValueError as e:
+            raise ValueError(f"Field '{name}': {e}") from None
+
+    @staticmethod
+    def _parse_spec(offset, length, spec):
+        """Returns the (type, byteorder, enum, bits, checksum) arguments for a dict spec."""
+        unknown = set(spec) - FIELD_SPEC_KEYS
+        if unknown:
+            raise ValueError(f"unknown field spec keys {sorted(unknown)}")
+        enum, bits, crc = spec.get("enum"), spec.get("bits"), spec.get("checksum")
+        if (enum is not None or bits is not None or crc is not None) and not length:
+            raise ValueError("enum, bits and checksum need a fixed-length field")
+
+        if enum is not None:
+            if not isinstance(enum, dict):
+                raise ValueError("enum must be a table of value to name")
+            values = {}
+            for value, label in enum.items():
+                try:
+                    number = int(value, 0) if isinstance(value, str) else int(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"enum value {value!r} is not an integer") from None
+                if not isinstance(label, str):
+                    raise ValueError(f"enum name for {value!r} must be a string")
+                values[number] = label
+            enum = values
+
+        if bits is not None:
+            if not isinstance(bits, dict):
+                raise ValueError("bits must be a table of name to bit position")
+            parsed = []
+            for bit_name, bit_spec in bits.items():
+                try:
+                    shift, width = parse_bit_spec(bit_spec)
+                except ValueError as e:
+                    raise ValueError(f"bits.{bit_name}: {e}") from None
+                if shift + width > 8 * length:
+                    raise ValueError(f"bits.{bit_name}: lies outside the {length}-byte field")
+                parsed.append((bit_name, shift, width))
+            bits = tuple(parsed)
+
+        if crc is not None:
+            crc = checksum.from_spec(crc)
+            if crc[0].width != 8 * length:
+                raise ValueError(f"a {crc[0].width}-bit checksum needs a {crc[0].width // 8}-byte field")
+            if crc[1] > offset:
+                raise ValueError(f"checksum start {crc[1]} is past the field")
+
+        field_type = spec.get("type", "uint" if enum or bits or crc else "bytes")
+        byteorder = spec.get("byteorder", "big")
+        if field_type not in FIELD_TYPES:
+            raise ValueError(f"type must be one of {FIELD_TYPES}, not {field_type!r}")
+        if byteorder not in BYTE_ORDERS:
+            raise ValueError(f"byteorder must be one of {BYTE_ORDERS}, not {byteorder!r}")
+        return field_type, byteorder, enum, bits, crc
+
+    def interpret(self, number, size=None):
+        """
+        Interprets the unsigned integer value of a field.
+
+        Args:
+            number (int): The field's bytes as an unsigned integer.
+            size (int): The number of bytes present; defaults to the field length.
+
+        Returns:
+            tuple: (value, bits, description) where value is the integer (signed
+            for "int" fields) or its enum name, bits is a dict of bitfield
+            values (or None), and description is the text shown after the hex
+            in a breakdown (or None).
+        """
+        if self.type == 'int':
+            sign_bit = 1 << (8 * (size or self.length) - 1)
+            value = number - (sign_bit << 1) if number & sign_bit else number
+        else:
+            value = number
+        descriptions = []
+
+        if self.enum is not None:
+            enum_name = self.enum.get(value)
+            if enum_name is not None:
+                value = enum_name
+                descriptions.append(enum_name)
+
+        bits = None
+        if self.bits is not None:
+            bits = {bit_name: (number >> shift) & ((1 << width) - 1) for bit_name, shift, width in self.bits}
+            flags = [
+                bit_name if width == 1 else f"{bit_name}={bits[bit_name]}"
+                for bit_name, _, width in self.bits
+                if width > 1 or bits[bit_name]
+            ]
+            if flags:
+                descriptions.append(" | ".join(flags))
+
+        return value, bits, "; ".join(descriptions) or None
+
+
+class FieldValue:
+    """
+    One decoded field: its layout and a view of its raw bytes.
+
+    Nothing is converted until a value or its text is asked for.
+    """
+    __slots__ = ('layout', 'raw')
+
+    def __init__(self, layout, raw):
+        self.layout = layout
+        self.raw = raw
+
+    @property
+    def name(self):
+        return self.layout.name
+
+    @property
+    def offset(self):
+        return self.layout.offset
+
+    @property
+    def length(self):
+        """Number of bytes present, which is less than the layout's for a truncated message."""
+        return len(self.raw)
+
+    def hex(self):
+        """Returns the raw bytes as uppercase hex."""
+        return self.raw.hex().upper()
+
+    def to_int(self, byteorder=None, signed=None):
+        """
+        Interprets the raw bytes as an integer.
+
+        Byte order and signedness default to the field spec.
+        """
+        layout = self.layout
+        if byteorder is None:
+            byteorder = layout.byteorder
+        if signed is None:
+            signed = layout.type == 'int'
+        return int.from_bytes(self.raw, byteorder, signed=signed)
+
+    def _interpreted(self):
+        layout = self.layout
+        if layout.table is not None:
+            return layout.table[self.raw[0]]
+        return layout.interpret(int.from_bytes(self.raw, layout.byteorder), len(self.raw))
+
+    @property
+    def enum_name(self):
+        """The enum name for the field's value, or None if not an enum or unknown."""
+        if self.layout.enum is None:
+            return None
+        value = self._interpreted()[0]
+        return value if isinstance(value, str) else None
+
+    @property
+    def bits(self):
+        """
+        A dict of bitfield name to value, or None if the field has no bits.
+
+        For single-byte fields the dict is shared between decodes; treat it as read-only.
+        """
+        if self.layout.bits is None:
+            return None
+        return self._interpreted()[1]
+
+    @property
+    def value(self):
+        """The field interpreted per its spec: bytes, an int, or an enum name (int if unknown)."""
+        if self.layout.type == 'bytes':
+            return bytes(self.raw)
+        return self._interpreted()[0]
+
+    def render(self):
+        """Returns the field's breakdown line."""
+        line = f" - {self.layout.name} ({len(self.raw)}B): 0x{self.hex()}"
+        if self.layout.type != 'bytes':
+            description = self._interpreted()[2]
+            if description is not None:
+                line += f" ({description})"
+        return line
+
+    def __repr__(self):
+        return f"FieldValue({self.layout.name!r}, offset={self.layout.offset}, raw=0x{self.hex()})"
+
+
+class ParseResult:
+    """
+    Structured result of parsing one message.
+
+    Holds the matched definition, the decoded fields and the message data;
+    the text breakdown is rendered only when asked for (str() or render())
+    and then kept.
+    """
+    __slots__ = ('name', 'key', 'is_command', 'fields', 'unparsed', 'data', '_text')
+
+    def __init__(self, name, key, is_command, fields, unparsed, data=b''):
+        self.name = name # None when there was no data
+        self.key = key
+        self.is_command = is_command
+        self.fields = fields # None when the definition has no fields for this direction
+        self.unparsed = unparsed
+        self.data = data
+        self._text = None
+
+    @classmethod
+    def empty(cls, is_command):
+        """Returns the result for a message with no data."""
+        return cls(None, None, is_command, [], b'')
+
+    def __iter__(self):
+        return iter(self.fields or ())
+
+    def __len__(self):
+        return len(self.fields or ())
+
+    def __getitem__(self, name):
+        """Returns the field with the given name."""
+        for field in self.fields or ():
+            if field.name == name:
+                return field
+        raise KeyError(name)
+
+    def values(self):
+        """Returns a dict of field name to interpreted value."""
+        return {field.name: field.value for field in self.fields or ()}
+
+    def expected_checksum(self, field):
+        """Returns the CRC computed over the bytes a checksum field covers."""
+        crc, start = field.layout.checksum
+        return crc.compute(self.data[start:field.offset])
+
+    def checksums(self):
+        """
+        Verifies every checksum field.
+
+        Returns:
+            dict: Field name to True if the stored checksum matches (a
+            truncated checksum field never matches).
+        """
+        return {
+            field.name: field.length == field.layout.length and field.to_int(signed=False) == self.expected_checksum(field)
+            for field in self.fields or ()
+            if field.layout.checksum is not None
+        }
+
+    @property
+    def checksum_ok(self):
+        """True if every checksum field matches, or None if no checksum field is present."""
+        results = self.checksums()
+        return all(results.values()) if results else None
+
+    def render(self):
+        """Returns the human-readable breakdown."""
+        if self._text is None:
+            self._text = self._render()
+        return self._text
+
+    def _render(self):
+        if self.name is None:
+            return "No data to parse."
+        if self.fields is None:
+            return f"{self.name} (Response)\n - No response fields defined."
+
+        breakdown_lines = [f"{self.name} ({'Command' if self.is_command else 'Response'})"]
+        for field in self.fields:
+            line = field.render()
+            if field.layout.checksum is not None:
+                expected = self.expected_checksum(field)
+                if field.length == field.layout.length and field.to_int(signed=False) == expected:
+                    line += " [CRC OK]"
+                else:
+                    line += f" [CRC BAD, expected 0x{expected:0{2 * field.layout.length}X}]"
+            breakdown_lines.append(line)
+        if self.unparsed:
+            breakdown_lines.append(f" - Unparsed Data: 0x{self.unparsed.hex().upper()}")
+        return "\n".join(breakdown_lines)
+
+    __str__ = render
+
+    def __repr__(self):
+        return f"ParseResult({self.name!r}, fields={list(self)!r})"
+
+
+class TransactionResult:
+    """
+    A command and its response, decoded together from the command's definition.
+    """
+    __slots__ = ('command', 'response')
+
+    def __init__(self, command, response):
+        self.command = command
+        self.response = response
+
+    def render(self):
+        """Returns the human-readable breakdown of both messages."""
+        return f"--- Command ---\n{self.command.render()}\n\n--- Response ---\n{self.response.render()}"
+
+    __str__ = render
+
+    def __repr__(self):
+        return f"TransactionResult(command={self.command!r}, response={self.response!r})"
+
+
+class MessageDecoder:
+    """
+    Precomputed layout of one field map (a command or a response).
+
+    The field offsets are resolved once, so splitting a message is a slice per
+    field; when given a memoryview the fields are views into the caller's
+    data rather than copies.
+    """
+    __slots__ = ('fields', 'fixed_fields', 'fixed_size', 'tail')
+
+    def __init__(self, field_map, start=0):
+        self.fields = []
+        offset = 0
+        if start and field_map:
+            # Bytes before `start` are kept as a single field.
+            self.fields.append(FieldLayout(COMMAND_PHASE_FIELD, 0, start))
+            offset = start
+        for field_name, spec in field_map.items():
+            field_len = FieldLayout.spec_length(spec)
+            if field_len == REST_OF_DATA:
+                self.fields.append(FieldLayout.from_spec(field_name, offset, None, spec))
+                break
+            if field_len <= 0:
+                # An empty field ends decoding, so later fields are unreachable.
+                break
+            self.fields.append(FieldLayout.from_spec(field_name, offset, field_len, spec))
+            offset += field_len
+
+        self.tail = self.fields[-1] if self.fields and self.fields[-1].length is None else None
+        self.fixed_fields = self.fields[:-1] if self.tail else self.fields
+        self.fixed_size = offset
+
+    def __bool__(self):
+        return bool(self.fields)
+
+    def split(self, data):
+        """
+        Splits `data` into fields.
+
+        Returns:
+            tuple: (list of FieldValue, unparsed trailing data)
+        """
+        data_len = len(data)
+        if data_len >= self.fixed_size:
+            parts = [FieldValue(field, data[field.offset:field.offset + field.length]) for field in self.fixed_fields]
+            cursor = self.fixed_size
+            if self.tail is not None and cursor < data_len:
+                parts.append(FieldValue(self.tail, data[cursor:]))
+                cursor = data_len
+            return parts, data[cursor:]
+
+        # Short message: keep every complete or partial field that has data.
+        parts = []
+        for field in self.fixed_fields:
+            if field.offset >= data_len:
+                break
+            parts.append(FieldValue(field, data[field.offset:field.offset + field.length]))
+        return parts, data[data_len:]
+
+    def decode(self, definition, data, is_command):
+        """Returns a ParseResult for `data` decoded with this layout."""
+        if not self.fields:
+            return ParseResult(definition.name, definition.key, is_command, None, data[:0], data)
+        fields, unparsed = self.split(data)
+        return ParseResult(definition.name, definition.key, is_command, fields, unparsed, data)
+
+
+class DefinitionDecoder:
+    """
+    Compiled form of one protocol definition.
+
+    SPI is full duplex, so the response buffer is as long as the command and
+    its first bytes are clocked in while the command is still being sent. A
+    definition's optional "response_offset" gives the number of such bytes;
+    the response fields start after them.
+    """
+    __slots__ = ('key', 'name', 'response_offset', 'command', 'response')
+
+    def __init__(self, key, definition):
+        self.key = key
+        self.name = definition["name"]
+        self.response_offset = definition.get("response_offset", 0)
+        self.command = MessageDecoder(definition["fields"])
+        self.response = MessageDecoder(definition["response"], start=self.response_offset)
+
+    def message(self, is_command):
+        """Returns the command or response decoder."""
+        return self.command if is_command else self.response
+
+    def decode_transaction(self, command, response):
+        """Decodes a command and its response with this definition."""
+        return TransactionResult(
+            self.command.decode(self, command, True) if command else ParseResult.empty(True),
+            self.response.decode(self, response, False) if response else ParseResult.empty(False),
+        )
+
+
+# Upper limit on the opcodes a single wildcard or masked key may expand to.
+MAX_KEY_EXPANSION = 4096
+
+
+def parse_opcode_key(key):
+    """
+    Parses a definition key into per-byte (value, mask) pairs.
+
+    Keys are hex opcodes of any length ("9F", "0B10"). An "X" nibble matches
+    any value ("8X"), and "VALUE/MASK" matches opcodes whose bits under MASK
+    equal VALUE ("80/80" is any byte with the top bit set).
+
+    Raises:
+        ValueError: If the key is malformed or matches too many opcodes.
+    """
+    value_text, _, mask_text = key.partition('/')
+    if mask_text:
+        value, mask = bytes.fromhex(value_text), bytes.fromhex(mask_text)
+        if len(value) != len(mask):
+            raise ValueError(f"Key '{key}': value and mask lengths differ")
+    else:
+        text = value_text.replace(' ', '')
+        if len(text) % 2:
+            raise ValueError(f"Key '{key}': odd number of hex digits")
+        value = bytes.fromhex(''.join('0' if c in 'xX' else c for c in text))
+        mask = bytes.fromhex(''.join('0' if c in 'xX' else 'F' for c in text))
+    if not value:
+        raise ValueError(f"Key '{key}': empty opcode")
+
+    pattern = [(v & m, m) for v, m in zip(value, mask)]
+    expansion = 1
+    for _, m in pattern:
+        expansion *= 1 << (8 - m.bit_count())
+    if expansion > MAX_KEY_EXPANSION:
+        raise ValueError(f"Key '{key}' matches {expansion} opcodes (limit {MAX_KEY_EXPANSION})")
+    return pattern
+
+
+class _TrieNode:
+    __slots__ = ('children', 'definition', 'specificity')
+
+    def __init__(self):
+        self.children = {}
+        self.definition = None
+        self.specificity = -1
+
+
+class DecoderTable:
+    """
+    Compiled lookup table for a set of protocol definitions.
+
+    Definitions are stored in a byte trie keyed by their opcode bytes, with
+    wildcard and masked keys expanded when the table is built. A lookup walks
+    the message one byte at a time and returns the longest matching
+    definition, so it costs O(opcode length) however many definitions there
+    are. Where keys overlap at the same length, the one with more fixed bits
+    wins. The "default" entry is used when nothing matches.
+    """
+    def __init__(self, definitions):
+        self.source = definitions
+        self.default = DefinitionDecoder("default", definitions["default"])
+        self.by_key = {}
+        self.root = _TrieNode()
+        self.max_depth = 0
+        for key, definition in definitions.items():
+            if key != "default":
+                decoder = DefinitionDecoder(key, definition)
+                self.by_key[key] = decoder
+                self._insert(parse_opcode_key(key), decoder)
+
+    def _insert(self, pattern, decoder):
+        specificity = sum(m.bit_count() for _, m in pattern)
+        self.max_depth = max(self.max_depth, len(pattern))
+        nodes = [self.root]
+        for value, mask in pattern:
+            matches = [b for b in range(256) if b & mask == value] if mask != 0xFF else [value]
+            nodes = [
+                node.children[b] if b in node.children else node.children.setdefault(b, _TrieNode())
+                for node in nodes for b in matches
+            ]
+        for node in nodes:
+            if specificity > node.specificity:
+                node.definition = decoder
+                node.specificity = specificity
+
+    def lookup(self, data):
+        """Returns the DefinitionDecoder for a message: the longest matching opcode, or the default."""
+        node = self.root
+        match = self.default
+        for byte in data[:self.max_depth]:
+            node = node.children.get(byte)
+            if node is None:
+                break
+            if node.definition is not None:
+                match = node.definition
+        return match
+
+    def lookup_prefix(self, data):
+        """
+        Like lookup(), for data that may be the start of a longer message.
+
+        Returns None when more bytes could still select a longer opcode.
+        """
+        node = self.root
+        match = self.default
+        for byte in data[:self.max_depth]:
+            node = node.children.get(byte)
+            if node is None:
+                return match
+            if node.definition is not None:
+                match = node.definition
+        return None if node.children else match
+
+    def decode_transaction(self, command, response):
+        """
+        Decodes a command and its response using the command's definition.
+
+        Returns:
+            TransactionResult: The decoded command and response.
+        """
+        return self.lookup(command).decode_transaction(command, response)
+
+
+def compile_definitions(definitions):
+    """
+    Compiles a protocol definition mapping (see parser.PROTOCOL_DEFINITIONS).
+
+    Returns:
+        DecoderTable: The compiled decoders.
+    """
+    return DecoderTable(definitions)
@@ -0,0 +1,247 @@
+"""
+Loading protocol definitions from JSON or TOML files.
+
+A definition file maps opcode keys (hex strings) to definitions in the same
+shape as parser.PROTOCOL_DEFINITIONS:
+
+    {
+        "01": {
+            "name": "Read Status Register",
+            "fields": {"Command": 1, "Dummy Byte": 1},
+            "response": {"Status": {"length": 1, "enum": {"0": "READY"}}, "Dummy Byte": 1}
+        }
+    }
+
+Field order is the order in the file. Keys may be multi-byte and may use
+"X" nibble wildcards or VALUE/MASK bit masks (see decoder.parse_opcode_key).
+A "default" entry is optional; when it is missing the standard
+"Unknown Command" definition is added.
+
+Validating and compiling a large file is the slow part of loading it, so the
+compiled DecoderTable is pickled to a cache directory, keyed by the SHA-256 of
+the file contents and of the modules that define the compiled form, so any
+change to that code invalidates old entries. The cache lives in
+$PRISM2_CACHE_DIR, or ~/.cache/prism2.
+"""
+import collections
+import functools
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import tomllib
+
+from . import checksum, decoder
+from .decoder import REST_OF_DATA, FieldLayout, compile_definitions, parse_opcode_key
+
+# Source files whose code shapes a cached DecoderTable: the pickled classes,
+# and this module (validation and the default definition).
+_COMPILED_FORM_SOURCES = (decoder.__file__, checksum.__file__, __file__)
+
+DEFAULT_DEFINITION = {
+    "name": "Unknown Command",
+    "fields": collections.OrderedDict([("Data", REST_OF_DATA)]),
+    "response": collections.OrderedDict([("Data", REST_OF_DATA)]),
+}
+
+def default_cache_dir():
+    """Returns the directory used for compiled definition caches."""
+    return os.environ.get('PRISM2_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'prism2')
+
+
+def read_definitions(path, data=None):
+    """
+    Reads a definition file without validating it.
+
+    Args:
+        path (str): Path to a .json or .toml file.
+        data (bytes): The file contents, if already read.
+
+    Returns:
+        dict: The raw definitions.
+    """
+    if data is None:
+        with open(path, 'rb') as f:
+            data = f.read()
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension == '.json':
+            return json.loads(data)
+        if extension == '.toml':
+            return tomllib.loads(data.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"{path}: {e}") from e
+    raise ValueError(f"{path}: unsupported definition file type '{extension}' (expected .json or .toml)")
+
+
+def _validate_field_spec(where, field_name, spec, offset):
+    if isinstance(spec, dict):
+        if "length" not in spec:
+            raise ValueError(f"{where}.{field_name}: field spec has no 'length'")
+        length = spec["length"]
+    else:
+        length = spec
+
+    if isinstance(length, bool) or not isinstance(length, int) or length < REST_OF_DATA:
+        raise ValueError(f"{where}.{field_name}: length must be an integer >= {REST_OF_DATA}, not {length!r}")
+
+    # The rest of the spec is checked by building its layout.
+    try:
+        FieldLayout.from_spec(field_name, offset, None if length == REST_OF_DATA else length, spec)
+    except ValueError as e:
+        raise ValueError(f"{where}: {e}") from None
+    return length
+
+
+def _validate_field_map(where, field_map, start=0):
+    if not isinstance(field_map, dict):
+        raise ValueError(f"{where}: expected a table of field name to spec")
+    result = collections.OrderedDict()
+    rest_of_data = None
+    offset = start
+    for field_name, spec in field_map.items():
+        if rest_of_data is not None:
+            raise ValueError(f"{where}.{field_name}: follows the rest-of-data field '{rest_of_data}'")
+        length = _validate_field_spec(where, field_name, spec, offset)
+        if length == REST_OF_DATA:
+            rest_of_data = field_name
+        else:
+            offset += length
+        result[field_name] = spec
+    return result
+
+
+def validate_definitions(definitions, source="definitions"):
+    """
+    Checks raw definitions and normalizes them to the PROTOCOL_DEFINITIONS shape.
+
+    Args:
+        definitions (dict): Raw definitions, e.g. from read_definitions().
+        source (str): Name used in error messages.
+
+    Returns:
+        dict: The validated definitions, with a "default" entry.
+
+    Raises:
+        ValueError: If the definitions are malformed.
+    """
+    if not isinstance(definitions, dict):
+        raise ValueError(f"{source}: expected a table of opcode to definition")
+
+    result = {}
+    for key, definition in definitions.items():
+        where = f"{source}: {key}"
+        if key != "default":
+            try:
+                parse_opcode_key(key)
+            except ValueError as e:
+                raise ValueError(f"{where}: key must be a hex opcode or 'default' ({e})") from None
+        if not isinstance(definition, dict):
+            raise ValueError(f"{where}: expected a table")
+        if not isinstance(definition.get("name"), str):
+            raise ValueError(f"{where}: definition has no 'name'")
+        if "fields" not in definition:
+            raise ValueError(f"{where}: definition has no 'fields'")
+        result[key] = {
+            "name": definition["name"],
+            "fields": _validate_field_map(f"{where}.fields", definition["fields"]),
+        }
+        response_offset = definition.get("response_offset", 0)
+        if isinstance(response_offset, bool) or not isinstance(response_offset, int) or response_offset < 0:
+            raise ValueError(f"{where}: response_offset must be a non-negative integer")
+        result[key]["response"] = _validate_field_map(
+            f"{where}.response", definition.get("response", {}), start=response_offset,
+        )
+        if "response_offset" in definition:
+            result[key]["response_offset"] = response_offset
+
+    result.setdefault("default", DEFAULT_DEFINITION)
+    return result
+
+
+@functools.cache
+def compiled_form_fingerprint():
+    """
+    Returns a SHA-256 of the source of the modules that define the compiled form.
+
+    Returns:
+        str: The hex digest, or None if a module's source can't be read (the
+        cache is then not used).
+    """
+    digest = hashlib.sha256()
+    for source in _COMPILED_FORM_SOURCES:
+        try:
+            with open(source, 'rb') as f:
+                digest.update(f.read())
+        except (OSError, TypeError):
+            return None
+    return digest.hexdigest()
+
+
+def _cache_path(cache_dir, data):
+    fingerprint = compiled_form_fingerprint()
+    if fingerprint is None:
+        return None
+    digest = hashlib.sha256(data).hexdigest()
+    return os.path.join(cache_dir, f"protocol-{digest}.{fingerprint[:16]}.pickle")
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        # A corrupt or incompatible entry is rebuilt.
+        print(f"Ignoring unreadable protocol cache {cache_path}: {e}")
+        return None
+
+
+def _write_cache(cache_path, table):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(table, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except OSError as e:
+        print(f"Could not write protocol cache {cache_path}: {e}")
+
+
+def load_decoder_table(path, cache_dir=None, use_cache=True):
+    """
+    Loads, validates and compiles a definition file, using the on-disk cache.
+
+    Args:
+        path (str): Path to a .json or .toml definition file.
+        cache_dir (str): Cache directory; defaults to default_cache_dir().
+        use_cache (bool): Set False to always compile from the file.
+
+    Returns:
+        DecoderTable: The compiled definitions; its `source` is the validated dict.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the file is malformed.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    cache_path = _cache_path(cache_dir or default_cache_dir(), data) if use_cache else None
+    if cache_path is not None:
+        table = _read_cache(cache_path)
+        if table is not None:
+            return table
+
+    definitions = validate_definitions(read_definitions(path, data), source=os.path.basename(path))
+    table = compile_definitions(definitions)
+
+    if cache_path is not None:
+        _write_cache(cache_path, table)
+    return table
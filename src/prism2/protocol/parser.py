@@ -1,8 +1,12 @@
 import collections
 
+from .cache import DecodeCache
+from .decoder import ParseResult, compile_definitions
+from .loader import load_decoder_table
+
 # A simple, example-driven protocol definition.
-# In a real application, this would be more robust and likely loaded from a config file.
-# The key is the first byte of the command.
+# Larger definition sets can be loaded from a JSON or TOML file with load_protocol_definitions().
+# The key is the opcode at the start of the command; the longest matching key is used.
 PROTOCOL_DEFINITIONS = {
     "01": {
         "name": "Read Status Register",
@@ -11,7 +15,10 @@ PROTOCOL_DEFINITIONS = {
             ("Dummy Byte", 1),
         ]),
         "response": collections.OrderedDict([
-            ("Status", 1),
+            ("Status", {
+                "length": 1,
+                "bits": {"WIP": 0, "WEL": 1, "BP0": 2, "BP1": 3, "BP2": 4, "TB": 5, "SEC": 6, "SRP": 7},
+            }),
             ("Dummy Byte", 1),
         ])
     },
@@ -40,51 +47,135 @@ PROTOCOL_DEFINITIONS = {
     }
 }
 
-def parse_hex_data(hex_string, is_command):
+# Compiled form of PROTOCOL_DEFINITIONS, rebuilt only when the definitions change.
+_decoder_table = None
+definitions_version = 0
+
+# Decoded transactions, keyed by (definitions_version, command, response).
+# Larger transactions are decoded without caching to bound the cache's memory.
+decode_cache = DecodeCache(max_entries=4096)
+DECODE_CACHE_MAX_BYTES = 4096
+
+
+def set_protocol_definitions(definitions):
+    """Replaces the active protocol definitions; they are compiled on next use."""
+    global PROTOCOL_DEFINITIONS
+    PROTOCOL_DEFINITIONS = definitions
+    invalidate_decoders()
+
+
+def load_protocol_definitions(path, cache_dir=None, use_cache=True):
     """
-    Parses a hex string into a human-readable breakdown based on the protocol.
+    Loads the active protocol definitions from a JSON or TOML file.
+
+    The compiled decoders are cached on disk (see loader.load_decoder_table),
+    so later loads of an unchanged file skip validation and compilation.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the file is malformed.
+    """
+    global PROTOCOL_DEFINITIONS, _decoder_table, definitions_version
+    table = load_decoder_table(path, cache_dir=cache_dir, use_cache=use_cache)
+    PROTOCOL_DEFINITIONS = table.source
+    _decoder_table = table
+    definitions_version += 1
+    decode_cache.clear()
+    return PROTOCOL_DEFINITIONS
+
+
+def invalidate_decoders():
+    """
+    Discards the compiled decoders.
+
+    Call this after modifying PROTOCOL_DEFINITIONS in place; replacing the
+    dict (or using set_protocol_definitions) is detected automatically.
+    """
+    global _decoder_table
+    _decoder_table = None
+
+
+def get_decoder_table():
+    """Returns the compiled decoders for PROTOCOL_DEFINITIONS, compiling them if needed."""
+    global _decoder_table, definitions_version
+    if _decoder_table is None or _decoder_table.source is not PROTOCOL_DEFINITIONS:
+        _decoder_table = compile_definitions(PROTOCOL_DEFINITIONS)
+        definitions_version += 1
+        decode_cache.clear()
+    return _decoder_table
+
+
+def parse_bytes(data, is_command):
+    """
+    Parses binary data based on the protocol.
+
+    The data is decoded in place: each field in the result is a view into
+    `data`, and nothing is converted to text until the result is rendered.
 
     Args:
-        hex_string (str): The hex data to parse.
+        data (bytes | bytearray | memoryview): The data to parse.
         is_command (bool): True if parsing a command, False for a response.
 
     Returns:
-        A formatted string with the breakdown of the fields.
+        ParseResult: The decoded fields; str() gives the human-readable breakdown.
     """
-    if not hex_string:
-        return "No data to parse."
+    if not data:
+        return ParseResult.empty(is_command)
 
-    data_bytes = bytes.fromhex(hex_string)
+    data = memoryview(data).cast('B')
 
     # Determine the protocol definition to use
-    cmd_byte_hex = hex_string[:2].upper()
-    definition = PROTOCOL_DEFINITIONS.get(cmd_byte_hex, PROTOCOL_DEFINITIONS["default"])
+    definition = get_decoder_table().lookup(data)
+
+    # Select the correct field map (command or response) and decode
+    return definition.message(is_command).decode(definition, data, is_command)
+
+
+def decode_transaction(command, response, use_cache=True):
+    """
+    Decodes a command and the response it produced.
 
-    # Select the correct field map (command or response)
-    field_map = definition["fields"] if is_command else definition["response"]
+    Unlike parsing each message on its own, the response is laid out by the
+    command's definition (including its response_offset), so it doesn't
+    depend on what the response's first byte happens to be.
 
-    if not field_map:
-        return f"{definition['name']} (Response)\n - No response fields defined."
+    Transactions up to DECODE_CACHE_MAX_BYTES are memoized in `decode_cache`,
+    so repeated pairs return the same (shared, read-only) result. Cached
+    results view a private copy of the data rather than the caller's buffer.
 
-    breakdown_lines = [f"{definition['name']} ({'Command' if is_command else 'Response'})"]
+    Args:
+        command (bytes | bytearray | memoryview): The data sent.
+        response (bytes | bytearray | memoryview): The data received.
+        use_cache (bool): Set False to always decode.
 
-    byte_cursor = 0
-    for field_name, field_len in field_map.items():
-        if field_len == -1: # "The rest of the data"
-            field_data = data_bytes[byte_cursor:]
-            byte_cursor = len(data_bytes)
-        else:
-            field_data = data_bytes[byte_cursor : byte_cursor + field_len]
-            byte_cursor += field_len
+    Returns:
+        TransactionResult: The decoded messages; str() gives the human-readable breakdown.
+    """
+    table = get_decoder_table()
+    command = memoryview(command).cast('B')
+    response = memoryview(response).cast('B')
+    if not use_cache or command.nbytes + response.nbytes > DECODE_CACHE_MAX_BYTES:
+        return table.decode_transaction(command, response)
 
-        if not field_data:
-            break
+    command, response = command.tobytes(), response.tobytes()
+    return decode_cache.get(
+        (definitions_version, command, response),
+        lambda: table.decode_transaction(memoryview(command), memoryview(response)),
+    )
 
-        field_hex = field_data.hex().upper()
-        breakdown_lines.append(f" - {field_name} ({len(field_data)}B): 0x{field_hex}")
 
-    if byte_cursor < len(data_bytes):
-        remaining_data = data_bytes[byte_cursor:].hex().upper()
-        breakdown_lines.append(f" - Unparsed Data: 0x{remaining_data}")
+def parse_hex_data(hex_string, is_command):
+    """
+    Parses a hex string into a human-readable breakdown based on the protocol.
+
+    Args:
+        hex_string (str): The hex data to parse.
+        is_command (bool): True if parsing a command, False for a response.
+
+    Returns:
+        A formatted string with the breakdown of the fields.
+    """
+    if not hex_string:
+        return "No data to parse."
 
-    return "\n".join(breakdown_lines)
+    return parse_bytes(bytes.fromhex(hex_string), is_command).render()
@@ -0,0 +1,155 @@
+from . import parser
+
+
+class StreamDecoder:
+    """
+    Incremental decoder for a continuous byte stream delivered in chunks.
+
+    Each record starts with an opcode; its length is the fixed size of the
+    matched definition's field map, or `record_size` if every record in the
+    stream has the same length. Records are decoded as soon as their last
+    byte arrives. Records that lie within one chunk are decoded in place, as
+    views into that chunk; only a record split across chunks is copied, and
+    the decoder never holds more than one partial record, so memory stays
+    bounded however long the stream runs.
+
+    Bytes that can't be framed (an unknown opcode, or a definition with a
+    rest-of-data field and no `record_size`) are skipped one at a time until
+    a known opcode is found, and counted in `skipped`.
+
+    Records view the chunk they came from. If the source reuses its buffers
+    (as Ni845x.spi_stream does), consume or copy each record before the next
+    chunk is read.
+
+    Attributes:
+        records (int): Records decoded so far.
+        skipped (int): Bytes discarded while resynchronizing.
+        bytes_fed (int): Total bytes passed to feed().
+    """
+    def __init__(self, is_command=False, record_size=None, table=None):
+        """
+        Args:
+            is_command (bool): Decode records as commands or responses.
+            record_size (int): Fixed record length; by default each record's
+                length comes from its definition.
+            table (DecoderTable): Definitions to use; defaults to the active ones.
+        """
+        if record_size is not None and record_size <= 0:
+            raise ValueError("record_size must be positive.")
+        self.is_command = is_command
+        self.record_size = record_size
+        self.table = table
+        self._pending = bytearray()
+        self.records = 0
+        self.skipped = 0
+        self.bytes_fed = 0
+
+    def _frame(self, table, data):
+        """
+        Finds the record at the start of `data`.
+
+        Returns:
+            tuple: (definition, size), (None, 0) if more data is needed to
+            tell, or (None, None) if the first byte can't start a record.
+        """
+        if self.record_size is not None:
+            if len(data) < self.record_size:
+                return None, 0
+            return table.lookup(data[:self.record_size]), self.record_size
+
+        definition = table.lookup_prefix(data)
+        if definition is None:
+            return None, 0
+        message = definition.message(self.is_command)
+        if definition is table.default or message.tail is not None or not message.fixed_size:
+            return None, None
+        return definition, message.fixed_size
+
+    def _decode(self, definition, frame):
+        self.records += 1
+        return definition.message(self.is_command).decode(definition, frame, self.is_command)
+
+    def feed(self, chunk):
+        """
+        Adds a chunk of the stream and yields the records it completes.
+
+        Args:
+            chunk (bytes | bytearray | memoryview): The next bytes of the stream.
+
+        Yields:
+            ParseResult: Each complete record, in stream order.
+        """
+        table = self.table or parser.get_decoder_table()
+        data = memoryview(chunk).cast('B')
+        self.bytes_fed += len(data)
+        position = 0
+
+        # Finish a record left over from the previous chunk. Only the opcode
+        # prefix and the missing bytes are copied.
+        while self._pending:
+            probe = bytes(self._pending) + data[:max(table.max_depth, self.record_size or 0)].tobytes()
+            definition, size = self._frame(table, probe)
+            if size is None:
+                del self._pending[0]
+                self.skipped += 1
+                continue
+            missing = size - len(self._pending) if size else None
+            if missing is None or missing > len(data):
+                self._pending += data
+                return
+            if missing <= 0:
+                # After resynchronizing, the held bytes can already contain
+                # a whole record; the rest of them start the next one.
+                frame = bytes(self._pending[:size])
+                del self._pending[:size]
+                yield self._decode(definition, memoryview(frame))
+                continue
+            self._pending += data[:missing]
+            frame = bytes(self._pending)
+            self._pending.clear()
+            position = missing
+            yield self._decode(definition, memoryview(frame))
+
+        data_len = len(data)
+        while position < data_len:
+            view = data[position:]
+            definition, size = self._frame(table, view)
+            if size is None:
+                position += 1
+                self.skipped += 1
+                continue
+            if not size or size > len(view):
+                # Keep the partial record; it is shorter than one record.
+                self._pending += view
+                return
+            position += size
+            yield self._decode(definition, view[:size])
+
+    def flush(self):
+        """
+        Ends the stream, discarding any partial record.
+
+        Returns:
+            bytes: The bytes of the incomplete record, if any.
+        """
+        remainder = bytes(self._pending)
+        self._pending.clear()
+        return remainder
+
+    def stats(self):
+        """Returns the decoder counters as a dict."""
+        return {"records": self.records, "skipped": self.skipped, "bytes_fed": self.bytes_fed, "pending": len(self._pending)}
+
+
+def decode_stream(chunks, **kwargs):
+    """
+    Decodes an iterable of chunks (e.g. from Ni845x.spi_stream) record by record.
+
+    Keyword arguments are passed to StreamDecoder.
+
+    Yields:
+        ParseResult: Each complete record.
+    """
+    decoder = StreamDecoder(**kwargs)
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
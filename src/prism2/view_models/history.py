@@ -0,0 +1,326 @@
+import collections
+import struct
+import tempfile
+import time
+from array import array
+
+# Transaction status codes.
+STATUS_OK = 0
+STATUS_FAILED = 1
+
+# Per-record overhead of the in-memory columns: offset, two lengths, timestamp, status.
+_COLUMN_BYTES = 8 + 4 + 4 + 8 + 1
+
+# Spilled record header: timestamp, command length, response length, status.
+_SPILL_HEADER = struct.Struct('<dIIB')
+
+# Spilled records are located through an index entry per page of this many
+# records and paged back in a page at a time.
+SPILL_PAGE_RECORDS = 256
+SPILL_CACHED_PAGES = 8
+
+
+class HistoryRecord:
+    """One transaction read back from a TransactionHistory."""
+    __slots__ = ('index', 'command', 'response', 'timestamp', 'status')
+
+    def __init__(self, index, command, response, timestamp, status):
+        self.index = index
+        self.command = command # bytes
+        self.response = response # bytes
+        self.timestamp = timestamp # time.monotonic() when recorded
+        self.status = status
+
+    @property
+    def command_hex(self):
+        return self.command.hex().upper()
+
+    @property
+    def response_hex(self):
+        return self.response.hex().upper()
+
+    @property
+    def ok(self):
+        return self.status == STATUS_OK
+
+    def __repr__(self):
+        return f"HistoryRecord({self.index}, command=0x{self.command_hex}, response=0x{self.response_hex}, status={self.status})"
+
+
+class TransactionHistory:
+    """
+    Append-only store of SPI transactions for the command history.
+
+    Appending is O(1) and records are read back by index, so the cost of a
+    send doesn't grow with the length of the session. Instead of publishing
+    the whole list (as a Tk Variable would), observers are told which index
+    range was added and read just those records.
+
+    Records are stored in columns: the raw command and response bytes of
+    every transaction are packed into one bytearray, indexed by offset and
+    length arrays, next to arrays of monotonic timestamps and status codes.
+    That is about 25 bytes per transaction plus the data itself, so millions
+    of transactions fit in memory. Hex is produced only when a record is
+    displayed (HistoryRecord.command_hex / response_hex).
+
+    For runs that would outgrow memory anyway, `max_records` and/or
+    `max_bytes` turn the store into a ring buffer: once either limit is
+    exceeded, the oldest quarter of the in-memory records is appended to an
+    on-disk segment file (`spill_path`, or an anonymous temporary file).
+    Indices don't change when records are spilled; reading an old index
+    pages its records back in from the file, keeping the few most recently
+    used pages cached.
+    """
+    def __init__(self, max_records=None, max_bytes=None, spill_path=None):
+        """
+        Args:
+            max_records (int): Most records to keep in memory; None for no limit.
+            max_bytes (int): Most bytes of records to keep in memory; None for no limit.
+            spill_path (str): Segment file for evicted records; a temporary
+                file (deleted on close) if not given.
+        """
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.spill_path = spill_path
+        self._data = bytearray()
+        self._data_base = 0 # Bytes evicted from the front of _data; offsets are absolute.
+        self._offsets = array('Q')
+        self._command_lengths = array('I')
+        self._response_lengths = array('I')
+        self._timestamps = array('d')
+        self._status = array('B')
+        self._observers = []
+
+        self._first = 0 # Index of the first record held in memory
+        self._spill = None
+        self._spill_size = 0
+        self._spill_pages = array('Q') # File offset of every SPILL_PAGE_RECORDS-th spilled record
+        self._page_cache = collections.OrderedDict()
+        self._closed = False
+
+    def __len__(self):
+        return self._first + len(self._offsets)
+
+    @property
+    def bounded(self):
+        return self.max_records is not None or self.max_bytes is not None
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def _check_open(self):
+        if self._closed:
+            raise ValueError("history is closed")
+
+    @property
+    def spilled(self):
+        """Number of records that have been moved to the segment file."""
+        return self._first
+
+    def _record(self, index):
+        if index < self._first:
+            page = index // SPILL_PAGE_RECORDS
+            return self._read_page(page)[index - page * SPILL_PAGE_RECORDS]
+        position = index - self._first
+        offset = self._offsets[position] - self._data_base
+        command_end = offset + self._command_lengths[position]
+        response_end = command_end + self._response_lengths[position]
+        return HistoryRecord(
+            index,
+            bytes(self._data[offset:command_end]),
+            bytes(self._data[command_end:response_end]),
+            self._timestamps[position],
+            self._status[position],
+        )
+
+    def __getitem__(self, index):
+        """Returns the HistoryRecord at `index` (or a list of records for a slice)."""
+        self._check_open()
+        if isinstance(index, slice):
+            return [self._record(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("history index out of range")
+        return self._record(index)
+
+    def __iter__(self):
+        self._check_open()
+        for index in range(len(self)):
+            yield self._record(index)
+
+    @property
+    def nbytes(self):
+        """Approximate memory used by the transactions held in memory."""
+        return len(self._data) + _COLUMN_BYTES * len(self._offsets)
+
+    def add_observer(self, callback):
+        """
+        Registers `callback(start, stop)`, called after records [start, stop) are added.
+
+        After clear(), it is called with (0, 0).
+        """
+        self._observers.append(callback)
+
+    def remove_observer(self, callback):
+        """Unregisters a callback added with add_observer()."""
+        self._observers.remove(callback)
+
+    def _notify(self, start, stop):
+        for callback in list(self._observers):
+            callback(start, stop)
+
+    def _store(self, command, response, status, timestamp):
+        self._offsets.append(self._data_base + len(self._data))
+        self._data += command
+        self._data += response
+        self._command_lengths.append(len(command))
+        self._response_lengths.append(len(response))
+        self._timestamps.append(time.monotonic() if timestamp is None else timestamp)
+        self._status.append(status)
+        if self.bounded and self._over_limit(len(self._offsets), self.nbytes):
+            self._evict()
+
+    def _over_limit(self, count, nbytes):
+        return (self.max_records is not None and count > self.max_records) or \
+            (self.max_bytes is not None and nbytes > self.max_bytes)
+
+    def _evict(self):
+        """Spills the oldest records until the store is back to three quarters of its limits."""
+        count = len(self._offsets)
+        low_records = None if self.max_records is None else self.max_records * 3 // 4
+        low_bytes = None if self.max_bytes is None else self.max_bytes * 3 // 4
+        evict = 0
+        remaining_bytes = self.nbytes
+        # Always keep the newest record in memory.
+        while evict < count - 1 and (
+            (low_records is not None and count - evict > low_records)
+            or (low_bytes is not None and remaining_bytes > low_bytes)
+        ):
+            remaining_bytes -= _COLUMN_BYTES + self._command_lengths[evict] + self._response_lengths[evict]
+            evict += 1
+        if evict:
+            self._spill_records(evict)
+
+    def _spill_records(self, count):
+        if self._spill is None:
+            self._spill = open(self.spill_path, 'w+b') if self.spill_path else tempfile.TemporaryFile()
+
+        chunks = []
+        position = self._spill_size
+        data_end = 0
+        for i in range(count):
+            if (self._first + i) % SPILL_PAGE_RECORDS == 0:
+                self._spill_pages.append(position)
+            offset = self._offsets[i] - self._data_base
+            data_end = offset + self._command_lengths[i] + self._response_lengths[i]
+            header = _SPILL_HEADER.pack(self._timestamps[i], self._command_lengths[i], self._response_lengths[i], self._status[i])
+            chunks.append(header)
+            chunks.append(self._data[offset:data_end])
+            position += len(header) + data_end - offset
+
+        self._spill.seek(self._spill_size)
+        self._spill.write(b''.join(chunks))
+        self._spill_size = position
+
+        del self._data[:data_end]
+        self._data_base += data_end
+        for column in (self._offsets, self._command_lengths, self._response_lengths, self._timestamps, self._status):
+            del column[:count]
+        self._first += count
+
+    def _read_page(self, page):
+        """Returns the records of one spilled page, reading it from the segment file if needed."""
+        records = self._page_cache.get(page)
+        if records is not None:
+            self._page_cache.move_to_end(page)
+            return records
+
+        start = self._spill_pages[page]
+        complete = page + 1 < len(self._spill_pages)
+        end = self._spill_pages[page + 1] if complete else self._spill_size
+        self._spill.seek(start)
+        block = self._spill.read(end - start)
+
+        records = []
+        index = page * SPILL_PAGE_RECORDS
+        position = 0
+        while position < len(block):
+            timestamp, command_length, response_length, status = _SPILL_HEADER.unpack_from(block, position)
+            position += _SPILL_HEADER.size
+            command_end = position + command_length
+            response_end = command_end + response_length
+            records.append(HistoryRecord(index, block[position:command_end], block[command_end:response_end], timestamp, status))
+            position = response_end
+            index += 1
+
+        # The last page is still being filled, so only complete pages are cached.
+        if complete:
+            self._page_cache[page] = records
+            while len(self._page_cache) > SPILL_CACHED_PAGES:
+                self._page_cache.popitem(last=False)
+        return records
+
+    def append(self, command, response, status=STATUS_OK, timestamp=None):
+        """
+        Adds a transaction.
+
+        Args:
+            command (bytes-like): The data sent.
+            response (bytes-like): The data received (empty if the transfer failed).
+            status (int): STATUS_OK or STATUS_FAILED.
+            timestamp (float): time.monotonic() of the transfer; defaults to now.
+
+        Returns:
+            int: The index of the new record.
+        """
+        self._check_open()
+        index = len(self)
+        self._store(command, response, status, timestamp)
+        self._notify(index, index + 1)
+        return index
+
+    def extend(self, transactions):
+        """
+        Adds several (command, response) transactions, notifying observers once.
+
+        Returns:
+            range: The indices of the new records.
+        """
+        self._check_open()
+        start = len(self)
+        for command, response in transactions:
+            self._store(command, response, STATUS_OK, None)
+        stop = len(self)
+        if stop > start:
+            self._notify(start, stop)
+        return range(start, stop)
+
+    def clear(self):
+        """Removes every record, including spilled ones."""
+        self._check_open()
+        self._data = bytearray()
+        self._data_base = 0
+        for column in (self._offsets, self._command_lengths, self._response_lengths, self._timestamps, self._status):
+            del column[:]
+        self._first = 0
+        del self._spill_pages[:]
+        self._page_cache.clear()
+        if self._spill is not None:
+            self._spill.truncate(0)
+            self._spill_size = 0
+        self._notify(0, 0)
+
+    def close(self):
+        """
+        Closes the segment file; a temporary segment file is deleted.
+
+        The history can't be read or added to after this; doing so raises
+        ValueError. Closing again does nothing.
+        """
+        self._closed = True
+        self._page_cache.clear()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
@@ -1,17 +1,52 @@
+import math
+import os
+
 import customtkinter as ctk
 from ..hardware.handler import HardwareHandler
 from ..hardware.mock_handler import MockHardwareHandler
 from ..hardware.ni845x import _dll_loaded
-from ..protocol.parser import parse_hex_data
+from ..protocol.parser import decode_transaction
+from .history import STATUS_FAILED, TransactionHistory
+
+
+def _env_number(name, kind):
+    """
+    Reads a positive number from the environment variable `name`.
+
+    Returns:
+        The value converted with `kind` (int or float), or None if the
+        variable is unset or malformed (with a warning).
+    """
+    value = os.environ.get(name)
+    if not value:
+        return None
+    try:
+        number = kind(value)
+    except ValueError:
+        number = None
+    if number is None or not math.isfinite(number) or number <= 0:
+        print(f"Warning: ignoring {name}={value!r}; expected a positive {kind.__name__}.")
+        return None
+    return number
 
 
 class MainViewModel:
-    def __init__(self):
+    def __init__(self, history_max_records=None, history_max_mb=None, history_spill_path=None):
         """
         Initializes the MainViewModel.
 
         This class holds the application's state and business logic, and it
         interacts with the hardware handler.
+
+        The command history is unbounded unless a record or size limit is
+        given (here, or via PRISM2_HISTORY_MAX_RECORDS / PRISM2_HISTORY_MAX_MB);
+        then older transactions are spilled to disk and paged back in when
+        viewed.
+
+        Args:
+            history_max_records (int): Most transactions to keep in memory.
+            history_max_mb (float): Most megabytes of transactions to keep in memory.
+            history_spill_path (str): File for spilled transactions; a temporary file by default.
         """
         self.hardware_handler = None
 
@@ -20,8 +55,16 @@ class MainViewModel:
         self.device_list = ctk.Variable(value=[])
         self.selected_device = ctk.StringVar()
         self.is_connected = ctk.BooleanVar(value=False)
-        self.simulation_mode = ctk.BooleanVar(value=not _dll_loaded)
-        self.command_history = ctk.Variable(value=[])
+        self.simulation_mode = ctk.BooleanVar(value=not _dll_loaded())
+        if history_max_records is None:
+            history_max_records = _env_number('PRISM2_HISTORY_MAX_RECORDS', int)
+        if history_max_mb is None:
+            history_max_mb = _env_number('PRISM2_HISTORY_MAX_MB', float)
+        self.command_history = TransactionHistory(
+            max_records=history_max_records,
+            max_bytes=None if history_max_mb is None else int(history_max_mb * 1024 * 1024),
+            spill_path=history_spill_path,
+        )
         self.breakdown_text = ctk.StringVar()
 
         # --- Initial State ---
@@ -45,7 +88,7 @@ class MainViewModel:
         """
         # If the user is trying to turn off simulation mode but the DLL is not loaded,
         # prevent the change and revert the checkbox.
-        if not self.simulation_mode.get() and not _dll_loaded:
+        if not self.simulation_mode.get() and not _dll_loaded():
             print("Warning: Ni845x.dll not found. Cannot disable simulation mode.")
             self.simulation_mode.set(True)
             return
@@ -97,6 +140,14 @@ class MainViewModel:
         self.is_connected.set(False)
         print("Device disconnected.")
 
+    def shutdown(self):
+        """
+        Releases the device and the command history when the application exits.
+        """
+        if self.is_connected.get():
+            self.disconnect_device()
+        self.command_history.close()
+
     # --- SPI Command Methods ---
 
     def send_spi_command(self, command_hex):
@@ -123,25 +174,24 @@ class MainViewModel:
         response_bytes = self.hardware_handler.spi_transfer(command_bytes)
 
         if response_bytes is not None:
-            response_hex = response_bytes.hex().upper()
-            print(f"Received SPI response: {response_hex}")
+            print(f"Received SPI response: {response_bytes.hex().upper()}")
             # Update the command history
-            new_history = self.command_history.get()
-            new_history.append({"command": command_hex, "response": response_hex})
-            self.command_history.set(new_history)
+            self.command_history.append(command_bytes, response_bytes)
         else:
             print("SPI transfer failed.")
+            self.command_history.append(command_bytes, b'', status=STATUS_FAILED)
 
-    def select_history_item(self, item):
+    def select_history_item(self, index):
         """
         Parses a selected history item and updates the breakdown view.
 
+        The response is decoded with the definition of the command that
+        produced it.
+
         Args:
-            item (dict): The selected history item, containing 'command' and 'response'.
+            index (int): The index of the item in `command_history`.
         """
-        cmd_breakdown = parse_hex_data(item['command'], is_command=True)
-        rsp_breakdown = parse_hex_data(item['response'], is_command=False)
-
-        full_breakdown = f"--- Command ---\n{cmd_breakdown}\n\n--- Response ---\n{rsp_breakdown}"
+        record = self.command_history[index]
+        transaction = decode_transaction(record.command, record.response)
 
-        self.breakdown_text.set(full_breakdown)
\ No newline at end of file
+        self.breakdown_text.set(transaction.render())
\ No newline at end of file
@@ -0,0 +1,131 @@
+import collections
+
+import pytest
+from src.prism2.protocol import bulk, parser
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def capture():
+    """Fixture with status polls, JEDEC ID reads and an unknown command."""
+    return [
+        (b'\x01\x00', b'\x03\x00'),
+        (b'\x9F\x00\x00\x00', b'\xFF\xEF\x40\x18'),
+        (b'\x01\x00', b'\x00\x00'),
+        (b'\xAA\xBB', b'\x00\x00'),
+        (b'\x01', b'\x02'),
+    ]
+
+
+@pytest.fixture(autouse=True)
+def jedec_definition():
+    """Fixture that adds a JEDEC ID definition with an enum and a response offset."""
+    definitions = parser.PROTOCOL_DEFINITIONS
+    parser.set_protocol_definitions(dict(definitions, **{
+        "9F": {
+            "name": "Read JEDEC ID",
+            "fields": collections.OrderedDict([("Command", 1), ("Dummy", 3)]),
+            "response_offset": 1,
+            "response": collections.OrderedDict([
+                ("Manufacturer", {"length": 1, "enum": {0xEF: "Winbond"}}),
+                ("Device", {"length": 2, "type": "uint"}),
+            ]),
+        },
+    }))
+    yield
+    parser.set_protocol_definitions(definitions)
+
+
+def test_decode_batch_groups_by_definition(capture):
+    """
+    Tests that transactions are grouped by their command's definition and
+    keep their positions in the capture.
+    """
+    result = bulk.decode_batch(capture)
+
+    assert result.count == 5
+    assert result.counts() == {"01": 3, "9F": 1, "default": 1}
+    assert result["01"].indices.tolist() == [0, 2, 4]
+    # The default definition has only a rest-of-data field, so no columns.
+    assert result["default"].command is None
+
+
+def test_decode_batch_returns_field_columns(capture):
+    """
+    Tests the structured columns, including bitfields, enums, multi-byte
+    integers and incomplete messages.
+    """
+    result = bulk.decode_batch(capture)
+    status = result["01"]
+    jedec = result["9F"]
+
+    assert status.column("response", "Status").tolist() == [3, 0, 2]
+    assert status.bits("response", "Status")["WEL"].tolist() == [1, 0, 1]
+    assert status.response_complete.tolist() == [True, True, False]
+    assert jedec.column("response", "Device").tolist() == [0x4018]
+    assert jedec.enum("response", "Manufacturer").tolist() == ["Winbond"]
+    assert jedec.response["Command Phase"].tolist() == [[0xFF]]
+
+
+def test_checksum_ok_flags_corrupted_frames():
+    """
+    Tests vectorized CRC verification against the scalar implementation.
+    """
+    from src.prism2.protocol import checksum
+
+    parser.set_protocol_definitions(dict(parser.PROTOCOL_DEFINITIONS, **{
+        "3B": {
+            "name": "Write Frame",
+            "fields": collections.OrderedDict([
+                ("Command", 1),
+                ("Payload", 2),
+                ("CRC", {"length": 2, "checksum": "crc16-modbus", "byteorder": "little"}),
+            ]),
+            "response": collections.OrderedDict(),
+        },
+    }))
+    crc = checksum.from_spec("crc16-modbus")[0]
+    frames = [b'\x3B' + bytes([value, value ^ 0x5A]) for value in range(8)]
+    commands = [frame + crc.compute(frame).to_bytes(2, 'little') for frame in frames]
+    commands[3] = commands[3][:-1] + b'\x00'
+    commands[5] = commands[5][:-1]
+
+    result = bulk.decode_batch([(command, b'') for command in commands])
+
+    assert result["3B"].checksum_ok("command", "CRC").tolist() == [True, True, True, False, True, False, True, True]
+
+
+@pytest.mark.parametrize("byteorder", ["big", "little"])
+def test_three_byte_bits_and_enum_fields_match_the_scalar_decoder(byteorder):
+    """
+    Tests that integer fields with no matching NumPy type are assembled in
+    their byte order, so bits and enums agree with decoder.FieldValue.
+    """
+    parser.set_protocol_definitions(dict(parser.PROTOCOL_DEFINITIONS, **{
+        "7A": {
+            "name": "Read Counters",
+            "fields": collections.OrderedDict([
+                ("Command", 1),
+                ("Mode", {"length": 3, "byteorder": byteorder, "enum": {0x010203: "TRIPLE", 0x000001: "ONE"}}),
+                ("Flags", {"length": 3, "byteorder": byteorder, "bits": {"LOW": 0, "MID": [8, 11], "TOP": 23}}),
+                ("Offset", {"length": 3, "byteorder": byteorder, "type": "int"}),
+            ]),
+            "response": collections.OrderedDict(),
+        },
+    }))
+    commands = [
+        b'\x7A' + b'\x01\x02\x03' + b'\x80\x0A\x01' + b'\xFF\xFF\xFE',
+        b'\x7A' + b'\x03\x02\x01' + b'\x01\x05\x80' + b'\x00\x00\x01',
+        b'\x7A' + b'\x00\x00\x01' + b'\x00\x00\x00' + b'\x80\x00\x00',
+    ]
+
+    group = bulk.decode_batch([(command, b'') for command in commands])["7A"]
+
+    fields = [parser.parse_bytes(command, is_command=True) for command in commands]
+    assert group.enum("command", "Mode").tolist() == [result["Mode"].value for result in fields]
+    bits = group.bits("command", "Flags")
+    assert [{name: int(column[row]) for name, column in bits.items()} for row in range(3)] == [
+        result["Flags"].bits for result in fields
+    ]
+    assert group.column("command", "Offset").tolist() == [result["Offset"].value for result in fields]
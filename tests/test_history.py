@@ -0,0 +1,110 @@
+import pytest
+from src.prism2.view_models.history import STATUS_FAILED, TransactionHistory
+
+
+def test_append_notifies_observers_with_new_range():
+    """
+    Tests that observers receive only the index range of new records.
+    """
+    history = TransactionHistory()
+    ranges = []
+    history.add_observer(lambda start, stop: ranges.append((start, stop)))
+
+    assert history.append(b'\x01\x00', b'\x00\xFF') == 0
+    assert history.extend([(b'\x06', b'\x00'), (b'\xC7', b'\x00')]) == range(1, 3)
+
+    assert ranges == [(0, 1), (1, 3)]
+    assert len(history) == 3
+    assert (history[2].command, history[2].response) == (b'\xC7', b'\x00')
+    assert [record.command_hex for record in history[-2:]] == ["06", "C7"]
+
+
+def test_records_are_stored_compactly_with_metadata():
+    """
+    Tests that raw bytes, timestamps and status round-trip through the
+    column store and that no per-record objects are kept.
+    """
+    history = TransactionHistory()
+    history.append(b'\xDE\xAD\xBE\xEF', bytearray(b'\xCA\xFE'), timestamp=12.5)
+    history.append(memoryview(b'\x9F'), b'', status=STATUS_FAILED)
+
+    first, second = history
+
+    assert (first.command_hex, first.response_hex, first.timestamp, first.ok) == ("DEADBEEF", "CAFE", 12.5, True)
+    assert (second.command, second.response, second.ok) == (b'\x9F', b'', False)
+    assert second.timestamp > 0
+    assert history.nbytes == 7 + 2 * (8 + 4 + 4 + 8 + 1)
+
+
+def test_clear_and_remove_observer():
+    """
+    Tests that clearing notifies observers with an empty range and that
+    removed observers are no longer called.
+    """
+    history = TransactionHistory()
+    ranges = []
+    observer = lambda start, stop: ranges.append((start, stop))
+    history.add_observer(observer)
+    history.append(b'\x01', b'\x00')
+
+    history.clear()
+    history.remove_observer(observer)
+    history.append(b'\x06', b'\x00')
+
+    assert ranges == [(0, 1), (0, 0)]
+    assert [record.command for record in history] == [b'\x06']
+
+
+@pytest.mark.parametrize("limits", [{"max_records": 100}, {"max_bytes": 4000}])
+def test_bounded_history_spills_and_pages_back(tmp_path, limits):
+    """
+    Tests that a bounded history keeps memory within its limit, spills the
+    oldest records to the segment file, and reads them back by index.
+    """
+    history = TransactionHistory(spill_path=str(tmp_path / "history.seg"), **limits)
+    ranges = []
+    history.add_observer(lambda start, stop: ranges.append((start, stop)))
+
+    for i in range(1000):
+        history.append(i.to_bytes(2, 'big'), bytes([i % 256]) * (i % 7), timestamp=float(i))
+        assert len(history._offsets) <= limits.get("max_records", 1000)
+        assert history.nbytes <= limits.get("max_bytes", 1 << 30)
+
+    assert len(history) == 1000
+    assert history.spilled > 0
+    assert (tmp_path / "history.seg").stat().st_size > 0
+    assert ranges[-1] == (999, 1000)
+    for i in (0, 1, 255, 256, 257, history.spilled - 1, history.spilled, 999):
+        record = history[i]
+        assert (record.index, record.command, record.response, record.timestamp) == \
+            (i, i.to_bytes(2, 'big'), bytes([i % 256]) * (i % 7), float(i))
+    assert [record.index for record in history] == list(range(1000))
+
+    history.clear()
+    assert len(history) == 0
+    history.append(b'\x06', b'\x00')
+    assert history[0].command == b'\x06'
+    history.close()
+
+
+def test_closed_history_rejects_reads_and_appends(tmp_path):
+    """
+    Tests that a closed history raises instead of reopening (and truncating)
+    its segment file or reading spilled records from a closed file.
+    """
+    path = tmp_path / "history.seg"
+    history = TransactionHistory(max_records=4, spill_path=str(path))
+    for i in range(10):
+        history.append(bytes([i]), b'')
+
+    history.close()
+    history.close()
+    size = path.stat().st_size
+
+    assert history.closed
+    assert len(history) == 10
+    for operation in (lambda: history[0], lambda: history[9], lambda: list(history),
+                      lambda: history.append(b'\x0A', b''), history.clear):
+        with pytest.raises(ValueError, match="closed"):
+            operation()
+    assert path.stat().st_size == size
@@ -37,7 +37,7 @@ def view_model(mocker, mock_handler):
     """Fixture to create a MainViewModel with a mocked HardwareHandler."""
     # Patch _dll_loaded to True to ensure the ViewModel tries to use the real
     # HardwareHandler, which we've mocked below.
-    mocker.patch('src.prism2.view_models.main_view_model._dll_loaded', True)
+    mocker.patch('src.prism2.view_models.main_view_model._dll_loaded', return_value=True)
 
     # Mock the HardwareHandler class to return our mock instance
     mocker.patch('src.prism2.view_models.main_view_model.HardwareHandler', return_value=mock_handler)
@@ -65,10 +65,10 @@ def test_send_spi_command_updates_history(view_model):
     view_model.send_spi_command(command_to_send)
 
     # Assert
-    history = view_model.command_history.get()
+    history = view_model.command_history
     assert len(history) == 1
-    assert history[0]["command"] == "DEADBEEF"
-    assert history[0]["response"] == "CAFE" # from our mock handler
+    assert history[0].command_hex == "DEADBEEF"
+    assert history[0].response_hex == "CAFE" # from our mock handler
 
 def test_initial_state(view_model, mock_handler):
     """
@@ -87,7 +87,7 @@ def test_initializes_in_simulation_mode_if_dll_is_missing(mocker):
     is not loaded.
     """
     # Arrange
-    mocker.patch('src.prism2.view_models.main_view_model._dll_loaded', False)
+    mocker.patch('src.prism2.view_models.main_view_model._dll_loaded', return_value=False)
     mock_real_handler = mocker.patch('src.prism2.view_models.main_view_model.HardwareHandler')
     mock_mock_handler = mocker.patch('src.prism2.view_models.main_view_model.MockHardwareHandler')
 
@@ -103,3 +103,91 @@ def test_initializes_in_simulation_mode_if_dll_is_missing(mocker):
     assert vm.simulation_mode.get() is True
     mock_mock_handler.assert_called_once()
     mock_real_handler.assert_not_called()
+
+def test_select_history_item_decodes_response_with_command_definition(view_model):
+    """
+    Tests that the breakdown decodes the response using the command's
+    definition rather than the response's first byte.
+    """
+    # Arrange
+    view_model.command_history.append(b'\x01\x00', b'\xCA\xFE')
+
+    # Act
+    view_model.select_history_item(0)
+
+    # Assert
+    assert view_model.breakdown_text.get() == (
+        "--- Command ---\n"
+        "Read Status Register (Command)\n"
+        " - Command (1B): 0x01\n"
+        " - Dummy Byte (1B): 0x00\n"
+        "\n"
+        "--- Response ---\n"
+        "Read Status Register (Response)\n"
+        " - Status (1B): 0xCA (WEL | BP1 | SEC | SRP)\n"
+        " - Dummy Byte (1B): 0xFE"
+    )
+
+def test_failed_spi_command_is_recorded_with_status(view_model, mock_handler):
+    """
+    Tests that a failed transfer is kept in the history, marked as failed.
+    """
+    # Arrange
+    view_model.is_connected.set(True)
+    mock_handler.spi_transfer.return_value = None
+
+    # Act
+    view_model.send_spi_command("06")
+
+    # Assert
+    record = view_model.command_history[0]
+    assert record.command == b'\x06'
+    assert not record.ok
+
+def test_history_size_limit_accepts_fractional_megabytes(view_model, monkeypatch):
+    """
+    Tests that PRISM2_HISTORY_MAX_MB may be fractional and is converted to bytes.
+    """
+    # Arrange
+    monkeypatch.setenv("PRISM2_HISTORY_MAX_MB", "0.5")
+
+    # Act
+    vm = MainViewModel()
+
+    # Assert
+    assert vm.command_history.max_bytes == 512 * 1024
+
+@pytest.mark.parametrize("name, value", [
+    ("PRISM2_HISTORY_MAX_RECORDS", "10k"),
+    ("PRISM2_HISTORY_MAX_RECORDS", "-5"),
+    ("PRISM2_HISTORY_MAX_MB", "half"),
+    ("PRISM2_HISTORY_MAX_MB", "inf"),
+])
+def test_malformed_history_limit_is_ignored_with_a_warning(view_model, monkeypatch, capsys, name, value):
+    """
+    Tests that a malformed history limit falls back to no limit and names the variable.
+    """
+    # Arrange
+    monkeypatch.setenv(name, value)
+
+    # Act
+    vm = MainViewModel()
+
+    # Assert
+    assert not vm.command_history.bounded
+    assert f"ignoring {name}={value!r}" in capsys.readouterr().out
+
+def test_shutdown_disconnects_and_closes_history(view_model, mock_handler):
+    """
+    Tests that shutting down closes the device and the history's spill file.
+    """
+    # Arrange
+    view_model.is_connected.set(True)
+    view_model.command_history.close = MagicMock()
+
+    # Act
+    view_model.shutdown()
+
+    # Assert
+    mock_handler.close_device.assert_called_once()
+    view_model.command_history.close.assert_called_once()
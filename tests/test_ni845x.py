@@ -0,0 +1,354 @@
+import array
+import threading
+import time
+
+import pytest
+from src.prism2.hardware import fake_ni845x, ni845x
+
+
+@pytest.fixture
+def fake_dll():
+    """
+    Fixture that installs the in-process fake NI-845x library.
+
+    SPI transfers echo the written bytes back in reverse order.
+    """
+    fake = fake_ni845x.install(spi_responder=lambda data, settings: data[::-1])
+    yield fake
+    ni845x.set_library(None)
+
+
+@pytest.fixture
+def device(fake_dll):
+    """Fixture that opens an Ni845x device against the fake DLL."""
+    with ni845x.Ni845x(fake_dll.devices[0]) as device:
+        yield device
+
+
+@pytest.mark.parametrize("write_data", [
+    b'\x01\x02\x03',
+    bytearray(b'\x01\x02\x03'),
+    memoryview(b'\x01\x02\x03'),
+    array.array('B', [1, 2, 3]),
+    [1, 2, 3],
+])
+def test_spi_write_read_accepts_buffer_objects(device, write_data):
+    """
+    Tests that spi_write_read accepts any buffer-protocol object (and lists of ints).
+    """
+    config = device.create_spi_config()
+
+    assert device.spi_write_read(config, write_data) == b'\x03\x02\x01'
+
+
+def test_spi_write_read_returns_memoryview(device):
+    """
+    Tests that spi_write_read can return a memoryview instead of bytes.
+    """
+    config = device.create_spi_config()
+
+    result = device.spi_write_read(config, b'\xDE\xAD', as_memoryview=True)
+
+    assert isinstance(result, memoryview)
+    assert result.tobytes() == b'\xAD\xDE'
+
+
+def test_spi_write_readinto_fills_caller_buffer(device):
+    """
+    Tests that spi_write_readinto stores read data in the supplied buffer.
+    """
+    config = device.create_spi_config()
+    read_buffer = bytearray(4)
+
+    count = device.spi_write_readinto(config, b'\x0A\x0B\x0C', read_buffer)
+
+    assert count == 3
+    assert read_buffer == b'\x0C\x0B\x0A\x00'
+
+
+def test_spi_write_readinto_rejects_bad_buffers(device):
+    """
+    Tests that read-only or undersized read buffers are rejected.
+    """
+    config = device.create_spi_config()
+
+    with pytest.raises(TypeError):
+        device.spi_write_readinto(config, b'\x01\x02', b'\x00\x00')
+    with pytest.raises(ValueError):
+        device.spi_write_readinto(config, b'\x01\x02', bytearray(1))
+
+
+def test_buffer_arena_size_classes():
+    """
+    Tests that buffers are rounded up to power-of-two size classes and reused.
+    """
+    arena = ni845x.BufferArena()
+
+    buffer = arena.acquire(5)
+    assert len(buffer) == 8
+    arena.release(buffer)
+
+    assert arena.acquire(7) is buffer
+    assert arena.stats() == {"hits": 1, "misses": 1, "bytes_held": 0}
+
+
+def test_buffer_arena_allocates_oversized_requests_exactly():
+    """
+    Tests that requests above the largest pooled size are not rounded up or retained.
+    """
+    arena = ni845x.BufferArena(max_buffer_size=1024)
+
+    buffer = arena.acquire(1500)
+    assert len(buffer) == 1500
+    arena.release(buffer)
+
+    assert arena.stats() == {"hits": 0, "misses": 1, "bytes_held": 0}
+
+
+def test_spi_write_read_reuses_pooled_buffers(device):
+    """
+    Tests that repeated transfers hit the device's buffer arena and that
+    closing the device releases the pooled buffers.
+    """
+    config = device.create_spi_config()
+
+    for _ in range(10):
+        device.spi_write_read(config, b'\x01\x02\x03')
+
+    # The first call allocates the write and read buffers; the rest are hits.
+    assert device.buffer_arena.misses == 2
+    assert device.buffer_arena.hits == 18
+    assert device.buffer_arena.bytes_held == 8
+
+    device.close()
+    assert device.buffer_arena.bytes_held == 0
+
+
+def test_spi_script_runs_sequence_and_extracts_read_data(device):
+    """
+    Tests that an SPI script records its steps and that the read data of each
+    write/read step can be extracted after a single run.
+    """
+    # Arrange
+    script = device.create_spi_script()
+    script.cs_low(0)
+    write_enable = script.write_read(b'\x06')
+    script.cs_high(0)
+    script.cs_low(0)
+    read_status = script.write_read(b'\x05\x00')
+    script.cs_high(0)
+
+    # Act
+    device.spi_script_run(script)
+
+    # Assert
+    assert script.extract_read_data(read_status).tobytes() == b'\x00\x05'
+    assert [view.tobytes() for view in script.read_data()] == [b'\x06', b'\x00\x05']
+    assert script.read_indices == [write_enable, read_status]
+
+
+def test_spi_stream_yields_double_buffered_chunks(device, fake_dll):
+    """
+    Tests that the stream generator reads into alternating preallocated
+    buffers, honours total_bytes and stops the stream when exhausted.
+    """
+    config = device.create_spi_stream_config()
+
+    chunks = []
+    for chunk in device.spi_stream(config, chunk_size=4, total_bytes=10):
+        assert fake_dll.running_streams
+        chunks.append(chunk)
+
+    assert [chunk.tobytes() for chunk in chunks[-1:]] == [b'\x08\x09']
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    # The first and third chunks share the same underlying buffer.
+    assert chunks[0].obj is chunks[2].obj
+    assert not fake_dll.running_streams
+
+
+def test_spi_stream_ends_on_empty_read():
+    """
+    Tests that an unbounded stream stops, instead of spinning, once a read returns no data.
+    """
+    source = iter([b'\x01\x02\x03\x04', b'\x05\x06'])
+    fake = fake_ni845x.install(stream_source=lambda num_bytes: next(source, b''))
+    try:
+        with ni845x.Ni845x(fake.devices[0]) as device:
+            config = device.create_spi_stream_config()
+
+            chunks = [chunk.tobytes() for chunk in device.spi_stream(config, chunk_size=4)]
+
+            assert chunks == [b'\x01\x02\x03\x04', b'\x05\x06']
+            assert not fake.running_streams
+    finally:
+        ni845x.set_library(None)
+
+
+def test_operations_on_one_device_are_serialized(device, fake_dll):
+    """
+    Tests that the per-device lock prevents overlapping DLL calls when one
+    device is shared by several threads.
+    """
+    in_flight = []
+    overlaps = []
+
+    def spi_responder(data, settings):
+        in_flight.append(1)
+        if len(in_flight) > 1:
+            overlaps.append(len(in_flight))
+        time.sleep(0.001)
+        in_flight.pop()
+        return data
+
+    fake_dll.spi_responder = spi_responder
+    config = device.create_spi_config()
+
+    threads = [
+        threading.Thread(target=lambda: [device.spi_write_read(config, b'\x00') for _ in range(5)])
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert overlaps == []
+
+
+def test_load_library_uses_environment_path(monkeypatch):
+    """
+    Tests that an explicit library path can be given through the environment
+    and that a failed load surfaces as an OSError.
+    """
+    monkeypatch.setenv('PRISM2_NI845X_LIBRARY', '/nonexistent/libni845x.so')
+
+    with pytest.raises(OSError, match='libni845x.so'):
+        ni845x.load_library()
+
+
+def test_functions_are_bound_on_first_use(fake_dll):
+    """
+    Tests that the library proxy applies prototypes and caches functions
+    the first time they are looked up.
+    """
+    func = ni845x.ni845x_dll.ni845xOpen
+
+    assert func is fake_dll.ni845xOpen
+    assert func.restype is ni845x.int32
+    assert 'ni845xOpen' in vars(ni845x.ni845x_dll)
+
+
+def test_spi_configuration_cache_reuses_and_evicts_handles(fake_dll):
+    """
+    Tests that the configuration cache returns the same handle for the same
+    bus settings, applies the settings once and closes the least recently
+    used handle when full.
+    """
+    cache = ni845x.SpiConfigurationCache(max_handles=2)
+
+    with cache.use(chip_select=0, clock_rate_khz=10000) as flash:
+        pass
+    with cache.use(chip_select=1, clock_rate_khz=500, clock_phase=ni845x.kNi845xSpiClockPhaseSecondEdge) as adc:
+        pass
+
+    with cache.use(chip_select=0, clock_rate_khz=10000) as config:
+        assert config is flash
+    assert adc.settings == (0, 1, 500, 0, 1, 8)
+
+    # A third target evicts the least recently used handle (the ADC).
+    with cache.use(chip_select=2):
+        pass
+    assert adc._closed
+    assert not flash._closed
+    assert cache.stats() == {"hits": 1, "misses": 3, "evictions": 1, "open_handles": 2}
+
+    cache.close()
+    assert flash._closed
+    assert len(cache) == 0
+
+
+def test_spi_configuration_cache_defers_closing_handles_in_use(fake_dll):
+    """
+    Tests that a handle evicted (or left by close()) while a caller still
+    holds it stays open until its last release.
+    """
+    cache = ni845x.SpiConfigurationCache(max_handles=1)
+
+    flash = cache.acquire(chip_select=0)
+    again = cache.acquire(chip_select=0)
+    with cache.use(chip_select=1) as adc:
+        # The flash handle was evicted but is still held twice.
+        assert not flash._closed
+        assert cache.stats()["open_handles"] == 2
+        cache.release(flash)
+        assert not flash._closed
+        cache.release(again)
+        assert flash._closed
+
+        cache.close()
+        assert not adc._closed
+    assert adc._closed
+    assert cache.stats()["open_handles"] == 0
+
+
+@pytest.mark.parametrize("keep_cs_asserted", [False, True])
+def test_spi_write_read_chunked_reassembles_chunks(device, keep_cs_asserted):
+    """
+    Tests that an oversize transfer is split into chunks whose read data is
+    reassembled in order into a single output buffer.
+    """
+    config = device.create_spi_config()
+    write_data = bytes(range(10))
+
+    result = device.spi_write_read_chunked(config, write_data, chunk_size=4, keep_cs_asserted=keep_cs_asserted)
+
+    # The fake DLL reverses each chunk independently.
+    assert result.tobytes() == bytes([3, 2, 1, 0, 7, 6, 5, 4, 9, 8])
+
+
+def test_find_devices_and_errors_through_fake_library():
+    """
+    Tests device discovery and driver error strings end-to-end through the
+    fake library.
+    """
+    fake_ni845x.install(devices=["USB-8451-A", "USB-8452-B"])
+    try:
+        assert ni845x.Ni845x.find_devices() == ["USB-8451-A", "USB-8452-B"]
+
+        with pytest.raises(ni845x.Ni845xError, match="resource not found"):
+            ni845x.Ni845x("USB-8451-MISSING")
+    finally:
+        ni845x.set_library(None)
+
+
+def test_i2c_script_register_dump_matches_single_calls(device, fake_dll):
+    """
+    Tests that a scripted register dump returns the same data as the
+    single-call write/read path, in one script run.
+    """
+    fake_dll.i2c_memory[0x50][:] = bytes(range(255, -1, -1))
+    config = device.create_i2c_config()
+    config.set_address(0x50)
+
+    single = b''.join(
+        device.i2c_write(config, bytes([register])) or device.i2c_read(config, 1)
+        for register in range(16)
+    )
+
+    script = device.create_i2c_script()
+    for register in range(16):
+        script.read_register(0x50, register, 1)
+    device.i2c_script_run(script)
+
+    assert b''.join(view.tobytes() for view in script.read_data()) == single == bytes(range(255, 239, -1))
+    assert fake_dll.calls['ni845xI2cScriptRun'] == 1
+
+
+def test_dio_port_round_trip(device):
+    """
+    Tests a DIO write followed by a read back.
+    """
+    device.dio_set_port_line_direction_map(0, 0xFF)
+    device.dio_write_port(0, 0xAA)
+
+    assert device.dio_read_port(0) == 0xAA
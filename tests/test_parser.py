@@ -0,0 +1,437 @@
+import collections
+
+import pytest
+from src.prism2.protocol import checksum, decoder, loader, parser
+from src.prism2.protocol.cache import DecodeCache
+
+
+@pytest.fixture(autouse=True)
+def restore_definitions():
+    """Fixture that restores the built-in protocol definitions after each test."""
+    definitions = parser.PROTOCOL_DEFINITIONS
+    yield
+    parser.set_protocol_definitions(definitions)
+
+
+def test_parse_hex_data_breaks_down_known_command():
+    """
+    Tests that a known command is broken down field by field.
+    """
+    assert parser.parse_hex_data("0100", is_command=True) == (
+        "Read Status Register (Command)\n"
+        " - Command (1B): 0x01\n"
+        " - Dummy Byte (1B): 0x00"
+    )
+
+
+def test_parse_hex_data_reports_unparsed_and_partial_data():
+    """
+    Tests trailing bytes beyond the field map and messages shorter than it.
+    """
+    assert parser.parse_hex_data("06AB", is_command=True) == (
+        "Write Enable (Command)\n"
+        " - Command (1B): 0x06\n"
+        " - Unparsed Data: 0xAB"
+    )
+    assert parser.parse_hex_data("01", is_command=False) == (
+        "Read Status Register (Response)\n"
+        " - Status (1B): 0x01 (WIP)"
+    )
+
+
+def test_parse_hex_data_falls_back_to_default_definition():
+    """
+    Tests that unknown opcodes use the default definition's rest-of-data field,
+    and that empty field maps and empty input are reported.
+    """
+    assert parser.parse_hex_data("DEADBEEF", is_command=True) == (
+        "Unknown Command (Command)\n"
+        " - Data (4B): 0xDEADBEEF"
+    )
+    assert parser.parse_hex_data("C7", is_command=False) == "Chip Erase (Response)\n - No response fields defined."
+    assert parser.parse_hex_data("", is_command=True) == "No data to parse."
+
+
+def test_decoder_table_is_compiled_once_per_definition_set():
+    """
+    Tests that the compiled decoders are reused until the definitions change.
+    """
+    table = parser.get_decoder_table()
+    assert parser.get_decoder_table() is table
+
+    definitions = dict(parser.PROTOCOL_DEFINITIONS)
+    definitions["9F"] = {
+        "name": "Read JEDEC ID",
+        "fields": collections.OrderedDict([("Command", 1)]),
+        "response": collections.OrderedDict([("Dummy", 1), ("JEDEC ID", 3)]),
+    }
+    parser.set_protocol_definitions(definitions)
+
+    assert parser.get_decoder_table() is not table
+    assert parser.parse_hex_data("9F", is_command=True).startswith("Read JEDEC ID")
+
+
+@pytest.mark.parametrize("data", [
+    b'\x01\x00\x7F',
+    bytearray(b'\x01\x00\x7F'),
+    memoryview(b'\xFF\x01\x00\x7F')[1:],
+])
+def test_parse_bytes_matches_parse_hex_data(data):
+    """
+    Tests that parse_bytes accepts binary buffers, including memoryview
+    slices, and renders the same breakdown as parse_hex_data.
+    """
+    assert str(parser.parse_bytes(data, is_command=True)) == parser.parse_hex_data("01007F", is_command=True)
+    assert str(parser.parse_bytes(b'', is_command=False)) == "No data to parse."
+
+
+def test_parse_bytes_returns_field_records_viewing_the_data():
+    """
+    Tests the structured result: field offsets, lengths and raw views into the
+    caller's buffer, with no text rendered until asked for.
+    """
+    data = bytearray(b'\x01\x00\x7F')
+
+    result = parser.parse_bytes(data, is_command=True)
+
+    assert result.name == "Read Status Register"
+    assert [(field.name, field.offset, field.length) for field in result] == [("Command", 0, 1), ("Dummy Byte", 1, 1)]
+    assert result.unparsed.tobytes() == b'\x7F'
+    assert result._text is None
+
+    data[1] = 0x42
+    assert result["Dummy Byte"].raw.tobytes() == b'\x42'
+
+
+def test_fields_can_be_interpreted_as_integers_and_enums():
+    """
+    Tests integer and enum field specs, including their rendering.
+    """
+    parser.set_protocol_definitions(dict(parser.PROTOCOL_DEFINITIONS, **{
+        "0B": {
+            "name": "Set Mode",
+            "fields": collections.OrderedDict([
+                ("Command", {"length": 1, "enum": {0x0B: "SET_MODE"}}),
+                ("Mode", {"length": 1, "enum": {0: "IDLE", 1: "RUNNING"}}),
+                ("Offset", {"length": 2, "type": "int", "byteorder": "little"}),
+            ]),
+            "response": collections.OrderedDict([]),
+        },
+    }))
+
+    result = parser.parse_bytes(b'\x0B\x05\xFE\xFF', is_command=True)
+
+    assert result.values() == {"Command": "SET_MODE", "Mode": 5, "Offset": -2}
+    assert result["Offset"].to_int(signed=False) == 0xFFFE
+    assert str(result) == (
+        "Set Mode (Command)\n"
+        " - Command (1B): 0x0B (SET_MODE)\n"
+        " - Mode (1B): 0x05\n"
+        " - Offset (2B): 0xFEFF"
+    )
+
+
+DEFINITIONS_JSON = """
+{
+    "9F": {
+        "name": "Read JEDEC ID",
+        "fields": {"Command": 1, "Dummy": 3},
+        "response": {"Dummy": 1, "Manufacturer": {"length": 1, "enum": {"0xEF": "Winbond"}}, "Device": 2}
+    }
+}
+"""
+
+DEFINITIONS_TOML = """
+["9F"]
+name = "Read JEDEC ID"
+
+["9F".fields]
+Command = 1
+Dummy = 3
+
+["9F".response]
+Dummy = 1
+Manufacturer = { length = 1, enum = { "0xEF" = "Winbond" } }
+Device = 2
+"""
+
+
+@pytest.mark.parametrize("filename, contents", [
+    ("flash.json", DEFINITIONS_JSON),
+    ("flash.toml", DEFINITIONS_TOML),
+])
+def test_load_protocol_definitions_from_file(tmp_path, mocker, filename, contents):
+    """
+    Tests loading definitions from JSON and TOML, including the added default
+    definition, and that a second load is served from the compiled cache.
+    """
+    path = tmp_path / filename
+    path.write_text(contents)
+    cache_dir = tmp_path / "cache"
+
+    definitions = parser.load_protocol_definitions(str(path), cache_dir=str(cache_dir))
+
+    assert list(definitions) == ["9F", "default"]
+    assert list(definitions["9F"]["response"]) == ["Dummy", "Manufacturer", "Device"]
+    result = parser.parse_bytes(b'\x9F\xEF\x40\x18', is_command=False)
+    assert result.name == "Read JEDEC ID"
+    assert result["Manufacturer"].value == "Winbond"
+    assert len(list(cache_dir.iterdir())) == 1
+
+    # The cached table is used as-is, without re-reading the definitions.
+    validate = mocker.spy(loader, "validate_definitions")
+    parser.load_protocol_definitions(str(path), cache_dir=str(cache_dir))
+    validate.assert_not_called()
+    assert parser.parse_hex_data("9F000000", is_command=True).startswith("Read JEDEC ID")
+
+
+def test_compiled_cache_is_invalidated_by_a_code_change(tmp_path, mocker):
+    """
+    Tests that cache entries are keyed by the compiled-form source, so a
+    change to that code recompiles instead of loading a stale pickle.
+    """
+    path = tmp_path / "flash.json"
+    path.write_text(DEFINITIONS_JSON)
+    cache_dir = tmp_path / "cache"
+    loader.load_decoder_table(str(path), cache_dir=str(cache_dir))
+
+    mocker.patch.object(loader, "compiled_form_fingerprint", return_value="0" * 64)
+    validate = mocker.spy(loader, "validate_definitions")
+    loader.load_decoder_table(str(path), cache_dir=str(cache_dir))
+
+    validate.assert_called_once()
+    assert len(list(cache_dir.iterdir())) == 2
+
+
+@pytest.mark.parametrize("definitions, message", [
+    ({"XY": {"name": "Bad", "fields": {}}}, "hex opcode"),
+    ({"01": {"fields": {}}}, "no 'name'"),
+    ({"01": {"name": "Bad", "fields": {"Data": -1, "More": 1}}}, "follows the rest-of-data field"),
+    ({"01": {"name": "Bad", "fields": {"Command": {"length": 1, "type": "float"}}}}, "type must be"),
+    ({"01": {"name": "Bad", "fields": {"Command": "1"}}}, "length must be"),
+    ({"01": {"name": "Bad", "fields": {"Command": 1, "CRC": {"length": 2, "checksum": {"algorithm": 16}}}}}, "01.fields: Field 'CRC': checksum algorithm must be"),
+])
+def test_validate_definitions_rejects_malformed_files(definitions, message):
+    """
+    Tests that malformed definitions are reported with their location.
+    """
+    with pytest.raises(ValueError, match=message):
+        loader.validate_definitions(definitions)
+
+
+@pytest.mark.parametrize("spec", [
+    {"length": 1, "bits": {"X": [6, 8]}},
+    {"length": 1, "checksum": "crc16-ccitt"},
+    {"length": 1, "checksum": {"algorithm": "crc8", "start": 2}},
+    {"length": 1, "enum": {"zero": "ZERO"}},
+    {"length": 1, "colour": "red"},
+])
+def test_loader_and_decoder_report_the_same_field_errors(spec):
+    """
+    Tests that the loader reports a field spec error exactly as FieldLayout
+    does, prefixed with where the field is in the file.
+    """
+    with pytest.raises(ValueError) as layout_error:
+        decoder.FieldLayout.from_spec("CRC", 1, 1, spec)
+    with pytest.raises(ValueError) as loader_error:
+        loader.validate_definitions({"01": {"name": "Bad", "fields": {"Command": 1, "CRC": spec}}}, source="defs.json")
+
+    assert str(loader_error.value) == f"defs.json: 01.fields: {layout_error.value}"
+
+
+def test_dispatch_finds_longest_and_most_specific_opcode():
+    """
+    Tests multi-byte, wildcard and masked keys: the longest match wins, and
+    among keys of the same length the one with more fixed bits wins.
+    """
+    def definition(name):
+        return {"name": name, "fields": collections.OrderedDict([("Opcode", 1)]), "response": collections.OrderedDict()}
+
+    parser.set_protocol_definitions({
+        "0B": definition("Read"),
+        "0B10": definition("Read Config"),
+        "8X": definition("Bank 8 Register"),
+        "80/80": definition("Write Register"),
+        "85": definition("Write Control"),
+        "default": parser.PROTOCOL_DEFINITIONS["default"],
+    })
+
+    def name(hex_string):
+        return parser.parse_bytes(bytes.fromhex(hex_string), is_command=True).name
+
+    assert name("0B10FF") == "Read Config"
+    assert name("0B11") == "Read"
+    assert name("0B") == "Read"
+    assert name("8A") == "Bank 8 Register"
+    assert name("85") == "Write Control"
+    assert name("F0") == "Write Register"
+    assert name("70") == "Unknown Command"
+
+
+def test_opcode_keys_are_validated():
+    """
+    Tests that malformed or overly broad keys are rejected.
+    """
+    with pytest.raises(ValueError, match="odd number"):
+        decoder.parse_opcode_key("123")
+    with pytest.raises(ValueError, match="lengths differ"):
+        decoder.parse_opcode_key("80/8000")
+    with pytest.raises(ValueError, match="limit"):
+        decoder.parse_opcode_key("XXXX")
+
+
+def test_decode_transaction_uses_the_command_definition():
+    """
+    Tests that a response is laid out by its command's definition, not its
+    own first byte, and that response_offset skips the bytes clocked in
+    while the command was sent.
+    """
+    parser.set_protocol_definitions(dict(parser.PROTOCOL_DEFINITIONS, **{
+        "9F": {
+            "name": "Read JEDEC ID",
+            "fields": collections.OrderedDict([("Command", 1), ("Dummy", 3)]),
+            "response_offset": 1,
+            "response": collections.OrderedDict([("Manufacturer", 1), ("Device", 2)]),
+        },
+    }))
+
+    transaction = parser.decode_transaction(b'\x9F\x00\x00\x00', b'\xFF\xEF\x40\x18')
+
+    assert transaction.response.name == "Read JEDEC ID"
+    assert [(field.name, field.offset) for field in transaction.response] == [
+        ("Command Phase", 0), ("Manufacturer", 1), ("Device", 2),
+    ]
+    assert transaction.response["Device"].raw.tobytes() == b'\x40\x18'
+    assert str(transaction) == (
+        "--- Command ---\n"
+        "Read JEDEC ID (Command)\n"
+        " - Command (1B): 0x9F\n"
+        " - Dummy (3B): 0x000000\n"
+        "\n"
+        "--- Response ---\n"
+        "Read JEDEC ID (Response)\n"
+        " - Command Phase (1B): 0xFF\n"
+        " - Manufacturer (1B): 0xEF\n"
+        " - Device (2B): 0x4018"
+    )
+
+
+def test_status_bits_are_decoded_from_a_precomputed_table():
+    """
+    Tests the named bits on the Read Status Register response and that
+    single-byte fields share precomputed decodes.
+    """
+    def status(response):
+        return parser.decode_transaction(b'\x01\x00', response).response["Status"]
+
+    first = status(b'\x1E\x00')
+    second = status(b'\x1E\xFF')
+
+    assert first.bits == {"WIP": 0, "WEL": 1, "BP0": 1, "BP1": 1, "BP2": 1, "TB": 0, "SEC": 0, "SRP": 0}
+    assert first.bits is second.bits
+    assert first.render() == " - Status (1B): 0x1E (WEL | BP0 | BP1 | BP2)"
+    assert status(b'\x00\x00').render() == " - Status (1B): 0x00"
+
+
+def test_bitfield_ranges_and_enums_on_multi_byte_fields():
+    """
+    Tests multi-bit ranges combined with an enum, and bitfields on a field
+    too wide for a lookup table.
+    """
+    mode = decoder.FieldLayout.from_spec("Mode", 0, 1, {"length": 1, "enum": {0x82: "FAST"}, "bits": {"EN": 7, "DIV": [0, 2]}})
+    config = decoder.FieldLayout.from_spec("Config", 0, 2, {"length": 2, "byteorder": "little", "bits": {"GAIN": [8, 11]}})
+
+    assert decoder.FieldValue(mode, b'\x82').render() == " - Mode (1B): 0x82 (FAST; EN | DIV=2)"
+    assert decoder.FieldValue(mode, b'\x03').value == 3
+    assert config.table is None
+    assert decoder.FieldValue(config, b'\x00\x05').bits == {"GAIN": 5}
+    with pytest.raises(ValueError, match="outside"):
+        loader.validate_definitions({"01": {"name": "Bad", "fields": {"Command": {"length": 1, "bits": {"X": [6, 8]}}}}})
+
+
+def test_decode_transaction_results_are_memoized():
+    """
+    Tests that repeated transactions are served from the decode cache and
+    that reloading the definitions invalidates it.
+    """
+    parser.decode_cache.clear()
+    hits = parser.decode_cache.hits
+    command = bytearray(b'\x01\x00')
+
+    first = parser.decode_transaction(command, b'\x03\x00')
+    command[1] = 0xFF # The cached result doesn't view the caller's buffer
+    assert parser.decode_transaction(b'\x01\x00', bytearray(b'\x03\x00')) is first
+    assert parser.decode_cache.hits == hits + 1
+    assert first.command["Dummy Byte"].raw.tobytes() == b'\x00'
+
+    parser.set_protocol_definitions(dict(parser.PROTOCOL_DEFINITIONS))
+    assert parser.decode_transaction(b'\x01\x00', b'\x03\x00') is not first
+
+
+def test_decode_cache_evicts_least_recently_used():
+    """
+    Tests the LRU bound and the cache counters.
+    """
+    cache = DecodeCache(max_entries=2)
+
+    cache.get("a", lambda: 1)
+    cache.get("b", lambda: 2)
+    cache.get("a", lambda: None)
+    cache.get("c", lambda: 3)
+
+    assert cache.get("a", lambda: None) == 1
+    assert cache.get("b", lambda: "decoded again") == "decoded again"
+    assert cache.stats() == {"hits": 2, "misses": 4, "evictions": 2, "entries": 2}
+
+
+def test_checksum_fields_are_verified():
+    """
+    Tests CRC verification in parsed results and the rendered breakdown.
+    """
+    parser.set_protocol_definitions(dict(parser.PROTOCOL_DEFINITIONS, **{
+        "3B": {
+            "name": "Write Frame",
+            "fields": collections.OrderedDict([
+                ("Command", 1),
+                ("Payload", 4),
+                ("CRC", {"length": 2, "checksum": "crc16-ccitt"}),
+            ]),
+            "response": collections.OrderedDict([
+                ("Payload", 2),
+                ("CRC", {"length": 1, "checksum": {"algorithm": "crc8", "poly": "0x31"}}),
+            ]),
+        },
+    }))
+    frame = b'\x3B\xDE\xAD\xBE\xEF'
+    crc = checksum.get_crc(16, 0x1021, 0xFFFF).compute(frame)
+
+    good = parser.parse_bytes(frame + crc.to_bytes(2, 'big'), is_command=True)
+    bad = parser.parse_bytes(frame + b'\x00\x00', is_command=True)
+
+    assert good.checksum_ok is True
+    assert good.render().endswith(" [CRC OK]")
+    assert bad.checksums() == {"CRC": False}
+    assert bad.render().endswith(f"0x0000 [CRC BAD, expected 0x{crc:04X}]")
+    assert parser.parse_bytes(frame + b'\x00', is_command=True).checksum_ok is False
+    assert parser.parse_bytes(b'\x06', is_command=True).checksum_ok is None
+
+
+@pytest.mark.parametrize("algorithm, expected", [
+    ("crc8", 0xF4),
+    ("crc8-maxim", 0xA1),
+    ("crc16-ccitt", 0x29B1),
+    ("crc16-xmodem", 0x31C3),
+    ("crc16-kermit", 0x2189),
+    ("crc16-modbus", 0x4B37),
+    ("crc32", 0xCBF43926),
+])
+def test_crc_presets_match_check_values(algorithm, expected):
+    """
+    Tests each preset against its standard check value, through both the
+    lookup table and any zlib/binascii fast path.
+    """
+    crc, _ = checksum.from_spec(algorithm)
+    table_only = checksum.Crc(*checksum.PRESETS[algorithm])
+    table_only._fast = None
+
+    assert crc.compute(b'123456789') == table_only.compute(b'123456789') == expected
@@ -0,0 +1,109 @@
+import collections
+
+import pytest
+from src.prism2.protocol import parser
+from src.prism2.protocol.stream import StreamDecoder, decode_stream
+
+
+@pytest.fixture(autouse=True)
+def sample_definitions():
+    """Fixture with fixed-size sample records keyed by one- and two-byte opcodes."""
+    definitions = parser.PROTOCOL_DEFINITIONS
+    parser.set_protocol_definitions({
+        "A5": {
+            "name": "Sample",
+            "fields": collections.OrderedDict(),
+            "response": collections.OrderedDict([("Sync", 1), ("Value", {"length": 2, "type": "uint"})]),
+        },
+        "A6": {
+            "name": "Marker",
+            "fields": collections.OrderedDict(),
+            "response": collections.OrderedDict([("Sync", 1)]),
+        },
+        "A601": {
+            "name": "Event",
+            "fields": collections.OrderedDict(),
+            "response": collections.OrderedDict([("Sync", 2), ("Code", 1)]),
+        },
+        "default": definitions["default"],
+    })
+    yield
+    parser.set_protocol_definitions(definitions)
+
+
+def test_records_split_across_chunks_are_reassembled():
+    """
+    Tests that records are framed across arbitrary chunk boundaries, that
+    unknown bytes are skipped, and that only one partial record is kept
+    between chunks.
+    """
+    stream = b'\xA5\x00\x01' + b'\xA5\x00\x02' + b'\xA6\x01\x07' + b'\xA6' + b'\x02' + b'\xA5\x12\x34'
+    decoder = StreamDecoder()
+
+    records = []
+    for start in range(0, len(stream), 2):
+        records.extend((record.name, record.values()) for record in decoder.feed(stream[start:start + 2]))
+        assert decoder.stats()["pending"] < 3
+
+    assert records == [
+        ("Sample", {"Sync": b'\xA5', "Value": 1}),
+        ("Sample", {"Sync": b'\xA5', "Value": 2}),
+        ("Event", {"Sync": b'\xA6\x01', "Code": b'\x07'}),
+        ("Marker", {"Sync": b'\xA6'}),
+        ("Sample", {"Sync": b'\xA5', "Value": 0x1234}),
+    ]
+    assert decoder.stats() == {"records": 5, "skipped": 1, "bytes_fed": len(stream), "pending": 0}
+
+
+def test_resync_across_a_chunk_boundary_matches_a_single_feed():
+    """
+    Tests that when skipping a byte leaves held bytes that already hold a
+    whole record, every split of the stream decodes like the unsplit stream.
+    """
+    parser.set_protocol_definitions({
+        "A6010203": {"name": "Long", "fields": collections.OrderedDict(), "response": collections.OrderedDict([("Sync", 4)])},
+        "01": {"name": "One", "fields": collections.OrderedDict(), "response": collections.OrderedDict([("Sync", 1)])},
+        "02": {"name": "Two", "fields": collections.OrderedDict(), "response": collections.OrderedDict([("Sync", 1)])},
+        "default": parser.PROTOCOL_DEFINITIONS["default"],
+    })
+    stream = b'\xA6\x01\x02\xFF\x01\x02'
+
+    def decode(*chunks):
+        decoder = StreamDecoder()
+        records = [(record.name, bytes(record.data).hex()) for chunk in chunks for record in decoder.feed(chunk)]
+        return records, decoder.stats()
+
+    expected = decode(stream)
+    assert expected[0] == [("One", "01"), ("Two", "02"), ("One", "01"), ("Two", "02")]
+    for split in range(1, len(stream)):
+        assert decode(stream[:split], stream[split:]) == expected
+
+
+def test_records_within_a_chunk_view_the_chunk():
+    """
+    Tests that complete records are decoded in place and that a trailing
+    partial record is returned by flush().
+    """
+    chunk = bytearray(b'\xA5\x00\x01\xA5\x00')
+    decoder = StreamDecoder()
+
+    (record,) = decoder.feed(chunk)
+    chunk[2] = 0x09
+
+    assert record["Value"].value == 9
+    assert decoder.flush() == b'\xA5\x00'
+
+
+def test_decode_stream_with_fixed_record_size():
+    """
+    Tests fixed-size framing, which also frames records whose definition
+    has a rest-of-data field.
+    """
+    chunks = [b'\x01\x02\x03', b'\x04\x05', b'\x06\x07\x08']
+
+    records = list(decode_stream(chunks, record_size=4))
+
+    assert [(record.name, record["Data"].hex()) for record in records] == [
+        ("Unknown Command", "01020304"),
+        ("Unknown Command", "05060708"),
+    ]